@@ -0,0 +1,37 @@
+"""
+Micro-benchmarks for the restclients DAO and cache layers.
+
+Run from the repository root, e.g.:
+
+    python -m benchmarks.dao_registry
+"""
+import os
+import timeit
+
+
+def setup_django():
+    """
+    Configures django with the benchmark settings, and creates the
+    cache tables if the database is empty.
+    """
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "benchmarks.settings")
+    import django
+    if hasattr(django, "setup"):
+        django.setup()
+
+    from django.core.management import call_command
+    call_command("syncdb", interactive=False, verbosity=0)
+
+
+def report(label, seconds, count):
+    """
+    Prints the per-call cost of count calls that took seconds in total.
+    """
+    print "%-40s %10.2f usec/call" % (label, seconds * 1000000.0 / count)
+
+
+def best_of(func, count, repeat=3):
+    """
+    Returns the fastest of repeat runs of count calls to func, in seconds.
+    """
+    return min(timeit.repeat(func, number=count, repeat=repeat))
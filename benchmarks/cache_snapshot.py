@@ -0,0 +1,44 @@
+"""
+Times exporting a large cache to a snapshot, and loading it into an empty
+cache, 1,000,000 rows by default.
+
+    RESTCLIENTS_BENCHMARK_ROWS=1000000 python -m benchmarks.cache_snapshot
+"""
+import os
+import time
+import tempfile
+from benchmarks import setup_django
+
+setup_django()
+
+from benchmarks.cache_table import populate, ROWS, CONTENT
+from django.db import connection
+from restclients.cache_snapshot import export_cache, import_cache
+from restclients.models import CacheEntry, CacheEntryTimed
+
+
+def clear():
+    cursor = connection.cursor()
+    cursor.execute("DELETE FROM %s" % CacheEntryTimed._meta.db_table)
+    cursor.execute("DELETE FROM %s" % CacheEntry._meta.db_table)
+
+
+if __name__ == "__main__":
+    populate()
+    print "%d rows of %d byte bodies" % (ROWS, len(CONTENT))
+
+    handle, path = tempfile.mkstemp(suffix=".snapshot")
+    os.close(handle)
+    try:
+        start = time.time()
+        export_cache(path)
+        print "Export: %10.2f seconds, %d byte snapshot" % (
+            time.time() - start, os.path.getsize(path))
+
+        clear()
+        start = time.time()
+        stats = import_cache(path)
+        print "Import: %10.2f seconds, %d entries" % (time.time() - start,
+                                                      stats["imported"])
+    finally:
+        os.remove(path)
@@ -0,0 +1,98 @@
+"""
+Measures TimedCache reads and writes against a large CacheEntryTimed
+table, 1,000,000 rows by default, comparing the old lookups - filter() and
+len() on every column - with the current single-row lookups.
+
+    RESTCLIENTS_BENCHMARK_ROWS=1000000 python -m benchmarks.cache_table
+"""
+import os
+import random
+from datetime import datetime
+from benchmarks import setup_django, report, best_of
+
+setup_django()
+
+from django.db import connection, transaction
+from django.utils.timezone import utc
+from restclients.cache_implementation import TimeSimpleCache
+from restclients.models import CacheEntryTimed, get_cache_key
+from restclients.mock_http import MockHTTP
+
+
+ROWS = int(os.environ.get("RESTCLIENTS_BENCHMARK_ROWS", 1000000))
+CONTENT = "x" * int(os.environ.get("RESTCLIENTS_BENCHMARK_CONTENT_BYTES",
+                                   512))
+COUNT = 2000
+
+
+def populate():
+    """
+    Fills the cache tables directly - going through the ORM would take
+    far longer than the benchmark.
+    """
+    now = datetime.now(utc)
+    parent = CacheEntryTimed._meta.get_field("cacheentry_ptr").rel.to
+    cursor = connection.cursor()
+    with transaction.atomic():
+        for start in range(0, ROWS, 10000):
+            ids = range(start + 1, min(start + 10000, ROWS) + 1)
+            cursor.executemany(
+                "INSERT INTO %s (id, service, url, url_key, url_start, "
+                "status, header_pickle, content, content_encoding) VALUES "
+                "(%%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s, %%s)" %
+                parent._meta.db_table,
+                [(i, "sws", "/resource/%s" % i,
+                  get_cache_key("sws", "/resource/%s" % i),
+                  "/resource/%s" % i, 200, "[]", CONTENT, "")
+                 for i in ids])
+            cursor.executemany(
+                "INSERT INTO %s (cacheentry_ptr_id, time_saved) "
+                "VALUES (%%s, %%s)" % CacheEntryTimed._meta.db_table,
+                [(i, now) for i in ids])
+
+
+def random_url():
+    return "/resource/%s" % random.randint(1, ROWS)
+
+
+def old_read():
+    # What _response_from_cache did before
+    query = CacheEntryTimed.objects.filter(
+        url_key=get_cache_key("sws", random_url()))
+    if len(query):
+        query[0].content
+
+
+def new_read():
+    TimeSimpleCache().getCache("sws", random_url(), {})
+
+
+def old_write():
+    # What _process_response did before: load the whole row, then save it
+    query = CacheEntryTimed.objects.filter(
+        url_key=get_cache_key("sws", random_url()))
+    cache_entry = query[0]
+    cache_entry.content = CONTENT
+    cache_entry.headers = {}
+    cache_entry.time_saved = datetime.now(utc)
+    cache_entry.save()
+
+
+response = MockHTTP()
+response.status = 200
+response.data = CONTENT
+response.headers = {}
+
+
+def new_write():
+    TimeSimpleCache().processResponse("sws", random_url(), response)
+
+
+if __name__ == "__main__":
+    populate()
+    print "%d rows of %d byte bodies" % (ROWS, len(CONTENT))
+
+    report("Read, filter() and len()", best_of(old_read, COUNT), COUNT)
+    report("Read, single row lookup", best_of(new_read, COUNT), COUNT)
+    report("Write, load the whole row", best_of(old_write, COUNT), COUNT)
+    report("Write, load status and age", best_of(new_write, COUNT), COUNT)
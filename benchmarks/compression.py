@@ -0,0 +1,78 @@
+"""
+Compares storing the bundled resources/ payloads in the cache table with
+and without body compression: the bytes stored, and the cost of reading an
+entry back, with and without reading its body.
+"""
+import os
+from datetime import datetime
+from benchmarks import setup_django, report, best_of
+
+setup_django()
+
+from django.conf import settings
+from django.utils.timezone import utc
+from restclients.models import CacheEntryTimed
+
+
+RESOURCES = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "restclients", "resources")
+
+COUNT = 5
+
+
+def load_payloads():
+    payloads = []
+    for root, dirs, files in os.walk(RESOURCES):
+        for name in files:
+            with open(os.path.join(root, name), "rb") as handle:
+                data = handle.read()
+            try:
+                payloads.append(data.decode("utf-8"))
+            except UnicodeDecodeError:
+                # Images and such aren't cached as text
+                pass
+    return payloads
+
+
+def store(service, payloads, min_bytes):
+    settings.RESTCLIENTS_CACHE_COMPRESS_MIN_BYTES = min_bytes
+    now = datetime.now(utc)
+    for index, payload in enumerate(payloads):
+        CacheEntryTimed(service=service, url="/%s/%s" % (service, index),
+                        status=200, content=payload, time_saved=now).save()
+
+    stored = 0
+    compressed = 0
+    for entry in CacheEntryTimed.objects.filter(service=service):
+        stored += len(entry.stored_content)
+        if entry.content_encoding:
+            compressed += 1
+    return stored, compressed
+
+
+def read_all(service, with_body):
+    def read():
+        for entry in CacheEntryTimed.objects.filter(service=service):
+            if with_body:
+                entry.content
+    return read
+
+
+if __name__ == "__main__":
+    payloads = load_payloads()
+    raw_bytes = sum(len(payload) for payload in payloads)
+
+    plain_bytes, count = store("plain", payloads, None)
+    zlib_bytes, compressed = store("zlib", payloads, 1024)
+
+    print "%d payloads, %d characters" % (len(payloads), raw_bytes)
+    print "Stored uncompressed: %10d bytes" % plain_bytes
+    print "Stored compressed:   %10d bytes (%d of %d entries, %.1f%%)" % (
+        zlib_bytes, compressed, len(payloads),
+        100.0 * zlib_bytes / plain_bytes)
+
+    for service in ("plain", "zlib"):
+        report("Read %s entries, body not read" % service,
+               best_of(read_all(service, False), COUNT), COUNT * len(payloads))
+        report("Read %s entries, body read" % service,
+               best_of(read_all(service, True), COUNT), COUNT * len(payloads))
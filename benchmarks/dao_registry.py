@@ -0,0 +1,34 @@
+"""
+Measures the per-call overhead of resolving the configured DAO and cache
+classes, with and without the process-wide registry in restclients.dao.
+"""
+from benchmarks import setup_django, report, best_of
+
+setup_django()
+
+from restclients.dao import SWS_DAO, clear_dao_registry
+
+
+COUNT = 20000
+
+
+def uncached_lookup():
+    # What every getURL paid before the registry: an import_module and a
+    # new instance for both the DAO and the cache.
+    clear_dao_registry()
+    dao = SWS_DAO()
+    dao._getDAO()
+    dao._getCache()
+
+
+def cached_lookup():
+    dao = SWS_DAO()
+    dao._getDAO()
+    dao._getCache()
+
+
+if __name__ == "__main__":
+    report("DAO + cache lookup, resolved per call",
+           best_of(uncached_lookup, COUNT), COUNT)
+    report("DAO + cache lookup, from registry",
+           best_of(cached_lookup, COUNT), COUNT)
@@ -0,0 +1,28 @@
+"""
+Minimal django settings for running the benchmarks.
+"""
+import os
+
+SECRET_KEY = 'benchmarks'
+
+INSTALLED_APPS = (
+    'django.contrib.contenttypes',
+    'django.contrib.auth',
+    'restclients',
+)
+
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': os.environ.get('RESTCLIENTS_BENCHMARK_DB', ':memory:'),
+    }
+}
+
+MIDDLEWARE_CLASSES = ()
+
+USE_TZ = True
+TIME_ZONE = 'UTC'
+
+RESTCLIENTS_SWS_DAO_CLASS = 'restclients.dao_implementation.sws.File'
+RESTCLIENTS_PWS_DAO_CLASS = 'restclients.dao_implementation.pws.File'
+RESTCLIENTS_DAO_CACHE_CLASS = 'restclients.cache_implementation.NoCache'
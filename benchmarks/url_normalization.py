@@ -0,0 +1,73 @@
+"""
+Replays a workload of requests and reports how many duplicate cache keys
+url normalization collapses.
+
+    python -m benchmarks.url_normalization [request_log]
+
+A request log has one "service url" pair per line.  Without one, the
+workload is the query string urls the bundled resources/ answer, each
+requested several times with its parameters in a random order - what
+urlencode(dict) produces across processes with different hash seeds.
+"""
+import os
+import sys
+import random
+from benchmarks import setup_django
+
+setup_django()
+
+from restclients.util.url_normalization import collapse_report
+
+
+RESOURCES = os.path.join(os.path.dirname(os.path.dirname(
+    os.path.abspath(__file__))), "restclients", "resources")
+
+REPEAT = 10
+
+
+def load_log(path):
+    with open(path) as handle:
+        for line in handle:
+            line = line.strip()
+            if line:
+                service, url = line.split(None, 1)
+                yield service, url
+
+
+def synthetic_workload():
+    """
+    Rebuilds urls from the resource file names, which are the path and
+    the parameters joined with underscores, e.g.
+    sws/file/student/v5/term.json_year_2013_quarter_spring
+    """
+    requests = []
+    for service in sorted(os.listdir(RESOURCES)):
+        root = os.path.join(RESOURCES, service, "file")
+        for path, dirs, files in os.walk(root):
+            for name in files:
+                if ".json_" not in name:
+                    continue
+                resource, query = name.split(".json_", 1)
+                parts = query.split("_")
+                if len(parts) % 2:
+                    continue
+                params = ["%s=%s" % (parts[i], parts[i + 1])
+                          for i in range(0, len(parts), 2)]
+                prefix = path[len(root):] + "/" + resource + ".json?"
+                for i in range(REPEAT):
+                    random.shuffle(params)
+                    requests.append((service, prefix + "&".join(params)))
+    return requests
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        requests = load_log(sys.argv[1])
+    else:
+        requests = synthetic_workload()
+
+    report = collapse_report(requests)
+    print "Requests:               %10d" % report["requests"]
+    print "Cache keys as built:    %10d" % report["raw_keys"]
+    print "Cache keys, normalized: %10d" % report["normalized_keys"]
+    print "Duplicate keys removed: %10d" % report["collapsed"]
@@ -2,11 +2,122 @@
 Contains DAO Cache implementations
 """
 from restclients.mock_http import MockHTTP
-from restclients.models import CacheEntry, CacheEntryTimed
+from restclients.models import CacheEntry, CacheEntryTimed, \
+    CacheEntryExpires, CacheLease, get_cache_key, BULK_QUERY_SIZE, \
+    URL_START_LENGTH
 from restclients.cache_manager import store_cache_entry
 from datetime import datetime, timedelta
-from django.utils.timezone import make_aware, get_current_timezone
+from django.utils.timezone import make_aware, get_current_timezone, utc
+from email.utils import parsedate_tz, mktime_tz
 from django.conf import settings
+from django.db import transaction, IntegrityError
+from django.db.models import Q
+from hashlib import sha1
+from uuid import uuid4
+from restclients.util.counters import Counters
+from restclients.util.lru import LRUStore
+from restclients.util.headers import HeaderDict
+from restclients.cache_policy import get_cache_policy, get_matching_rule
+from restclients.util.sws_term import is_past_term_url
+from restclients.util.url_normalization import has_vary_headers
+import time
+
+try:
+    from django.core.cache import caches
+
+    def get_cache(alias):
+        return caches[alias]
+except ImportError:
+    # Django < 1.7
+    from django.core.cache import get_cache
+
+
+# Outcomes of TimedCache lookups, of the background refreshes of stale
+# entries, and of serving stale entries for failed requests: hit,
+# stale_hit, miss, refresh, refresh_error, refresh_skipped, stale_if_error.
+# ETagCache also counts revalidate and not_modified.  Entries removed by
+# invalidateCache are counted as invalidated.
+cache_stats = Counters()
+
+
+def get_stale_while_revalidate():
+    """
+    Returns the number of seconds past its max age that a successful entry
+    can still be served, while it is refreshed in the background.
+    """
+    return getattr(settings, "RESTCLIENTS_CACHE_STALE_WHILE_REVALIDATE", 0)
+
+
+def get_stale_if_error(service):
+    """
+    Returns the maximum age, in seconds, of a successful entry that can be
+    served for the service when a request fails with an exception or a 5xx.
+    Configured per service, e.g.
+    RESTCLIENTS_CACHE_STALE_IF_ERROR = {"sws": 60 * 60 * 24, "pws": 3600}
+    """
+    return getattr(settings, "RESTCLIENTS_CACHE_STALE_IF_ERROR",
+                   {}).get(service, 0)
+
+
+def mark_stale(response):
+    """
+    Flags a cached response that's being served in place of an error.
+    """
+    response.is_stale = True
+    response.headers = HeaderDict(response.headers)
+    response.headers["Warning"] = '110 - "Response is Stale"'
+    return response
+
+
+def is_invalidated(cache_url, url=None, url_prefix=None):
+    """
+    Returns True if invalidateCache(service, url, url_prefix) covers the
+    entry cached under cache_url.  An exact url covers its variants for
+    the RESTCLIENTS_CACHE_VARY_HEADERS, and with neither a url nor a
+    prefix, everything for the service is covered.
+    """
+    if url is not None:
+        return cache_url == url or cache_url.startswith(url + "#")
+    if url_prefix is not None:
+        return cache_url.startswith(url_prefix)
+    return True
+
+
+def starts_with(url_prefix):
+    """
+    Matches the cache entries whose url starts with url_prefix.  The
+    indexed url_start range narrows the rows down before url is compared.
+    """
+    start = url_prefix[:URL_START_LENGTH]
+    return Q(url_start__gte=start, url_start__lt=start + u"\uffff",
+             url__startswith=url_prefix)
+
+
+def delete_entries(model, service, url=None, url_prefix=None):
+    """
+    Deletes the model's cache entries that invalidateCache covers, a batch
+    at a time.  Returns the number deleted.
+    """
+    query = model.objects.filter(service=service)
+    if url is not None:
+        match = Q(url_key=get_cache_key(service, url))
+        if has_vary_headers(service):
+            match = match | starts_with(url + "#")
+        query = query.filter(match)
+    elif url_prefix is not None:
+        query = query.filter(starts_with(url_prefix))
+
+    deleted = 0
+    while True:
+        pks = list(query.values_list("pk", flat=True)[:BULK_QUERY_SIZE])
+        if not len(pks):
+            break
+        # Deleting the parent rows deletes the child rows too
+        CacheEntry.objects.filter(pk__in=pks).delete()
+        deleted += len(pks)
+
+    cache_stats.increment("invalidated", deleted)
+    return deleted
 
 
 class NoCache(object):
@@ -16,9 +127,18 @@ class NoCache(object):
     def getCache(self, service, url, headers):
         return None
 
+    def getCaches(self, service, urls, headers):
+        return {}
+
     def processResponse(self, service, url, response):
         pass
 
+    def processResponses(self, service, responses):
+        return {}
+
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        pass
+
 
 class TimedCache(object):
     """
@@ -26,47 +146,298 @@ class TimedCache(object):
     lengths of time.
     """
     def _response_from_cache(self, service, url, headers, max_age_in_seconds,
-                             max_error_age=60 * 5):
+                             max_error_age=60 * 5,
+                             stale_while_revalidate=None):
 
         # If max_age_in_seconds is 0, make sure we don't get a hit from this same second.
         if not max_age_in_seconds:
             return None
+
+        if stale_while_revalidate is None:
+            stale_while_revalidate = get_stale_while_revalidate()
+
         now = make_aware(datetime.now(), get_current_timezone())
-        time_limit = now - timedelta(seconds=max_age_in_seconds)
+        fresh_limit = now - timedelta(seconds=max_age_in_seconds)
+        time_limit = fresh_limit - timedelta(seconds=stale_while_revalidate)
 
-        query = CacheEntryTimed.objects.filter(service=service,
-                                               url=url,
-                                               time_saved__gte=time_limit)
+        hits = list(CacheEntryTimed.objects.filter(
+            url_key=get_cache_key(service, url),
+            time_saved__gte=time_limit)[:1])
 
-        if len(query):
-            hit = query[0]
+        if len(hits):
+            hit = hits[0]
+            if hit.time_saved < fresh_limit:
+                # Only good responses are served stale
+                if hit.status != 200:
+                    cache_stats.increment("miss")
+                    return None
 
-            if hit.status != 200 and (
-                    now - timedelta(seconds=max_error_age) > hit.time_saved):
-                return None
+                cache_response = self._response_from_hit(hit, now,
+                                                         max_error_age)
+                cache_response["stale"] = True
+                cache_stats.increment("stale_hit")
+                return cache_response
+
+            cache_response = self._response_from_hit(hit, now, max_error_age)
+            if cache_response is None:
+                cache_stats.increment("miss")
+            else:
+                cache_stats.increment("hit")
+            return cache_response
+
+        cache_stats.increment("miss")
+        return None
+
+    def acquireLease(self, service, url, timeout):
+        """
+        Claims the refresh of the entry for timeout seconds, across
+        processes.  Returns the lease, or None if another process holds an
+        unexpired one.
+        """
+        url_key = get_cache_key(service, url)
+        lease = uuid4().hex
+        now = make_aware(datetime.now(), get_current_timezone())
+        expires = now + timedelta(seconds=timeout)
+
+        try:
+            with transaction.atomic():
+                CacheLease.objects.create(url_key=url_key, owner=lease,
+                                          expires=expires)
+            return lease
+        except IntegrityError:
+            pass
+
+        # Takes over a lease its owner didn't release in time
+        if CacheLease.objects.filter(url_key=url_key,
+                                     expires__lt=now).update(owner=lease,
+                                                             expires=expires):
+            return lease
+        return None
+
+    def releaseLease(self, service, url, lease):
+        CacheLease.objects.filter(url_key=get_cache_key(service, url),
+                                  owner=lease).delete()
 
-            response = MockHTTP()
-            response.status = hit.status
-            response.data = hit.content
-            response.headers = hit.getHeaders()
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        """
+        Removes the entries for the service's url, or urls starting with
+        url_prefix, or with neither, all of the service's entries.  The url
+        and prefix are in the cache url form the DAO passes in.
+        """
+        delete_entries(CacheEntryTimed, service, url, url_prefix)
 
-            return {
-                "response": response,
-            }
+    def getRetention(self, service, url, status):
+        """
+        Returns how many seconds an entry for the url with the response
+        status can still be used after it was saved, or None if it should be
+        kept indefinitely.  Used by restclients.cache_purge.  Subclasses
+        that know their TTLs override this.
+        """
         return None
 
+    def getMinRetention(self, service, status):
+        """
+        Returns the shortest retention getRetention gives any of the
+        service's entries with the status, or None if they're all kept
+        indefinitely.  restclients.cache_purge only reads rows older than
+        this.  Subclasses whose retention depends on the url override this.
+        """
+        return self.getRetention(service, None, status)
+
+    def _get_retention(self, service, ttl, status,
+                       overwrite_success_with_error_at=60 * 60 * 8):
+        """
+        Returns the retention for entries cached for ttl seconds - including
+        the time they can be served stale, while revalidating, after an
+        error, or while another process holds the lease.  Successful
+        entries are also kept as long as they replace errors - MUWM-509
+        """
+        retention = max(ttl + get_stale_while_revalidate(),
+                        get_stale_if_error(service),
+                        getattr(settings,
+                                "RESTCLIENTS_CACHE_LEASE_MAX_STALENESS", 0))
+        if status == 200:
+            retention = max(retention, overwrite_success_with_error_at)
+        return retention
+
+    def getStaleCache(self, service, url, headers, max_staleness):
+        """
+        Returns the last successful response for the url, if it was saved
+        within max_staleness seconds.  Used when the service is failing.
+        """
+        now = make_aware(datetime.now(), get_current_timezone())
+        time_limit = now - timedelta(seconds=max_staleness)
+
+        hits = list(CacheEntryTimed.objects.filter(
+            url_key=get_cache_key(service, url), status=200,
+            time_saved__gte=time_limit)[:1])
+
+        if len(hits):
+            return self._response_from_hit(hits[0], now, 0)
+        return None
+
+    def _responses_from_cache(self, service, urls, headers,
+                              max_age_in_seconds, max_error_age=60 * 5,
+                              stale_while_revalidate=None):
+        """
+        Bulk version of _response_from_cache.  Returns a dictionary of
+        url to cache response, for the urls that had a hit.
+        """
+        if not max_age_in_seconds:
+            return {}
+
+        if stale_while_revalidate is None:
+            stale_while_revalidate = get_stale_while_revalidate()
+
+        now = make_aware(datetime.now(), get_current_timezone())
+        fresh_limit = now - timedelta(seconds=max_age_in_seconds)
+        time_limit = fresh_limit - timedelta(seconds=stale_while_revalidate)
+
+        urls = list(urls)
+        responses = {}
+        for start in range(0, len(urls), BULK_QUERY_SIZE):
+            chunk = urls[start:start + BULK_QUERY_SIZE]
+            keys = dict((get_cache_key(service, url), url) for url in chunk)
+            query = CacheEntryTimed.objects.filter(url_key__in=keys.keys(),
+                                                   time_saved__gte=time_limit)
+            for hit in query:
+                if hit.time_saved < fresh_limit:
+                    # Only good responses are served stale
+                    if hit.status != 200:
+                        continue
+
+                    response = self._response_from_hit(hit, now,
+                                                       max_error_age)
+                    response["stale"] = True
+                    cache_stats.increment("stale_hit")
+                else:
+                    response = self._response_from_hit(hit, now,
+                                                       max_error_age)
+
+                if response is not None:
+                    responses[keys[hit.url_key]] = response
+
+        return responses
+
+    def _response_from_hit(self, hit, now, max_error_age):
+        if hit.status != 200 and (
+                now - timedelta(seconds=max_error_age) > hit.time_saved):
+            return None
+
+        response = MockHTTP()
+        response.status = hit.status
+        response.data = hit.content
+        response.headers = hit.getHeaders()
+
+        return {
+            "response": response,
+        }
+
     def _process_response(self, service, url, response,
                           overwrite_success_with_error_at=60 * 60 * 8):
         now = make_aware(datetime.now(), get_current_timezone())
-        query = CacheEntryTimed.objects.filter(service=service,
-                                               url=url)
+
+        # Only loads what's needed to decide whether to replace the entry,
+        # the rest is overwritten
+        existing = list(CacheEntryTimed.objects.filter(
+            url_key=get_cache_key(service, url)).only("status",
+                                                      "time_saved")[:1])
 
         cache_entry = None
-        if len(query):
-            cache_entry = query[0]
+        if len(existing):
+            cache_entry = existing[0]
         else:
             cache_entry = CacheEntryTimed()
 
+        cached = self._update_cache_entry(cache_entry, service, url,
+                                          response, now,
+                                          overwrite_success_with_error_at)
+        if cached is not None:
+            return cached
+
+        self._save_cache_entry(cache_entry)
+        return
+
+    def _save_cache_entry(self, cache_entry):
+        """
+        Inserts or updates the entry.  If another thread or process saved
+        an entry for the url since it was looked up, that row is updated
+        instead.
+        """
+        try:
+            with transaction.atomic():
+                store_cache_entry(cache_entry)
+            return
+        except IntegrityError:
+            pass
+        except Exception as ex:
+            return
+
+        if cache_entry.pk is not None:
+            return
+
+        existing = list(CacheEntryTimed.objects.filter(
+            url_key=get_cache_key(cache_entry.service,
+                                  cache_entry.url)).values_list(
+                                      "pk", flat=True)[:1])
+        if not len(existing):
+            # The url is held by another kind of cache entry
+            return
+
+        cache_entry.pk = existing[0]
+        try:
+            with transaction.atomic():
+                store_cache_entry(cache_entry)
+        except Exception as ex:
+            # We just need a very recent entry.
+            return
+
+    def _process_responses(self, service, responses,
+                           overwrite_success_with_error_at=60 * 60 * 8):
+        """
+        Bulk version of _process_response.  Takes a list of (url, response)
+        pairs, and saves all of the new entries in a single transaction.
+        Returns a dictionary of url to cache response, for urls where the
+        cache has a better response than the one passed in.
+        """
+        responses = list(responses)
+        if not len(responses):
+            return {}
+
+        now = make_aware(datetime.now(), get_current_timezone())
+        urls = [url for url, response in responses]
+
+        existing = {}
+        for start in range(0, len(urls), BULK_QUERY_SIZE):
+            chunk = urls[start:start + BULK_QUERY_SIZE]
+            keys = dict((get_cache_key(service, url), url) for url in chunk)
+            for entry in CacheEntryTimed.objects.filter(
+                    url_key__in=keys.keys()).only("url_key", "status",
+                                                  "time_saved"):
+                existing[keys[entry.url_key]] = entry
+
+        cached_responses = {}
+        with transaction.atomic():
+            for url, response in responses:
+                cache_entry = existing.get(url, CacheEntryTimed())
+                cached = self._update_cache_entry(
+                    cache_entry, service, url, response, now,
+                    overwrite_success_with_error_at)
+
+                if cached is not None:
+                    cached_responses[url] = cached
+                    continue
+
+                self._save_cache_entry(cache_entry)
+
+        return cached_responses
+
+    def _update_cache_entry(self, cache_entry, service, url, response, now,
+                            overwrite_success_with_error_at):
+        """
+        Copies the response onto the cache entry.  If the entry should be
+        kept instead, returns the cache response for it.
+        """
         if response.status != 200:
             # Only override a successful cache entry with an error if the
             # Successful entry is older than 8 hours - MUWM-509
@@ -94,15 +465,7 @@ class TimedCache(object):
 
         cache_entry.headers = header_data
         cache_entry.time_saved = now
-
-        try:
-            store_cache_entry(cache_entry)
-        except Exception as ex:
-            # If someone beat us in to saving a cache entry, that's ok.
-            # We just need a very recent entry.
-            return
-
-        return
+        return None
 
 
 class TimeSimpleCache(TimedCache):
@@ -112,9 +475,18 @@ class TimeSimpleCache(TimedCache):
     def getCache(self, service, url, headers):
         return self._response_from_cache(service, url, headers, 60)
 
+    def getCaches(self, service, urls, headers):
+        return self._responses_from_cache(service, urls, headers, 60)
+
     def processResponse(self, service, url, response):
         return self._process_response(service, url, response)
 
+    def processResponses(self, service, responses):
+        return self._process_responses(service, responses)
+
+    def getRetention(self, service, url, status):
+        return self._get_retention(service, 60, status)
+
 
 class FourHourCache(TimedCache):
     """
@@ -125,61 +497,892 @@ class FourHourCache(TimedCache):
     def getCache(self, service, url, headers):
         return self._response_from_cache(service, url, headers,  60 * 60 * 4)
 
+    def getCaches(self, service, urls, headers):
+        return self._responses_from_cache(service, urls, headers,
+                                          60 * 60 * 4)
+
     def processResponse(self, service, url, response):
         return self._process_response(service, url, response)
 
+    def processResponses(self, service, responses):
+        return self._process_responses(service, responses)
+
+    def getRetention(self, service, url, status):
+        return self._get_retention(service, 60 * 60 * 4, status)
+
+
+class PastTermCache(TimedCache):
+    """
+    This caches SWS resources for terms that are over - sections,
+    registrations, grade rosters, enrollments and the terms themselves -
+    indefinitely, since they don't change.  Everything else is cached for
+    RESTCLIENTS_PAST_TERM_CACHE_DEFAULT_TTL, 4 hours by default.
+    """
+    # Close enough to forever
+    PAST_TERM_TTL = 60 * 60 * 24 * 365 * 50
+
+    def getCache(self, service, url, headers):
+        if service == "sws" and is_past_term_url(url):
+            ttl = self.PAST_TERM_TTL
+        else:
+            ttl = self._get_default_ttl()
+        return self._response_from_cache(service, url, headers, ttl)
+
+    def getCaches(self, service, urls, headers):
+        past_urls, current_urls = self._split_urls(service, urls)
+
+        responses = self._responses_from_cache(service, past_urls, headers,
+                                               self.PAST_TERM_TTL)
+        responses.update(self._responses_from_cache(service, current_urls,
+                                                    headers,
+                                                    self._get_default_ttl()))
+        return responses
+
+    def processResponse(self, service, url, response):
+        return self.processResponses(service, [(url, response)]).get(url)
+
+    def processResponses(self, service, responses):
+        responses = list(responses)
+        past_urls, current_urls = self._split_urls(
+            service, [url for url, response in responses])
+        past_urls = set(past_urls)
+
+        cached_responses = self._process_responses(
+            service, [(url, response) for url, response in responses
+                      if url in past_urls],
+            overwrite_success_with_error_at=self.PAST_TERM_TTL)
+        cached_responses.update(self._process_responses(
+            service, [(url, response) for url, response in responses
+                      if url not in past_urls]))
+        return cached_responses
+
+    def getRetention(self, service, url, status):
+        if service == "sws" and is_past_term_url(url):
+            return None
+        return self._get_retention(service, self._get_default_ttl(), status)
+
+    def getMinRetention(self, service, status):
+        # Past term entries are kept indefinitely
+        return self._get_retention(service, self._get_default_ttl(), status)
+
+    def _split_urls(self, service, urls):
+        past_urls = []
+        current_urls = []
+        for url in urls:
+            if service == "sws" and is_past_term_url(url):
+                past_urls.append(url)
+            else:
+                current_urls.append(url)
+        return past_urls, current_urls
+
+    def _get_default_ttl(self):
+        return getattr(settings, "RESTCLIENTS_PAST_TERM_CACHE_DEFAULT_TTL",
+                       60 * 60 * 4)
+
 
 class ETagCache(object):
     """
-    This caches objects just based on ETags.
+    This caches responses that have validators - an ETag or a
+    Last-Modified header - and revalidates them with If-None-Match and
+    If-Modified-Since requests, so an unchanged resource comes back as a
+    bodyless 304.  While an entry is fresh by its Cache-Control max-age or
+    Expires header, it's served without revalidating.  Responses marked
+    no-store or private aren't kept.
     """
+    # The headers of a 304 that replace the stored ones
+    UPDATED_HEADERS = ("Cache-Control", "Date", "ETag", "Expires",
+                       "Last-Modified")
+
     def getCache(self, service, url, headers):
-        now = make_aware(datetime.now(), get_current_timezone())
-        time_limit = now - timedelta(seconds=60)
+        hits = list(CacheEntryExpires.objects.filter(
+            url_key=get_cache_key(service, url))[:1])
 
-        query = CacheEntry.objects.filter(service=service,
-                                          url=url)
+        if len(hits):
+            hit = hits[0]
+            now = make_aware(datetime.now(), get_current_timezone())
+            if hit.time_expires > now:
+                cache_stats.increment("hit")
+                return {"response": self._response_from_entry(hit)}
 
-        if len(query):
-            hit = query[0]
+            # Adds the validators to the request, so an unchanged
+            # resource comes back as a 304
+            hit_headers = MockHTTP()
+            hit_headers.headers = hit.getHeaders()
 
-            response = MockHTTP()
-            response.status = hit.status
-            response.data = hit.content
+            etag = hit_headers.getheader("ETag", None)
+            if etag:
+                headers["If-None-Match"] = etag
 
-            hit_headers = hit.getHeaders()
+            last_modified = hit_headers.getheader("Last-Modified", None)
+            if last_modified:
+                headers["If-Modified-Since"] = last_modified
 
-            if "ETag" in hit_headers:
-                headers["If-None-Match"] = hit_headers["ETag"]
+            cache_stats.increment("revalidate")
+            return None
 
+        cache_stats.increment("miss")
         return None
 
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        delete_entries(CacheEntryExpires, service, url, url_prefix)
+
+    def getRetention(self, service, url, status):
+        """
+        This cache doesn't read CacheEntryTimed rows, so they can all be
+        purged.  Its own entries are purged once they've been expired for
+        RESTCLIENTS_CACHE_PURGE_ETAG_AGE - see restclients.cache_purge.
+        """
+        return 0
+
     def processResponse(self, service, url, response):
-        query = CacheEntryTimed.objects.filter(service=service,
-                                               url=url)
+        now = make_aware(datetime.now(), get_current_timezone())
+        hits = list(CacheEntryExpires.objects.filter(
+            url_key=get_cache_key(service, url))[:1])
 
-        cache_entry = CacheEntryTimed()
-        if len(query):
-            cache_entry = query[0]
+        cache_entry = None
+        if len(hits):
+            cache_entry = hits[0]
 
         if response.status == 304:
             if cache_entry is None:
-                raise Exception("304, but no content??")
+                # The entry went away while the request was out
+                return None
 
-            response = MockHTTP()
-            response.status = cache_entry.status
-            response.data = cache_entry.content
-            response.headers = cache_entry.headers
-            return {"response": response}
-        else:
-            now = make_aware(datetime.now(), get_current_timezone())
-            cache_entry.service = service
-            cache_entry.url = url
-            cache_entry.status = response.status
-            cache_entry.content = response.data
+            # A 304 can refresh the stored validators and freshness
+            headers = cache_entry.getHeaders()
+            for header in self.UPDATED_HEADERS:
+                value = response.getheader(header, None)
+                if value:
+                    headers[header] = value
+            cache_entry.time_expires = self._get_expires(cache_entry, now)
+            store_cache_entry(cache_entry)
+
+            cache_stats.increment("not_modified")
+            return {"response": self._response_from_entry(cache_entry)}
+
+        if response.status >= 500:
+            # An outage doesn't say anything about the stored entry
+            return None
+
+        if not self._is_cacheable(response):
+            if cache_entry is not None:
+                cache_entry.delete()
+            return None
 
-            cache_entry.headers = response.headers
-            cache_entry.time_saved = now
+        if cache_entry is None:
+            cache_entry = CacheEntryExpires()
+
+        # This extra step is needed w/ Live resources because
+        # HTTPHeaderDict isn't serializable.
+        header_data = {}
+        for header in response.headers:
+            header_data[header] = response.getheader(header)
+
+        cache_entry.service = service
+        cache_entry.url = url
+        cache_entry.status = response.status
+        cache_entry.content = response.data
+        cache_entry.headers = header_data
+        cache_entry.time_expires = self._get_expires(response, now)
+
+        try:
             store_cache_entry(cache_entry)
+        except Exception as ex:
+            # Someone else saved the entry first, that's ok.
+            pass
 
-        return
+        return None
+
+    def _response_from_entry(self, cache_entry):
+        response = MockHTTP()
+        response.status = cache_entry.status
+        response.data = cache_entry.content
+        response.headers = cache_entry.getHeaders()
+        return response
+
+    def _is_cacheable(self, response):
+        if response.status != 200:
+            return False
+
+        cache_control = parse_cache_control(
+            response.getheader("Cache-Control", ""))
+        # This cache is shared by all of the app's users
+        if "no-store" in cache_control or "private" in cache_control:
+            return False
+
+        return bool(response.getheader("ETag", None) or
+                    response.getheader("Last-Modified", None) or
+                    "max-age" in cache_control or
+                    "s-maxage" in cache_control or
+                    response.getheader("Expires", None))
+
+    def _get_expires(self, response, now):
+        """
+        Returns when the response stops being fresh, from its Cache-Control
+        and Expires headers.  Responses without either are revalidated on
+        every request.
+        """
+        if isinstance(response, CacheEntry):
+            entry = MockHTTP()
+            entry.headers = response.getHeaders()
+            response = entry
+
+        cache_control = parse_cache_control(
+            response.getheader("Cache-Control", ""))
+        if "no-cache" in cache_control:
+            return now
+
+        # This cache is shared by all of the app's users, so s-maxage wins
+        max_age = cache_control.get("s-maxage", cache_control.get("max-age"))
+        if max_age is not None:
+            try:
+                return now + timedelta(seconds=max(int(max_age), 0))
+            except (TypeError, ValueError):
+                # A max-age without a value
+                return now
+
+        expires = parse_http_date(response.getheader("Expires", None))
+        if expires is None:
+            return now
+
+        # Measures the lifetime against the server's clock, not ours
+        date = parse_http_date(response.getheader("Date", None))
+        if date is not None:
+            return now + (expires - date)
+        return expires
+
+
+def parse_cache_control(value):
+    """
+    Returns a dictionary of the Cache-Control directives.  Directives
+    without a value, like no-cache, map to None.
+    """
+    directives = {}
+    for directive in (value or "").split(","):
+        directive = directive.strip()
+        if not directive:
+            continue
+
+        if "=" in directive:
+            name, directive_value = directive.split("=", 1)
+            directives[name.strip().lower()] = directive_value.strip(' "')
+        else:
+            directives[directive.lower()] = None
+    return directives
+
+
+def parse_http_date(value):
+    """
+    Returns an aware datetime for an HTTP date header, or None if the
+    value isn't a valid date (e.g. "Expires: 0").
+    """
+    if not value:
+        return None
+
+    parsed = parsedate_tz(value)
+    if parsed is None:
+        return None
+    try:
+        return datetime.fromtimestamp(mktime_tz(parsed), utc)
+    except (ValueError, OverflowError):
+        return None
+
+
+class MemoryCache(object):
+    """
+    This caches responses in process memory, evicting the least recently
+    used responses once the memory budget is spent.  Configuration:
+
+    RESTCLIENTS_DAO_CACHE_CLASS = 'restclients.cache_implementation.MemoryCache'
+    RESTCLIENTS_MEMORY_CACHE_MAX_BYTES = 64 * 1024 * 1024
+    RESTCLIENTS_MEMORY_CACHE_TTL = 60
+    RESTCLIENTS_MEMORY_CACHE_TTLS = {"sws": 60 * 60, "pws": 60 * 60 * 4}
+    """
+    store = LRUStore(64 * 1024 * 1024)
+    max_error_age = 60 * 5
+    overwrite_success_with_error_at = 60 * 60 * 8
+
+    # Rough per-entry cost of the key, tuple and MockHTTP bookkeeping
+    ENTRY_OVERHEAD = 256
+
+    def getCache(self, service, url, headers):
+        return self._response_from_store(service, url, self._get_ttl(service),
+                                         self.max_error_age)
+
+    def getCaches(self, service, urls, headers):
+        responses = {}
+        for url in urls:
+            cache_response = self.getCache(service, url, headers)
+            if cache_response is not None:
+                responses[url] = cache_response
+        return responses
+
+    def getStaleCache(self, service, url, headers, max_staleness):
+        entry = self.store.peek((service, url))
+        if entry is None:
+            return None
+
+        status, response_headers, data, time_saved = entry
+        if status != 200 or time.time() - time_saved > max_staleness:
+            return None
+        return {"response": self._response_from_entry(entry)}
+
+    def processResponse(self, service, url, response):
+        key = (service, url)
+        now = time.time()
+
+        if response.status != 200:
+            # Same as TimedCache - keep a recent success over an error
+            existing = self.store.peek(key)
+            if existing is not None and existing[0] == 200 and (
+                    now - existing[3] < self.overwrite_success_with_error_at):
+                return {"response": self._response_from_entry(existing)}
+
+        header_data = {}
+        for header in response.headers:
+            header_data[header] = response.getheader(header)
+
+        data = response.data
+        if data is None:
+            data = ""
+
+        size = self.ENTRY_OVERHEAD + len(url) + len(data)
+        for header in header_data:
+            size += len(header) + len(str(header_data[header]))
+
+        self.store.max_bytes = self._get_max_bytes()
+        self.store.put(key, (response.status, header_data, data, now), size)
+
+    def processResponses(self, service, responses):
+        cached_responses = {}
+        for url, response in responses:
+            cache_response = self.processResponse(service, url, response)
+            if cache_response is not None:
+                cached_responses[url] = cache_response
+        return cached_responses
+
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        deleted = 0
+        for key in self.store.keys():
+            if key[0] == service and is_invalidated(key[1], url, url_prefix):
+                self.store.delete(key)
+                deleted += 1
+        cache_stats.increment("invalidated", deleted)
+
+    def get_stats(self):
+        return self.store.get_stats()
+
+    def _response_from_store(self, service, url, max_age, max_error_age):
+        entry = self.store.get((service, url))
+        if entry is None:
+            return None
+
+        if not self._is_fresh(entry, max_age, max_error_age):
+            self.store.stats.increment("expired")
+            return None
+
+        return {"response": self._response_from_entry(entry)}
+
+    def _is_fresh(self, entry, max_age, max_error_age):
+        status, response_headers, data, time_saved = entry
+        if status != 200:
+            max_age = min(max_age, max_error_age)
+        return time.time() - time_saved < max_age
+
+    def _get_ttl(self, service):
+        ttls = getattr(settings, "RESTCLIENTS_MEMORY_CACHE_TTLS", {})
+        if service in ttls:
+            return ttls[service]
+        return getattr(settings, "RESTCLIENTS_MEMORY_CACHE_TTL", 60)
+
+    def _get_max_bytes(self):
+        return getattr(settings, "RESTCLIENTS_MEMORY_CACHE_MAX_BYTES",
+                       64 * 1024 * 1024)
+
+    def _response_from_entry(self, entry):
+        status, response_headers, data, time_saved = entry
+        response = MockHTTP()
+        response.status = status
+        response.data = data
+        response.headers = HeaderDict(response_headers)
+        return response
+
+
+class TwoTierMemoryCache(MemoryCache):
+    """
+    The memory tier of TwoTierCache.  It has its own store, budget and TTL,
+    separate from MemoryCache.
+    """
+    store = LRUStore(16 * 1024 * 1024)
+
+    def _get_ttl(self, service):
+        return getattr(settings, "RESTCLIENTS_TWO_TIER_CACHE_L1_TTL", 60)
+
+    def _get_max_bytes(self):
+        return getattr(settings, "RESTCLIENTS_TWO_TIER_CACHE_L1_MAX_BYTES",
+                       16 * 1024 * 1024)
+
+
+class TwoTierCache(TimedCache):
+    """
+    This checks a per-process memory tier first, then the shared
+    CacheEntryTimed table.  Database hits are promoted into memory, and new
+    responses are written to both tiers.  Configuration:
+
+    RESTCLIENTS_DAO_CACHE_CLASS = 'restclients.cache_implementation.TwoTierCache'
+    RESTCLIENTS_TWO_TIER_CACHE_L1_TTL = 60
+    RESTCLIENTS_TWO_TIER_CACHE_L1_MAX_BYTES = 16 * 1024 * 1024
+    RESTCLIENTS_TWO_TIER_CACHE_L2_TTL = 60 * 60 * 4
+    RESTCLIENTS_TWO_TIER_CACHE_L2_MAX_ENTRY_BYTES = 1024 * 1024
+
+    Responses with bodies over the L2 entry limit are only kept in memory.
+    """
+    l1 = TwoTierMemoryCache()
+
+    def getCache(self, service, url, headers):
+        cache_response = self.l1.getCache(service, url, headers)
+        if cache_response is not None:
+            return cache_response
+
+        cache_response = self._response_from_cache(service, url, headers,
+                                                   self._get_l2_ttl())
+        self._promote(service, url, cache_response)
+        return cache_response
+
+    def getCaches(self, service, urls, headers):
+        responses = self.l1.getCaches(service, urls, headers)
+
+        misses = [url for url in urls if url not in responses]
+        if len(misses):
+            l2_responses = self._responses_from_cache(service, misses,
+                                                      headers,
+                                                      self._get_l2_ttl())
+            for url in l2_responses:
+                self._promote(service, url, l2_responses[url])
+            responses.update(l2_responses)
+
+        return responses
+
+    def getStaleCache(self, service, url, headers, max_staleness):
+        cache_response = self.l1.getStaleCache(service, url, headers,
+                                               max_staleness)
+        if cache_response is not None:
+            return cache_response
+        return super(TwoTierCache, self).getStaleCache(service, url, headers,
+                                                       max_staleness)
+
+    def processResponse(self, service, url, response):
+        cache_response = None
+        if self._fits_l2(response):
+            cache_response = self._process_response(service, url, response)
+
+        if cache_response is not None:
+            self.l1.processResponse(service, url, cache_response["response"])
+        else:
+            self.l1.processResponse(service, url, response)
+        return cache_response
+
+    def processResponses(self, service, responses):
+        responses = list(responses)
+        l2_responses = [(url, response) for url, response in responses
+                        if self._fits_l2(response)]
+        cache_responses = self._process_responses(service, l2_responses)
+
+        for url, response in responses:
+            if url in cache_responses:
+                response = cache_responses[url]["response"]
+            self.l1.processResponse(service, url, response)
+        return cache_responses
+
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        super(TwoTierCache, self).invalidateCache(service, url, url_prefix)
+        self.l1.invalidateCache(service, url, url_prefix)
+
+    def getRetention(self, service, url, status):
+        return self._get_retention(service, self._get_l2_ttl(), status)
+
+    def get_stats(self):
+        return {"l1": self.l1.get_stats()}
+
+    def _promote(self, service, url, cache_response):
+        # Stale responses are about to be refreshed; leave them in L2 only.
+        if cache_response is None or cache_response.get("stale", False):
+            return
+        self.l1.processResponse(service, url, cache_response["response"])
+
+    def _fits_l2(self, response):
+        max_bytes = getattr(settings,
+                            "RESTCLIENTS_TWO_TIER_CACHE_L2_MAX_ENTRY_BYTES",
+                            1024 * 1024)
+        return len(response.data or "") <= max_bytes
+
+    def _get_l2_ttl(self):
+        return getattr(settings, "RESTCLIENTS_TWO_TIER_CACHE_L2_TTL",
+                       60 * 60 * 4)
+
+
+class DjangoCache(object):
+    """
+    This stores responses through django's cache framework, so they can
+    live in memcached, locmem, files, etc. instead of the CacheEntry
+    tables.  Configuration:
+
+    RESTCLIENTS_DAO_CACHE_CLASS = 'restclients.cache_implementation.DjangoCache'
+    RESTCLIENTS_DJANGO_CACHE_ALIAS = 'default'
+    RESTCLIENTS_DJANGO_CACHE_TTL = 60 * 60 * 4
+    RESTCLIENTS_DJANGO_CACHE_TTLS = {"sws": 60 * 60}
+    """
+    max_error_age = 60 * 5
+    overwrite_success_with_error_at = 60 * 60 * 8
+
+    def getCache(self, service, url, headers):
+        return self._response_from_backend(service, url,
+                                           self._get_ttl(service),
+                                           self.max_error_age)
+
+    def getCaches(self, service, urls, headers):
+        return self._responses_from_backend(service, urls,
+                                            self._get_ttl(service),
+                                            self.max_error_age)
+
+    def _response_from_backend(self, service, url, max_age, max_error_age):
+        entry = self._get_entries(service, [url]).get(url)
+        if entry is None:
+            return None
+        if not self._is_fresh(entry, max_age, max_error_age):
+            return None
+        return {"response": self._response_from_entry(entry)}
+
+    def _responses_from_backend(self, service, urls, max_age, max_error_age):
+        entries = self._get_entries(service, urls)
+
+        responses = {}
+        for url in entries:
+            if self._is_fresh(entries[url], max_age, max_error_age):
+                responses[url] = {
+                    "response": self._response_from_entry(entries[url])
+                }
+        return responses
+
+    def getStaleCache(self, service, url, headers, max_staleness):
+        entry = self._get_entries(service, [url]).get(url)
+        if entry is None:
+            return None
+
+        status, header_list, data, time_saved = entry
+        if status != 200 or time.time() - time_saved > max_staleness:
+            return None
+        return {"response": self._response_from_entry(entry)}
+
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        """
+        Deletes the entry for a url.  Backend keys can't be listed, so a
+        url with RESTCLIENTS_CACHE_VARY_HEADERS variants, or a prefix, is
+        marked invalidated instead, and entries under it saved before then
+        are ignored.  A prefix marks the path it ends in, e.g. /group/u_a
+        for /group/u_a/ or /group/u_a?, and /group for /group/u_a.  Those
+        are compared by time_saved, so the web nodes' clocks should agree.
+        """
+        backend = self._get_backend()
+        if url is not None:
+            backend.delete(self._get_key(service, url))
+            if not has_vary_headers(service):
+                return
+            key = self._get_invalidated_key(service, "url",
+                                            url.split("#")[0])
+        elif url_prefix is not None:
+            key = self._get_invalidated_key(service, "path",
+                                            self._get_prefix_path(url_prefix))
+        else:
+            key = self._get_invalidated_key(service, "path", "")
+
+        backend.set(key, time.time(), None)
+
+    def processResponse(self, service, url, response):
+        return self.processResponses(service, [(url, response)]).get(url)
+
+    def processResponses(self, service, responses):
+        return self._store_responses(service, responses,
+                                     self._get_timeout(service))
+
+    def acquireLease(self, service, url, timeout):
+        lease = uuid4().hex
+        if self._get_backend().add(self._get_lease_key(service, url), lease,
+                                   timeout):
+            return lease
+        return None
+
+    def releaseLease(self, service, url, lease):
+        # Not atomic, but a lease that's replaced in between has expired
+        backend = self._get_backend()
+        key = self._get_lease_key(service, url)
+        if backend.get(key) == lease:
+            backend.delete(key)
+
+    def _get_lease_key(self, service, url):
+        return "%s:lease" % self._get_key(service, url)
+
+    def _get_entries(self, service, urls):
+        """
+        Returns the backend entries for the urls, by url, leaving out ones
+        saved before the url or a path above it was invalidated.
+        """
+        keys = {}
+        invalidated_keys = {}
+        for url in urls:
+            keys[url] = self._get_key(service, url)
+            invalidated_keys[url] = self._get_invalidated_keys(service, url)
+
+        lookup = set(keys.values())
+        for url_keys in invalidated_keys.values():
+            lookup.update(url_keys)
+        found = self._get_backend().get_many(list(lookup))
+
+        entries = {}
+        for url in urls:
+            entry = found.get(keys[url])
+            if entry is None:
+                continue
+
+            invalidated = [found[key] for key in invalidated_keys[url]
+                           if key in found]
+            if len(invalidated) and entry[3] <= max(invalidated):
+                continue
+            entries[url] = entry
+        return entries
+
+    def _get_invalidated_keys(self, service, url):
+        """
+        Returns the keys that mark the url, or a path above it, invalidated
+        - for /group/u_a?x=1 the url itself, and the paths "", /group and
+        /group/u_a.
+        """
+        url = url.split("#")[0]
+        keys = [self._get_invalidated_key(service, "url", url),
+                self._get_invalidated_key(service, "path", "")]
+
+        path = ""
+        for segment in url.split("?")[0].split("/")[1:]:
+            path = "%s/%s" % (path, segment)
+            keys.append(self._get_invalidated_key(service, "path", path))
+        return keys
+
+    def _get_prefix_path(self, url_prefix):
+        """
+        Returns the longest path that every url starting with url_prefix
+        is at or under.
+        """
+        if "?" in url_prefix:
+            return url_prefix.split("?")[0]
+        if url_prefix.endswith("/"):
+            return url_prefix[:-1]
+        return url_prefix.rsplit("/", 1)[0]
+
+    def _get_invalidated_key(self, service, kind, value):
+        if isinstance(value, unicode):
+            value = value.encode("utf-8")
+        return "restclients:%s:invalidated:%s:%s" % (service, kind,
+                                                      sha1(value).hexdigest())
+
+    def _store_responses(self, service, responses, timeout):
+        backend = self._get_backend()
+        responses = list(responses)
+        now = time.time()
+
+        # Only errors need the current entries - MUWM-509
+        existing = {}
+        error_urls = [url for url, response in responses
+                      if response.status != 200]
+        if len(error_urls):
+            entries = self._get_entries(service, error_urls)
+            for url in entries:
+                existing[self._get_key(service, url)] = entries[url]
+
+        cached_responses = {}
+        new_entries = {}
+        for url, response in responses:
+            key = self._get_key(service, url)
+
+            if response.status != 200 and key in existing:
+                entry = existing[key]
+                if entry[0] == 200 and (
+                        now - entry[3] < self.overwrite_success_with_error_at):
+                    cached_responses[url] = {
+                        "response": self._response_from_entry(entry)
+                    }
+                    continue
+
+            header_list = []
+            for header in response.headers:
+                header_list.append((header, response.getheader(header)))
+
+            new_entries[key] = (response.status, header_list,
+                                response.data, now)
+
+        if len(new_entries):
+            backend.set_many(new_entries, timeout)
+
+        return cached_responses
+
+    def _is_fresh(self, entry, max_age, max_error_age):
+        status, header_list, data, time_saved = entry
+        if status != 200:
+            max_age = min(max_age, max_error_age)
+        return time.time() - time_saved < max_age
+
+    def _get_timeout(self, service, ttl=None):
+        # Keep entries long enough to be served stale if the service fails.
+        if ttl is None:
+            ttl = self._get_ttl(service)
+        return max(ttl, get_stale_if_error(service))
+
+    def _get_ttl(self, service):
+        ttls = getattr(settings, "RESTCLIENTS_DJANGO_CACHE_TTLS", {})
+        if service in ttls:
+            return ttls[service]
+        return getattr(settings, "RESTCLIENTS_DJANGO_CACHE_TTL", 60 * 60 * 4)
+
+    def _get_key(self, service, url):
+        # memcached keys are limited to 250 characters, without spaces.
+        if isinstance(url, unicode):
+            url = url.encode("utf-8")
+        return "restclients:%s:%s" % (service, sha1(url).hexdigest())
+
+    def _get_backend(self):
+        return get_cache(getattr(settings, "RESTCLIENTS_DJANGO_CACHE_ALIAS",
+                                 "default"))
+
+    def _response_from_entry(self, entry):
+        status, header_list, data, time_saved = entry
+        response = MockHTTP()
+        response.status = status
+        response.data = data
+        response.headers = HeaderDict(header_list)
+        return response
+
+
+class PolicyCache(TimedCache):
+    """
+    This caches each request according to the first matching rule in
+    RESTCLIENTS_CACHE_POLICY; see restclients.cache_policy.  The rule picks
+    the TTL, the error TTL, and whether the response is kept in the
+    CacheEntryTimed table, in memory, in django's cache, or not at all.
+
+    RESTCLIENTS_DAO_CACHE_CLASS = 'restclients.cache_implementation.PolicyCache'
+    """
+    memory = MemoryCache()
+    django = DjangoCache()
+
+    def getCache(self, service, url, headers):
+        rule = get_matching_rule(service, url)
+        if rule is None or not rule.is_cached():
+            return None
+
+        if rule.tier == "memory":
+            return self.memory._response_from_store(service, url, rule.ttl,
+                                                    rule.error_ttl)
+        if rule.tier == "django":
+            return self.django._response_from_backend(service, url, rule.ttl,
+                                                      rule.error_ttl)
+        return self._response_from_cache(service, url, headers, rule.ttl,
+                                         rule.error_ttl)
+
+    def getCaches(self, service, urls, headers):
+        responses = {}
+        for rule, rule_urls in self._group_by_rule(service, urls, True):
+            if rule.tier == "memory":
+                for url in rule_urls:
+                    cache_response = self.memory._response_from_store(
+                        service, url, rule.ttl, rule.error_ttl)
+                    if cache_response is not None:
+                        responses[url] = cache_response
+            elif rule.tier == "django":
+                responses.update(self.django._responses_from_backend(
+                    service, rule_urls, rule.ttl, rule.error_ttl))
+            else:
+                responses.update(self._responses_from_cache(
+                    service, rule_urls, headers, rule.ttl, rule.error_ttl))
+        return responses
+
+    def getStaleCache(self, service, url, headers, max_staleness):
+        rule = get_cache_policy().match(service, url)
+        if rule is None or not rule.is_cached():
+            return None
+
+        if rule.tier == "memory":
+            return self.memory.getStaleCache(service, url, headers,
+                                             max_staleness)
+        if rule.tier == "django":
+            return self.django.getStaleCache(service, url, headers,
+                                             max_staleness)
+        return super(PolicyCache, self).getStaleCache(service, url, headers,
+                                                      max_staleness)
+
+    def processResponse(self, service, url, response):
+        return self.processResponses(service, [(url, response)]).get(url)
+
+    def processResponses(self, service, responses):
+        responses = list(responses)
+        by_url = dict(responses)
+
+        cached_responses = {}
+        urls = [url for url, response in responses]
+        for rule, rule_urls in self._group_by_rule(service, urls, False):
+            rule_responses = [(url, by_url[url]) for url in rule_urls]
+
+            if rule.tier == "memory":
+                cached_responses.update(self.memory.processResponses(
+                    service, rule_responses))
+            elif rule.tier == "django":
+                cached_responses.update(self.django._store_responses(
+                    service, rule_responses,
+                    self.django._get_timeout(service, rule.ttl)))
+            else:
+                cached_responses.update(self._process_responses(
+                    service, rule_responses))
+        return cached_responses
+
+    def invalidateCache(self, service, url=None, url_prefix=None):
+        # Rules can have changed since the entries were saved, so every
+        # tier in the policy is cleared
+        tiers = set(rule.tier for rule in get_cache_policy().rules)
+        super(PolicyCache, self).invalidateCache(service, url, url_prefix)
+        if "memory" in tiers:
+            self.memory.invalidateCache(service, url, url_prefix)
+        if "django" in tiers:
+            self.django.invalidateCache(service, url, url_prefix)
+
+    def getRetention(self, service, url, status):
+        # Entries for rules that no longer keep them in the database are
+        # only needed as stale copies
+        rule = get_cache_policy().match(service, url)
+        if rule is None or not rule.is_cached() or rule.tier != "database":
+            return self._get_retention(service, 0, status,
+                                       overwrite_success_with_error_at=0)
+        return self._get_retention(service, rule.ttl, status)
+
+    def getMinRetention(self, service, status):
+        # Any of the service's urls can match a rule that only keeps stale
+        # copies
+        return self._get_retention(service, 0, status,
+                                   overwrite_success_with_error_at=0)
+
+    def _group_by_rule(self, service, urls, record_match):
+        """
+        Returns a list of (rule, urls) pairs for the cached rules that
+        match the urls, in rule order.
+        """
+        groups = {}
+        for url in urls:
+            if record_match:
+                rule = get_matching_rule(service, url)
+            else:
+                rule = get_cache_policy().match(service, url)
+
+            if rule is None or not rule.is_cached():
+                continue
+            if rule.index not in groups:
+                groups[rule.index] = (rule, [])
+            groups[rule.index][1].append(url)
+
+        return [groups[index] for index in sorted(groups)]
@@ -2,43 +2,295 @@
 This is a class that makes it possible to bulk-save cache entries.
 For restclients methods that use threading, this can be used to prevent
 innodb gap locks from deadlocking sequential inserts.
+
+With RESTCLIENTS_CACHE_WRITE_BEHIND = True, and threading in use, entries
+are instead handed to a CacheWriter thread, that saves them in batches so
+request threads don't wait on cache writes.  e.g.
+
+RESTCLIENTS_CACHE_WRITE_BEHIND = True
+RESTCLIENTS_CACHE_WRITE_BEHIND_QUEUE_SIZE = 1000
+RESTCLIENTS_CACHE_WRITE_BEHIND_BATCH_SIZE = 100
+RESTCLIENTS_CACHE_WRITE_BEHIND_INTERVAL = 1.0
 """
+import time
+import logging
+import threading
+from collections import OrderedDict
+from Queue import Queue, Full, Empty
+from django.conf import settings
+from django.db import IntegrityError, transaction, connection
+from django.test.signals import setting_changed
+from restclients.thread import use_threading
+from restclients.util.counters import Counters
+from restclients.models import get_cache_key, BULK_QUERY_SIZE
 
-__manage_bulk_inserts = False
-__bulk_insert_queue = []
-from django.db import IntegrityError
+logger = logging.getLogger(__name__)
 
-def store_cache_entry(entry):
-    global __manage_bulk_inserts
-    global __bulk_insert_queue
+# What happened to the entries handed to the writer: queued, dropped (the
+# queue was full), coalesced (replaced by a later entry for the url),
+# written, conflict, error and flush (batches written)
+writer_stats = Counters()
 
-    if __manage_bulk_inserts:
-        __bulk_insert_queue.append(entry)
+# Entries queued by enable_cache_entry_queueing, per thread
+_local = threading.local()
+
+
+def store_cache_entry(entry):
+    queue = getattr(_local, "queue", None)
+    if queue is not None:
+        queue.append(entry)
         return
+
+    writer = get_cache_writer()
+    if writer is not None:
+        writer.enqueue(entry)
     else:
         entry.save()
 
+
 def save_all_queued_entries():
-    global __bulk_insert_queue
+    queue = getattr(_local, "queue", None)
+    if not queue:
+        return
+    _local.queue = []
 
-    seen_urls = {}
-    bulk_create = []
+    writer = get_cache_writer()
+    if writer is not None:
+        for entry in queue:
+            writer.enqueue(entry)
+        return
 
     try:
-        for entry in __bulk_insert_queue:
-            if not entry.url in seen_urls:
-                entry.save()
-                seen_urls[entry.url] = True
+        save_cache_entries(queue)
     except Exception as ex:
-        print "Error bulk saving cache entries: ", ex
+        logger.error("Error bulk saving cache entries: %s" % ex)
 
-    __bulk_insert_queue = []
 
 def enable_cache_entry_queueing():
-    global __manage_bulk_inserts
-    __manage_bulk_inserts = True
+    _local.queue = []
+
 
 def disable_cache_entry_queueing():
-    global __manage_bulk_inserts
-    __manage_bulk_inserts = False
     save_all_queued_entries()
+    _local.queue = None
+
+
+def save_cache_entries(entries):
+    """
+    Saves the entries in a single transaction.  Only the last entry for a
+    url is saved, and entries for urls that are already in the cache
+    update the existing rows.  Returns the number of entries saved.
+    """
+    latest = OrderedDict()
+    for entry in entries:
+        key = get_cache_key(entry.service, entry.url)
+        if key in latest:
+            writer_stats.increment("coalesced")
+            del latest[key]
+        latest[key] = entry
+
+    if not len(latest):
+        return 0
+
+    # The existing rows, by model and key, so new entries become updates
+    existing = {}
+    by_model = {}
+    for key, entry in latest.items():
+        if entry.pk is None:
+            by_model.setdefault(type(entry), []).append(key)
+
+    for model, keys in by_model.items():
+        for start in range(0, len(keys), BULK_QUERY_SIZE):
+            chunk = keys[start:start + BULK_QUERY_SIZE]
+            for key, pk in model.objects.filter(
+                    url_key__in=chunk).values_list("url_key", "pk"):
+                existing[(model, key)] = pk
+
+    saved = 0
+    with transaction.atomic():
+        for key, entry in latest.items():
+            if entry.pk is None:
+                entry.pk = existing.get((type(entry), key))
+
+            try:
+                with transaction.atomic():
+                    entry.save()
+                saved += 1
+            except IntegrityError:
+                # Someone else saved an entry for the url first, that's ok.
+                writer_stats.increment("conflict")
+
+    return saved
+
+
+class _Flush(object):
+    """
+    Put on the queue by CacheWriter.flush, to be signaled once everything
+    ahead of it is saved.  CacheWriter.stop's also ends the thread.
+    """
+    def __init__(self, stop=False):
+        self.event = threading.Event()
+        self.stop = stop
+
+
+class CacheWriter(threading.Thread):
+    """
+    Saves cache entries in the background.  Entries wait on a bounded
+    queue, and are saved by save_cache_entries once batch_size of them are
+    waiting, or flush_interval seconds after the first one arrived.  If the
+    queue is full, entries are dropped rather than making the request
+    thread wait.
+    """
+    def __init__(self, max_queue_size=1000, batch_size=100,
+                 flush_interval=1.0):
+        super(CacheWriter, self).__init__(name="restclients-cache-writer")
+        self.daemon = True
+        self.queue = Queue(max_queue_size)
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+
+    def enqueue(self, entry):
+        try:
+            self.queue.put_nowait(entry)
+        except Full:
+            writer_stats.increment("dropped")
+            return False
+
+        writer_stats.increment("queued")
+        return True
+
+    def flush(self, timeout=None):
+        """
+        Waits until everything queued so far has been saved.  Returns False
+        if that took longer than timeout seconds.
+        """
+        if not self.is_alive():
+            self.drain()
+            return True
+
+        flush = _Flush()
+        try:
+            self.queue.put(flush, timeout=timeout)
+        except Full:
+            return False
+        return flush.event.wait(timeout)
+
+    def stop(self, timeout=None):
+        """
+        Saves everything queued so far, and ends the thread.  Returns False
+        if that took longer than timeout seconds.
+        """
+        if not self.is_alive():
+            self.drain()
+            return True
+
+        try:
+            self.queue.put(_Flush(stop=True), timeout=timeout)
+        except Full:
+            return False
+        self.join(timeout)
+        if self.is_alive():
+            return False
+
+        # Anything queued behind the stop
+        self.drain()
+        return True
+
+    def run(self):
+        while True:
+            entries, flushes = self._next_batch(True)
+            self._write(entries, flushes)
+            if any(flush.stop for flush in flushes):
+                connection.close()
+                return
+
+    def drain(self):
+        """
+        Saves everything on the queue on the calling thread.
+        """
+        while not self.queue.empty():
+            self._write(*self._next_batch(False))
+
+    def _next_batch(self, block):
+        entries = []
+        flushes = []
+        deadline = None
+        while len(entries) < self.batch_size:
+            timeout = None
+            if deadline is not None:
+                timeout = deadline - time.time()
+                if timeout <= 0:
+                    break
+
+            try:
+                item = self.queue.get(block, timeout)
+            except Empty:
+                break
+
+            if isinstance(item, _Flush):
+                flushes.append(item)
+                break
+
+            entries.append(item)
+            if deadline is None:
+                deadline = time.time() + self.flush_interval
+
+        return entries, flushes
+
+    def _write(self, entries, flushes):
+        try:
+            if len(entries):
+                writer_stats.increment("written",
+                                       save_cache_entries(entries))
+                writer_stats.increment("flush")
+        except Exception as ex:
+            writer_stats.increment("error")
+            logger.error("Error writing cache entries: %s" % ex)
+            # Starts the next batch with a fresh connection
+            connection.close()
+        finally:
+            for flush in flushes:
+                flush.event.set()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def get_cache_writer():
+    """
+    Returns the running CacheWriter, or None if cache entries should be
+    saved on the request thread.
+    """
+    global _writer
+    if not getattr(settings, "RESTCLIENTS_CACHE_WRITE_BEHIND", False):
+        return None
+
+    if not use_threading():
+        return None
+
+    if _writer is None:
+        with _writer_lock:
+            if _writer is None:
+                writer = CacheWriter(
+                    getattr(settings,
+                            "RESTCLIENTS_CACHE_WRITE_BEHIND_QUEUE_SIZE", 1000),
+                    getattr(settings,
+                            "RESTCLIENTS_CACHE_WRITE_BEHIND_BATCH_SIZE", 100),
+                    getattr(settings,
+                            "RESTCLIENTS_CACHE_WRITE_BEHIND_INTERVAL", 1.0))
+                writer.start()
+                _writer = writer
+    return _writer
+
+
+def _settings_changed(**kwargs):
+    global _writer
+    if kwargs["setting"].startswith("RESTCLIENTS_CACHE_WRITE_BEHIND"):
+        with _writer_lock:
+            # Saves what the old writer has queued before a new one starts
+            if _writer is not None:
+                _writer.stop()
+            _writer = None
+
+setting_changed.connect(_settings_changed)
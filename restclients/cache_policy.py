@@ -0,0 +1,146 @@
+"""
+A declarative caching policy: an ordered list of rules, each matching a
+service and a url pattern, that decide how long a response is cached and
+in which tier.  The first matching rule wins.  e.g.
+
+RESTCLIENTS_CACHE_POLICY = [
+    {"name": "sws terms", "service": "sws", "url": r"^/student/v5/term/",
+     "ttl": 60 * 60 * 24, "tier": "database"},
+    {"name": "pws people", "service": "pws", "ttl": 60 * 60 * 4,
+     "tier": "memory"},
+    {"name": "gws members", "service": "gws", "url": r"/effective_member",
+     "ttl": 60 * 15, "error_ttl": 60},
+    {"name": "canvas enrollments", "service": "canvas",
+     "url": r"/enrollments", "tier": "none"},
+    {"name": "everything else", "ttl": 60},
+]
+
+Rules without a service or url match every service or url.  Tiers are
+"database" (the default), "memory", "django" and "none".  Requests that
+no rule matches aren't cached.
+"""
+import re
+import logging
+import threading
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.test.signals import setting_changed
+from restclients.util.counters import Counters
+
+
+TIERS = ("database", "memory", "django", "none")
+DEFAULT_ERROR_TTL = 60 * 5
+
+logger = logging.getLogger(__name__)
+
+# The number of requests each rule has matched, by rule name.  Requests
+# that no rule matched are counted as "no match".
+policy_stats = Counters()
+
+
+class CacheRule(object):
+    def __init__(self, index, service=None, url=None, ttl=0,
+                 error_ttl=None, tier="database", name=None):
+        if tier not in TIERS:
+            raise ImproperlyConfigured(
+                'Cache policy rule %s has an unknown tier "%s"' % (index,
+                                                                   tier))
+        self.index = index
+        self.name = name if name is not None else "rule %s" % index
+        self.service = service
+        self.url = url
+        self.url_pattern = re.compile(url) if url is not None else None
+        self.ttl = ttl
+        self.error_ttl = min(ttl, DEFAULT_ERROR_TTL) if (
+            error_ttl is None) else error_ttl
+        self.tier = tier
+
+    def matches_url(self, url):
+        return self.url_pattern is None or (
+            self.url_pattern.search(url) is not None)
+
+    def is_cached(self):
+        return self.tier != "none" and self.ttl > 0
+
+    def __repr__(self):
+        return "<CacheRule %s: %s %s ttl=%s tier=%s>" % (
+            self.name, self.service, self.url, self.ttl, self.tier)
+
+
+class CachePolicy(object):
+    """
+    The compiled form of the rules.  Rules are grouped by service the first
+    time a service is seen, so a lookup only checks the url patterns of the
+    rules that could apply.
+    """
+    def __init__(self, rules):
+        self.rules = []
+        for index, rule in enumerate(rules):
+            self.rules.append(CacheRule(index, **rule))
+
+        self._lock = threading.Lock()
+        self._rules_by_service = {}
+
+    def match(self, service, url):
+        """
+        Returns the first CacheRule that matches, or None.
+        """
+        for rule in self._get_service_rules(service):
+            if rule.matches_url(url):
+                return rule
+        return None
+
+    def _get_service_rules(self, service):
+        try:
+            return self._rules_by_service[service]
+        except KeyError:
+            pass
+
+        rules = [rule for rule in self.rules
+                 if rule.service is None or rule.service == service]
+        with self._lock:
+            self._rules_by_service[service] = rules
+        return rules
+
+
+_policy = None
+_policy_lock = threading.Lock()
+
+
+def get_cache_policy():
+    """
+    Returns the CachePolicy for RESTCLIENTS_CACHE_POLICY.  It's compiled
+    once, and again if the setting is overridden.
+    """
+    global _policy
+    if _policy is None:
+        with _policy_lock:
+            if _policy is None:
+                _policy = CachePolicy(getattr(settings,
+                                              "RESTCLIENTS_CACHE_POLICY", []))
+    return _policy
+
+
+def get_matching_rule(service, url):
+    """
+    Returns the CacheRule that applies to a request, and records the match
+    in policy_stats and the debug log.
+    """
+    rule = get_cache_policy().match(service, url)
+    if rule is None:
+        policy_stats.increment("no match")
+        logger.debug("No cache rule for %s %s" % (service, url))
+    else:
+        policy_stats.increment(rule.name)
+        logger.debug("Cache rule \"%s\" for %s %s" % (rule.name, service,
+                                                      url))
+    return rule
+
+
+def _settings_changed(**kwargs):
+    global _policy
+    if kwargs["setting"] == "RESTCLIENTS_CACHE_POLICY":
+        with _policy_lock:
+            _policy = None
+
+setting_changed.connect(_settings_changed)
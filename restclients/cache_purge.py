@@ -0,0 +1,205 @@
+"""
+Deletes cache entries that the configured cache can no longer use, so the
+cache tables don't grow without limit.  How long a CacheEntryTimed row is
+kept comes from the cache class's getRetention - its TTL for the service
+and url, plus the time the entry can be served stale.  Successful
+responses are kept at least as long as the cache keeps them over errors.
+Each service's rows are only read once they're older than the shortest
+retention the cache gives that service (getMinRetention), so only rows
+whose retention depends on the url, like past term SWS resources, are
+checked one by one.  Rows are read in batches ordered by the time_saved
+index, and each batch is deleted in its own short transaction, with a
+pause in between so other writers aren't held up.  Expired CacheLease
+rows are deleted as well.
+
+ETagCache entries are kept while they're expired, since they hold the
+validators used to revalidate them, and deleted once they've been expired
+for RESTCLIENTS_CACHE_PURGE_ETAG_AGE seconds.
+
+RESTCLIENTS_CACHE_PURGE_BATCH_SIZE = 500
+RESTCLIENTS_CACHE_PURGE_PAUSE = 0.1
+RESTCLIENTS_CACHE_PURGE_MIN_AGE = 60
+RESTCLIENTS_CACHE_PURGE_ETAG_AGE = 60 * 60 * 24 * 7
+
+Rows younger than RESTCLIENTS_CACHE_PURGE_MIN_AGE seconds aren't looked
+at.
+
+Used by the restclients_purge_cache management command.
+"""
+import time
+import logging
+import operator
+from datetime import datetime, timedelta
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from django.utils.timezone import make_aware, get_current_timezone
+from restclients.models import CacheEntry, CacheEntryTimed, \
+    CacheEntryExpires, CacheLease
+
+
+logger = logging.getLogger(__name__)
+
+
+def get_cache():
+    """
+    Returns the cache configured in RESTCLIENTS_DAO_CACHE_CLASS.
+    """
+    from restclients.dao import MY_DAO
+    return MY_DAO()._getCache()
+
+
+def purge_cache(cache=None, max_age=None, batch_size=None, pause=None,
+                min_age=None, now=None):
+    """
+    Deletes the entries the cache no longer needs, or, if max_age is
+    given, every entry older than max_age seconds and every ETag entry
+    expired that long ago.  Returns a dictionary of counts: scanned,
+    deleted (including the ETag entries), etags, bytes (of url, headers and
+    content) and leases.
+    """
+    if cache is None:
+        cache = get_cache()
+
+    if max_age is None and not hasattr(cache, "getRetention"):
+        raise ValueError("%s doesn't define a retention for its entries; "
+                         "give a max_age instead" % cache.__class__.__name__)
+
+    if batch_size is None:
+        batch_size = getattr(settings, "RESTCLIENTS_CACHE_PURGE_BATCH_SIZE",
+                             500)
+    if pause is None:
+        pause = getattr(settings, "RESTCLIENTS_CACHE_PURGE_PAUSE", 0.1)
+    if min_age is None:
+        min_age = getattr(settings, "RESTCLIENTS_CACHE_PURGE_MIN_AGE", 60)
+    etag_age = getattr(settings, "RESTCLIENTS_CACHE_PURGE_ETAG_AGE",
+                       60 * 60 * 24 * 7)
+    if max_age is not None:
+        min_age = max_age
+        etag_age = max_age
+    if now is None:
+        now = make_aware(datetime.now(), get_current_timezone())
+
+    def is_expired(service, url, status, time_saved):
+        if max_age is None:
+            retention = cache.getRetention(service, url, status)
+        else:
+            retention = max_age
+
+        return retention is not None and (
+            time_saved < now - timedelta(seconds=retention))
+
+    stats = {"scanned": 0, "deleted": 0, "etags": 0, "bytes": 0,
+             "leases": 0}
+    for service in _get_services():
+        query = _get_candidates(cache, service, max_age, min_age, now)
+        if query is not None:
+            _purge_rows(query, "time_saved", is_expired, batch_size, pause,
+                        stats)
+
+    deleted = stats["deleted"]
+    _purge_rows(CacheEntryExpires.objects.filter(
+        time_expires__lt=now - timedelta(seconds=etag_age)),
+        "time_expires", None, batch_size, pause, stats)
+    stats["etags"] = stats["deleted"] - deleted
+
+    stats["leases"] = _delete_expired_leases(now)
+    logger.info("Purged %d of %d cache entries, %d bytes" % (
+        stats["deleted"], stats["scanned"], stats["bytes"]))
+    return stats
+
+
+def _get_services():
+    """
+    Yields the services that have cache entries, a seek on the service
+    index for each.
+    """
+    service = None
+    while True:
+        query = CacheEntry.objects.order_by("service")
+        if service is not None:
+            query = query.filter(service__gt=service)
+        services = list(query.values_list("service", flat=True)[:1])
+        if not len(services):
+            return
+        service = services[0]
+        yield service
+
+
+def _get_candidates(cache, service, max_age, min_age, now):
+    """
+    Returns a query for the service's CacheEntryTimed rows that are old
+    enough to be expired, or None if none of them can be.  The shortest
+    retention for successful and for error responses goes into the query,
+    so rows that are certainly still in use aren't read.
+    """
+    query = CacheEntryTimed.objects.filter(service=service)
+    if max_age is not None or not hasattr(cache, "getMinRetention"):
+        return query.filter(time_saved__lt=now - timedelta(seconds=min_age))
+
+    conditions = []
+    for condition, status in ((Q(status=200), 200), (~Q(status=200), None)):
+        retention = cache.getMinRetention(service, status)
+        if retention is not None:
+            cutoff = now - timedelta(seconds=max(retention, min_age))
+            conditions.append(condition & Q(time_saved__lt=cutoff))
+
+    if not len(conditions):
+        return None
+    return query.filter(reduce(operator.or_, conditions))
+
+
+def _purge_rows(query, time_field, is_expired, batch_size, pause, stats):
+    """
+    Pages through the query's rows, ordered by time_field and pk, and
+    deletes the ones is_expired returns True for - all of them if it's
+    None.
+    """
+    last = None
+    while True:
+        page = query
+        if last is not None:
+            page = page.filter(Q(**{time_field + "__gt": last[0]}) |
+                               Q(**{time_field: last[0], "pk__gt": last[1]}))
+        rows = list(page.order_by(time_field, "pk").values_list(
+            "pk", "service", "url", "status", time_field)[:batch_size])
+        if not len(rows):
+            break
+
+        stats["scanned"] += len(rows)
+        last = (rows[-1][4], rows[-1][0])
+
+        expired = [row[0] for row in rows
+                   if is_expired is None or is_expired(*row[1:])]
+        if len(expired):
+            stats["bytes"] += _delete_entries(expired)
+            stats["deleted"] += len(expired)
+
+        if len(rows) < batch_size:
+            break
+        if pause:
+            time.sleep(pause)
+
+
+def _delete_entries(pks):
+    """
+    Deletes the entries, and returns the number of bytes they held.
+    """
+    with transaction.atomic():
+        sizes = CacheEntry.objects.filter(pk__in=pks).extra(select={
+            "size": "LENGTH(url) + LENGTH(header_pickle) + LENGTH(content)"
+        }).values_list("size", flat=True)
+        size = sum(size or 0 for size in sizes)
+
+        # Deleting the parent rows deletes the CacheEntryTimed and
+        # CacheEntryExpires rows too
+        CacheEntry.objects.filter(pk__in=pks).delete()
+    return size
+
+
+def _delete_expired_leases(now):
+    query = CacheLease.objects.filter(expires__lt=now)
+    count = query.count()
+    if count:
+        query.delete()
+    return count
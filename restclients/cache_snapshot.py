@@ -0,0 +1,245 @@
+"""
+Copies CacheEntryTimed rows between databases, so a new node can start
+with a warm cache.  A snapshot is a gzip stream of length-prefixed JSON
+records: a header record, then one record per entry, holding the entry's
+stored form - compressed bodies stay compressed.  Both directions stream,
+so snapshots much larger than memory are fine.
+
+Loading inserts rows with executemany, a batch at a time.  Entries
+already in the cache are kept unless replace=True.  Other processes can
+keep using the cache while a snapshot loads; a batch with urls they cached
+in the meantime is loaded an entry at a time, skipping those urls.
+
+Used by the restclients_export_cache and restclients_import_cache
+management commands.
+"""
+import gzip
+import json
+import struct
+import calendar
+from datetime import datetime
+from django.db import connection, transaction, IntegrityError
+from django.utils.timezone import utc
+from restclients.models import CacheEntry, CacheEntryTimed, \
+    get_cache_key, BULK_QUERY_SIZE, URL_START_LENGTH
+from restclients.exceptions import InvalidCacheSnapshot
+
+
+FORMAT = "restclients-cache-snapshot"
+VERSION = 1
+
+_length = struct.Struct(">I")
+
+_FIELDS = ("pk", "service", "url", "status", "header_pickle",
+           "stored_content", "content_encoding", "time_saved")
+
+_ENTRY_FIELDS = ("service", "url", "url_key", "url_start", "status",
+                 "header_pickle", "stored_content", "content_encoding")
+_TIMED_FIELDS = ("cacheentry_ptr", "time_saved")
+
+_time_saved = CacheEntryTimed._meta.get_field("time_saved")
+
+
+def _write_record(stream, record):
+    data = json.dumps(record, separators=(",", ":"))
+    stream.write(_length.pack(len(data)))
+    stream.write(data)
+
+
+def read_snapshot(stream):
+    """
+    Yields the entry records in a snapshot stream.
+    """
+    header = None
+    while True:
+        prefix = stream.read(_length.size)
+        if not prefix:
+            break
+        if len(prefix) < _length.size:
+            raise InvalidCacheSnapshot("Truncated snapshot")
+
+        size = _length.unpack(prefix)[0]
+        data = stream.read(size)
+        if len(data) < size:
+            raise InvalidCacheSnapshot("Truncated snapshot")
+        record = json.loads(data)
+
+        if header is None:
+            header = record
+            if header.get("format") != FORMAT or (
+                    header.get("version") != VERSION):
+                raise InvalidCacheSnapshot(
+                    "Not a version %s cache snapshot" % VERSION)
+            continue
+        yield record
+
+    if header is None:
+        raise InvalidCacheSnapshot("Empty snapshot")
+
+
+def export_cache(path, services=None, url_pattern=None):
+    """
+    Writes the cache entries for services whose urls match the regular
+    expression url_pattern to a snapshot at path.  Returns the number of
+    entries written.
+    """
+    query = CacheEntryTimed.objects.all()
+    if services:
+        query = query.filter(service__in=services)
+    if url_pattern:
+        query = query.filter(url__regex=url_pattern)
+
+    count = 0
+    stream = gzip.open(path, "wb")
+    try:
+        _write_record(stream, {"format": FORMAT, "version": VERSION})
+
+        last_pk = 0
+        while True:
+            rows = list(query.filter(pk__gt=last_pk).order_by("pk")
+                        .values_list(*_FIELDS)[:BULK_QUERY_SIZE])
+            if not len(rows):
+                break
+
+            for (pk, service, url, status, header_pickle, stored_content,
+                 content_encoding, time_saved) in rows:
+                _write_record(stream, {
+                    "service": service,
+                    "url": url,
+                    "status": status,
+                    "headers": header_pickle,
+                    "content": stored_content,
+                    "encoding": content_encoding,
+                    "saved": _to_timestamp(time_saved),
+                })
+            count += len(rows)
+            last_pk = rows[-1][0]
+    finally:
+        stream.close()
+    return count
+
+
+def import_cache(path, replace=False, batch_size=BULK_QUERY_SIZE):
+    """
+    Loads the entries in the snapshot at path into the cache.  Returns a
+    dictionary of counts: imported, and skipped (already in the cache).
+    """
+    stats = {"imported": 0, "skipped": 0}
+    stream = gzip.open(path, "rb")
+    try:
+        batch = []
+        for record in read_snapshot(stream):
+            batch.append(record)
+            if len(batch) >= batch_size:
+                _import_batch(batch, replace, stats)
+                batch = []
+        if len(batch):
+            _import_batch(batch, replace, stats)
+    finally:
+        stream.close()
+    return stats
+
+
+def _import_batch(records, replace, stats):
+    # The last record for a url wins
+    by_key = {}
+    for record in records:
+        by_key[get_cache_key(record["service"], record["url"])] = record
+
+    try:
+        with transaction.atomic():
+            imported, skipped = _insert_records(by_key, replace)
+    except IntegrityError:
+        # Another process cached some of the urls after they were checked
+        imported = skipped = 0
+        for url_key in sorted(by_key):
+            try:
+                with transaction.atomic():
+                    counts = _insert_records({url_key: by_key[url_key]},
+                                             replace)
+            except IntegrityError:
+                counts = (0, 1)
+            imported += counts[0]
+            skipped += counts[1]
+
+    stats["imported"] += imported
+    stats["skipped"] += skipped
+
+
+def _insert_records(by_key, replace):
+    """
+    Inserts the records, by url_key, that aren't cached yet, or all of them
+    if replace is True.  Returns the number inserted and skipped.
+    """
+    skipped = 0
+    url_keys = set(by_key)
+    if replace:
+        # Only timed entries are replaced; a url cached by another kind of
+        # entry conflicts, and is skipped
+        for chunk in _chunks(url_keys):
+            CacheEntryTimed.objects.filter(url_key__in=chunk).delete()
+    else:
+        cached = _cached_keys(url_keys)
+        skipped = len(cached)
+        url_keys -= cached
+
+    if not len(url_keys):
+        return 0, skipped
+
+    url_keys = sorted(url_keys)
+    entry_rows = []
+    for url_key in url_keys:
+        record = by_key[url_key]
+        entry_rows.append((record["service"], record["url"], url_key,
+                           record["url"][:URL_START_LENGTH],
+                           record["status"], record["headers"],
+                           record["content"], record["encoding"]))
+
+    # Inserted directly - bulk_create doesn't support inherited models,
+    # and building model instances would take most of the time.  The
+    # database assigns the ids, which are read back by url_key.
+    cursor = connection.cursor()
+    cursor.executemany(_insert_sql(CacheEntry, _ENTRY_FIELDS), entry_rows)
+
+    ids = {}
+    for chunk in _chunks(url_keys):
+        ids.update(CacheEntry.objects.filter(url_key__in=chunk).values_list(
+            "url_key", "id"))
+    timed_rows = []
+    for url_key in url_keys:
+        timed_rows.append((ids[url_key], _time_saved.get_db_prep_value(
+            _from_timestamp(by_key[url_key]["saved"]), connection)))
+    cursor.executemany(_insert_sql(CacheEntryTimed, _TIMED_FIELDS),
+                       timed_rows)
+    return len(url_keys), skipped
+
+
+def _cached_keys(url_keys):
+    cached = set()
+    for chunk in _chunks(url_keys):
+        cached.update(CacheEntry.objects.filter(
+            url_key__in=chunk).values_list("url_key", flat=True))
+    return cached
+
+
+def _chunks(values):
+    values = sorted(values)
+    for start in range(0, len(values), BULK_QUERY_SIZE):
+        yield values[start:start + BULK_QUERY_SIZE]
+
+
+def _insert_sql(model, field_names):
+    quote_name = connection.ops.quote_name
+    columns = [quote_name(model._meta.get_field(name).column)
+               for name in field_names]
+    return "INSERT INTO %s (%s) VALUES (%s)" % (
+        quote_name(model._meta.db_table), ", ".join(columns),
+        ", ".join(["%s"] * len(columns)))
+
+
+def _to_timestamp(value):
+    return calendar.timegm(value.utctimetuple()) + value.microsecond / 1e6
+
+
+def _from_timestamp(value):
+    return datetime.utcfromtimestamp(value).replace(tzinfo=utc)
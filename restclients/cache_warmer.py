@@ -0,0 +1,217 @@
+"""
+Fills the cache with a term's SWS resources, so the start of a quarter
+doesn't begin with a cold cache.  For each curriculum offered in the term,
+the warmer requests the curriculum's section list, the details of each
+section, and the PWS records of the sections' instructors and grade
+submission delegates - what get_section_by_url needs.
+
+Sections and people are requested by up to `concurrency` threads (real
+threads only where restclients.thread allows them), and no more than
+`rate` requests are started per second.  Finished curricula are recorded
+in a state file, so an interrupted run can pick up where it left off.
+
+Used by the restclients_warm_cache management command.
+"""
+import os
+import json
+import time
+import logging
+import threading
+from restclients.thread import AsyncCall, gather
+from restclients.util.counters import Counters
+from restclients.sws.term import get_term_by_year_and_quarter
+from restclients.sws.curriculum import get_curricula_by_term
+from restclients.sws.section import get_sections_by_curriculum_and_term
+from restclients.sws import get_resource
+from restclients.pws import PWS
+
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimiter(object):
+    """
+    Spaces calls to wait() at least 1/rate seconds apart, across threads.
+    A rate of None doesn't limit anything.
+    """
+    def __init__(self, rate=None):
+        self._interval = 1.0 / rate if rate else 0
+        self._next = 0
+        self._lock = threading.Lock()
+
+    def wait(self):
+        if not self._interval:
+            return
+
+        with self._lock:
+            now = time.time()
+            start = max(now, self._next)
+            self._next = start + self._interval
+
+        if start > now:
+            time.sleep(start - now)
+
+
+class CacheWarmer(object):
+    """
+    Warms the cache for the year and quarter.  Counts what it did in
+    self.stats: curricula, skipped (done by an earlier run), sections,
+    people and errors.
+    """
+    def __init__(self, year, quarter, concurrency=4, rate=None,
+                 curricula=None, state_file=None, progress=None):
+        self.year = int(year)
+        self.quarter = quarter.lower()
+        self.concurrency = max(1, int(concurrency))
+        self.limiter = RateLimiter(rate)
+        self.curricula = curricula
+        self.state_file = state_file
+        self.progress = progress
+        self.stats = Counters()
+        # People already loaded by this run
+        self._people = set()
+
+    def run(self):
+        """
+        Warms every curriculum that isn't finished yet.  Returns the stats.
+        """
+        done = self._load_state()
+
+        self.limiter.wait()
+        term = get_term_by_year_and_quarter(self.year, self.quarter)
+        self.limiter.wait()
+        curricula = []
+        labels = set()
+        for curriculum in get_curricula_by_term(term):
+            if curriculum.label in labels:
+                continue
+            if self.curricula is None or curriculum.label in self.curricula:
+                labels.add(curriculum.label)
+                curricula.append(curriculum)
+
+        for index, curriculum in enumerate(curricula):
+            label = curriculum.label
+            if label in done:
+                self.stats.increment("skipped")
+                continue
+
+            if self._warm_curriculum(term, curriculum):
+                done.add(label)
+                self._save_state(done)
+
+            self._report("%s (%d of %d): %d sections, %d people, "
+                         "%d errors" % (label, index + 1, len(curricula),
+                                        self.stats.get("sections"),
+                                        self.stats.get("people"),
+                                        self.stats.get("errors")))
+
+        return self.stats.get_stats()
+
+    def _warm_curriculum(self, term, curriculum):
+        """
+        Returns True if everything for the curriculum was loaded.
+        """
+        self.limiter.wait()
+        try:
+            refs = get_sections_by_curriculum_and_term(curriculum, term)
+        except Exception as ex:
+            self._error(curriculum.label, ex)
+            return False
+
+        self.stats.increment("curricula")
+        regids = set()
+        results = self._run_all(self._warm_section,
+                                [ref.url for ref in refs])
+        for result in results:
+            if result is None:
+                continue
+            for regid in result:
+                if regid not in self._people:
+                    self._people.add(regid)
+                    regids.add(regid)
+
+        results.extend(self._run_all(self._warm_person, sorted(regids)))
+        return None not in results
+
+    def _run_all(self, method, args):
+        """
+        Calls method with each of args, concurrency at a time.
+        """
+        results = []
+        for start in range(0, len(args), self.concurrency):
+            calls = [AsyncCall(method, arg)
+                     for arg in args[start:start + self.concurrency]]
+            results.extend(gather(calls))
+        return results
+
+    def _warm_section(self, url):
+        """
+        Returns the regids of the section's instructors and delegates, or
+        None if the section couldn't be loaded.  Any failure is counted, so
+        one bad resource or timeout doesn't stop the run.
+        """
+        self.limiter.wait()
+        try:
+            data = get_resource(url)
+        except Exception as ex:
+            self._error(url, ex)
+            return None
+
+        self.stats.increment("sections")
+
+        regids = set()
+        for delegate_data in data.get("GradeSubmissionDelegates", []):
+            regids.add(delegate_data["Person"]["RegID"])
+        for meeting_data in data.get("Meetings", []):
+            for instructor_data in meeting_data.get("Instructors", []):
+                regid = instructor_data["Person"].get("RegID")
+                if regid:
+                    regids.add(regid)
+        return regids
+
+    def _warm_person(self, regid):
+        self.limiter.wait()
+        try:
+            PWS().get_person_by_regid(regid)
+        except Exception as ex:
+            self._error(regid, ex)
+            return None
+
+        self.stats.increment("people")
+        return True
+
+    def _error(self, resource, ex):
+        self.stats.increment("errors")
+        logger.warning("Cache warming failed for %s: %s" % (resource, ex))
+
+    def _report(self, message):
+        if self.progress is not None:
+            self.progress(message)
+
+    def _term_key(self):
+        return "%s,%s" % (self.year, self.quarter)
+
+    def _load_state(self):
+        """
+        Returns the labels of the curricula an earlier run finished for
+        this term.
+        """
+        if not self.state_file or not os.path.exists(self.state_file):
+            return set()
+
+        with open(self.state_file) as handle:
+            state = json.load(handle)
+
+        if state.get("term") != self._term_key():
+            return set()
+        return set(state.get("curricula", []))
+
+    def _save_state(self, done):
+        if not self.state_file:
+            return
+
+        temp_file = "%s.tmp" % self.state_file
+        with open(temp_file, "w") as handle:
+            json.dump({"term": self._term_key(),
+                       "curricula": sorted(done)}, handle)
+        os.rename(temp_file, self.state_file)
@@ -5,6 +5,7 @@ from django.conf import settings
 from restclients.dao import Canvas_DAO
 from restclients.models.canvas import CanvasTerm
 from restclients.exceptions import DataFailureException
+from restclients.thread import AsyncCall
 from urllib import quote, unquote
 import warnings
 import json
@@ -139,6 +140,13 @@ class Canvas(object):
 
         return data
 
+    def _get_resource_async(self, url, data_key=None):
+        """
+        Starts _get_resource without waiting for it.  Returns a
+        restclients.thread.AsyncCall, whose result() is the representation.
+        """
+        return AsyncCall(self._get_resource, url, data_key=data_key)
+
     def _put_resource(self, url, body):
         """
         Canvas PUT method.
@@ -146,6 +154,7 @@ class Canvas(object):
         headers = {"Content-Type": "application/json",
                    "Accept": "application/json"}
         response = Canvas_DAO().putURL(url, headers, json.dumps(body))
+        self._invalidate_resource(url)
 
         if not (response.status == 200 or response.status == 201 or
                 response.status == 204):
@@ -160,8 +169,20 @@ class Canvas(object):
         headers = {"Content-Type": "application/json",
                    "Accept": "application/json"}
         response = Canvas_DAO().postURL(url, headers, json.dumps(body))
+        self._invalidate_resource(url)
 
         if not (response.status == 200 or response.status == 204):
             raise DataFailureException(url, response.status, response.data)
 
         return json.loads(response.data)
+
+    def _invalidate_resource(self, url):
+        """
+        Removes the cached GETs of the resource at url, with any query
+        string, and of the resources under it.
+        """
+        path = url.split("?")[0]
+        dao = Canvas_DAO()
+        dao.invalidateCache(url=path)
+        dao.invalidateCache(url_prefix=path + "?")
+        dao.invalidateCache(url_prefix=path + "/")
@@ -59,6 +59,8 @@ class Admins(Canvas):
                                                          quote(role))
 
         response = Canvas_DAO().deleteURL(url, {"Accept": "application/json"})
+        # The account's admin list changes too
+        self._invalidate_resource("/api/v1/accounts/%s/admins" % account_id)
 
         if not (response.status == 200 or response.status == 204):
             raise DataFailureException(url, response.status, response.data)
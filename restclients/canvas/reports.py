@@ -177,6 +177,9 @@ class Reports(Canvas):
             report.account_id, report.type, report.report_id)
 
         response = Canvas_DAO().deleteURL(url, {"Accept": "application/json"})
+        # The list of reports of the type changes too
+        self._invalidate_resource("/api/v1/accounts/%s/reports/%s" % (
+            report.account_id, report.type))
 
         if response.status != 200:
             raise DataFailureException(url, response.status, response.data)
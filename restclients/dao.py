@@ -1,5 +1,9 @@
+import time
+import threading
 from django.utils.importlib import import_module
 from django.conf import settings
+from django.test.signals import setting_changed
+from django.db import connection
 from django.core.exceptions import *
 from restclients.dao_implementation.pws import File as PWSFile
 from restclients.dao_implementation.sws import File as SWSFile
@@ -22,11 +26,92 @@ from restclients.dao_implementation.hfs import File as HfsFile
 from restclients.dao_implementation.uwnetid import File as UwnetidFile
 from restclients.dao_implementation.r25 import File as R25File
 from restclients.dao_implementation.iasystem import File as IASystemFile
-from restclients.cache_implementation import NoCache
+from restclients.cache_implementation import NoCache, cache_stats
+from restclients.cache_implementation import get_stale_if_error, mark_stale
+from restclients.thread import Thread, AsyncCall
+from restclients.mock_http import MockHTTP
+from restclients.util.single_flight import SingleFlight
+from restclients.util.request_memo import get_request_memo
+from restclients.util.url_normalization import get_cache_url
+from restclients.util.url_normalization import get_cache_prefix
+from restclients.cache_implementation import is_invalidated
+
+
+# The number of concurrent fetches getURLs makes for cache misses.
+DEFAULT_GETURLS_POOL_SIZE = 10
+
+# Identical GETs that miss the cache at the same time share one upstream
+# request.  Turn off with RESTCLIENTS_COALESCE_REQUESTS = False.
+upstream_requests = SingleFlight()
+
+
+# How often a process waiting on another's lease checks for the response.
+LEASE_POLL_INTERVAL = 0.1
+
+# Stale cache entries with a background refresh running.
+_revalidating = set()
+_revalidating_lock = threading.Lock()
+
+
+def get_coalesce_stats():
+    """
+    Returns the number of upstream GETs made through _getURL, and the
+    number that were saved by sharing a request already in flight.
+    """
+    stats = upstream_requests.get_stats()
+    return {
+        "upstream_calls": stats["calls"],
+        "upstream_calls_saved": stats["coalesced"],
+    }
+
+
+def invalidate_cache(service, url=None, url_prefix=None):
+    """
+    Removes cached GETs for the service from the configured cache: the
+    one for url, the ones for urls starting with url_prefix, or with
+    neither, all of them.
+    """
+    MY_DAO()._invalidateCache(service, url, url_prefix)
+
+
+# Resolved DAO and cache instances, keyed on the settings key and the
+# configured class path.  Shared by every DAO_BASE in the process.
+_module_instances = {}
+_module_instances_lock = threading.Lock()
+
+
+def clear_dao_registry():
+    """
+    Drops all resolved DAO and cache instances, so the next lookup
+    re-reads the settings.
+    """
+    with _module_instances_lock:
+        _module_instances.clear()
+
+
+def _settings_changed(**kwargs):
+    clear_dao_registry()
+
+setting_changed.connect(_settings_changed)
 
 
 class DAO_BASE(object):
     def _getModule(self, settings_key, default_class):
+        class_path = getattr(settings, settings_key, None)
+        key = (settings_key, class_path)
+
+        try:
+            return _module_instances[key]
+        except KeyError:
+            pass
+
+        with _module_instances_lock:
+            if key not in _module_instances:
+                _module_instances[key] = self._loadModule(settings_key,
+                                                          default_class)
+            return _module_instances[key]
+
+    def _loadModule(self, settings_key, default_class):
         if hasattr(settings, settings_key):
             # This is all taken from django's static file finder
             module, attr = getattr(settings, settings_key).rsplit('.', 1)
@@ -45,73 +130,465 @@ class DAO_BASE(object):
             return default_class()
 
 
+class URLFetchThread(Thread):
+    """
+    Takes (url, cache_url, headers) items off a shared queue and fetches
+    them until the queue is empty.
+    """
+    fetch = None
+    queue = None
+    lock = None
+    results = None
+
+    def run(self):
+        while True:
+            with self.lock:
+                if not len(self.queue):
+                    return
+                url, cache_url, headers = self.queue.pop(0)
+
+            try:
+                self.results[cache_url] = (self.fetch(url, headers), None)
+            except Exception as ex:
+                self.results[cache_url] = (None, ex)
+
+
+class RevalidateThread(Thread):
+    """
+    Fetches a url and saves the response to the cache, for a stale entry
+    that was just served.
+    """
+    key = None
+    cache = None
+    fetch = None
+    service = None
+    url = None
+    cache_url = None
+    headers = None
+
+    def run(self):
+        try:
+            response = self.fetch(self.url, self.headers)
+            self.cache.processResponse(self.service, self.cache_url,
+                                       response)
+            cache_stats.increment("refresh")
+        except Exception as ex:
+            cache_stats.increment("refresh_error")
+        finally:
+            with _revalidating_lock:
+                _revalidating.discard(self.key)
+
+            if self._use_thread:
+                connection.close()
+
+
 class MY_DAO(DAO_BASE):
     def _getCache(self):
         return self._getModule('RESTCLIENTS_DAO_CACHE_CLASS', NoCache)
 
     def _getURL(self, service, url, headers):
         dao = self._getDAO()
+        return self._getCachedURL(service, url, url, headers, dao.getURL)
+
+    def _getCachedURL(self, service, url, cache_url, headers, fetch):
+        cache_url = get_cache_url(service, cache_url, headers)
+        memo = get_request_memo()
+        if memo is not None:
+            memo_key = self._requestKey(service, cache_url, headers)
+            if memo_key in memo:
+                return memo[memo_key]
+
+            response = self._getURLThroughCache(service, url, cache_url,
+                                                headers, fetch)
+            memo[memo_key] = response
+            return response
+
+        return self._getURLThroughCache(service, url, cache_url, headers, fetch)
+
+    def _requestKey(self, service, cache_url, headers):
+        return (service, cache_url, tuple(sorted((headers or {}).items())))
+
+    def _getURLThroughCache(self, service, url, cache_url, headers, fetch):
         cache = self._getCache()
-        cache_response = cache.getCache(service, url, headers)
+        # The cache can add conditional headers to the request, without
+        # changing the caller's headers
+        headers = dict(headers or {})
+        cache_response = cache.getCache(service, cache_url, headers)
         if cache_response != None:
             if "response" in cache_response:
+                if cache_response.get("stale", False):
+                    self._revalidate(service, url, cache_url, headers, fetch)
                 return cache_response["response"]
             if "headers" in cache_response:
                 headers = cache_response["headers"]
 
-        response = dao.getURL(url, headers)
-
-        cache_post_response = cache.processResponse(service, url, response)
+        def fetch_and_save():
+            try:
+                response = fetch(url, headers)
+            except Exception as ex:
+                stale_response = self._staleResponse(cache, service,
+                                                     cache_url, headers)
+                if stale_response is not None:
+                    return stale_response
+                raise
+
+            if response.status >= 500:
+                stale_response = self._staleResponse(cache, service,
+                                                     cache_url, headers)
+                if stale_response is not None:
+                    return stale_response
+
+            cache_post_response = cache.processResponse(service, cache_url,
+                                                        response)
+
+            if cache_post_response != None:
+                if "response" in cache_post_response:
+                    return cache_post_response["response"]
+
+            return response
+
+        def fetch_and_cache():
+            lease = self._acquireLease(cache, service, cache_url)
+            if lease is False:
+                response = self._waitForLease(cache, service, cache_url,
+                                              headers)
+                if response is not None:
+                    return response
 
-        if cache_post_response != None:
-            if "response" in cache_post_response:
-                return cache_post_response["response"]
+            try:
+                return fetch_and_save()
+            finally:
+                if lease:
+                    cache.releaseLease(service, cache_url, lease)
+
+        if not getattr(settings, "RESTCLIENTS_COALESCE_REQUESTS", True):
+            return fetch_and_cache()
+
+        key = self._requestKey(service, cache_url, headers)
+        return upstream_requests.do(key, fetch_and_cache)
+
+    def _acquireLease(self, cache, service, cache_url):
+        """
+        Claims the refresh of a cache entry for this process.  Returns the
+        lease, False if another process holds one, or None if leases aren't
+        in use.
+        """
+        timeout = getattr(settings, "RESTCLIENTS_CACHE_LEASE_TIMEOUT", 0)
+        if not timeout or not hasattr(cache, "acquireLease"):
+            return None
+
+        lease = cache.acquireLease(service, cache_url, timeout)
+        if lease is None:
+            return False
+
+        cache_stats.increment("lease_acquired")
+        return lease
+
+    def _waitForLease(self, cache, service, cache_url, headers):
+        """
+        Another process is refreshing the entry.  Returns a stale copy, if
+        one within RESTCLIENTS_CACHE_LEASE_MAX_STALENESS seconds is there,
+        or else the fresh response once the other process saves it.
+        Returns None if that takes longer than RESTCLIENTS_CACHE_LEASE_WAIT
+        seconds.
+        """
+        max_staleness = getattr(settings,
+                                "RESTCLIENTS_CACHE_LEASE_MAX_STALENESS", 0)
+        if max_staleness and hasattr(cache, "getStaleCache"):
+            cache_response = cache.getStaleCache(service, cache_url, headers,
+                                                 max_staleness)
+            if cache_response is not None and "response" in cache_response:
+                cache_stats.increment("lease_stale")
+                return mark_stale(cache_response["response"])
+
+        deadline = time.time() + getattr(settings,
+                                         "RESTCLIENTS_CACHE_LEASE_WAIT", 2.0)
+        while time.time() < deadline:
+            time.sleep(LEASE_POLL_INTERVAL)
+            cache_response = cache.getCache(service, cache_url,
+                                            dict(headers))
+            if cache_response is not None and "response" in cache_response:
+                cache_stats.increment("lease_waited")
+                return cache_response["response"]
 
+        cache_stats.increment("lease_timeout")
+        return None
+
+    def _staleResponse(self, cache, service, cache_url, headers):
+        """
+        Returns the last good cached response for a failed request, if the
+        service allows stale responses and the cache has a recent one.
+        """
+        max_staleness = get_stale_if_error(service)
+        if not max_staleness or not hasattr(cache, "getStaleCache"):
+            return None
+
+        cache_response = cache.getStaleCache(service, cache_url, headers,
+                                             max_staleness)
+        if cache_response is None or "response" not in cache_response:
+            return None
+
+        cache_stats.increment("stale_if_error")
+        return mark_stale(cache_response["response"])
+
+    def _revalidate(self, service, url, cache_url, headers, fetch):
+        """
+        Refreshes a stale cache entry in the background.  Only one refresh
+        runs for a cache url at a time.
+        """
+        key = (service, cache_url)
+        with _revalidating_lock:
+            if key in _revalidating:
+                cache_stats.increment("refresh_skipped")
+                return
+            _revalidating.add(key)
+
+        thread = RevalidateThread()
+        thread.key = key
+        thread.cache = self._getCache()
+        thread.fetch = fetch
+        thread.service = service
+        thread.url = url
+        thread.cache_url = cache_url
+        thread.headers = dict(headers or {})
+        thread.start()
+
+    def agetURL(self, url, headers):
+        """
+        Starts getURL without waiting for it.  Returns a
+        restclients.thread.AsyncCall, whose result() is the response.
+        """
+        return AsyncCall(self.getURL, url, headers)
+
+    def _getURLs(self, service, urls, headers):
+        dao = self._getDAO()
+        return self._getCachedURLs(service, urls, urls, headers, dao.getURL)
+
+    def _getCachedURLs(self, service, urls, cache_urls, headers, fetch):
+        """
+        Returns the responses for urls, in request order.  Cache hits are
+        looked up in bulk, the misses are fetched concurrently with fetch,
+        and the new responses are written back to the cache as a batch.
+        Stale hits are served and refreshed in the background, as in
+        _getURLThroughCache.  Misses aren't coalesced with other requests
+        or covered by cache leases - each is fetched here.  A url whose
+        request raised an exception gets a 500 response with the error as
+        its data, so callers can tell which url failed.
+        """
+        cache_urls = [get_cache_url(service, cache_url, headers)
+                      for cache_url in cache_urls]
+        cache = self._getCache()
+        memo = get_request_memo()
+
+        responses = {}
+        requested = []
+        seen = set()
+        for url, cache_url in zip(urls, cache_urls):
+            if cache_url in seen:
+                continue
+            seen.add(cache_url)
+
+            if memo is not None:
+                memo_key = self._requestKey(service, cache_url, headers)
+                if memo_key in memo:
+                    responses[cache_url] = memo[memo_key]
+                    continue
+
+            requested.append((url, cache_url))
+
+        if not len(requested):
+            return [responses[cache_url] for cache_url in cache_urls]
+
+        if hasattr(cache, "getCaches"):
+            cache_responses = cache.getCaches(
+                service, [cache_url for url, cache_url in requested], headers)
+            request_headers = dict((cache_url, dict(headers or {}))
+                                   for url, cache_url in requested)
+        else:
+            cache_responses = {}
+            request_headers = {}
+            for url, cache_url in requested:
+                request_headers[cache_url] = dict(headers or {})
+                cache_response = cache.getCache(service, cache_url,
+                                                request_headers[cache_url])
+                if cache_response is not None:
+                    cache_responses[cache_url] = cache_response
+
+        pending = []
+        for url, cache_url in requested:
+            cache_response = cache_responses.get(cache_url)
+            if cache_response is not None:
+                if "response" in cache_response:
+                    if cache_response.get("stale", False):
+                        self._revalidate(service, url, cache_url,
+                                         request_headers[cache_url], fetch)
+                    responses[cache_url] = cache_response["response"]
+                    continue
+                if "headers" in cache_response:
+                    request_headers[cache_url] = cache_response["headers"]
+
+            pending.append((url, cache_url, request_headers[cache_url]))
+
+        fetched = self._fetchURLs(pending, fetch)
+
+        failed = set()
+        new_responses = []
+        for url, cache_url, fetch_headers in pending:
+            response, exception = fetched[cache_url]
+            if exception is not None or response.status >= 500:
+                stale_response = self._staleResponse(cache, service,
+                                                     cache_url, fetch_headers)
+                if stale_response is not None:
+                    responses[cache_url] = stale_response
+                    continue
+
+            if exception is not None:
+                responses[cache_url] = self._errorResponse(exception)
+                failed.add(cache_url)
+                continue
+            responses[cache_url] = response
+            new_responses.append((cache_url, response))
+
+        if hasattr(cache, "processResponses"):
+            post_responses = cache.processResponses(service, new_responses)
+        else:
+            post_responses = {}
+            for cache_url, response in new_responses:
+                post_response = cache.processResponse(service, cache_url,
+                                                      response)
+                if post_response is not None:
+                    post_responses[cache_url] = post_response
+
+        for cache_url in post_responses:
+            if "response" in post_responses[cache_url]:
+                responses[cache_url] = post_responses[cache_url]["response"]
+
+        if memo is not None:
+            for url, cache_url in requested:
+                if cache_url in failed:
+                    continue
+                memo_key = self._requestKey(service, cache_url, headers)
+                memo[memo_key] = responses[cache_url]
+
+        return [responses[cache_url] for cache_url in cache_urls]
+
+    def _errorResponse(self, exception):
+        response = MockHTTP()
+        response.status = 500
+        response.data = str(exception)
+        response.headers = {}
         return response
 
+    def _fetchURLs(self, pending, fetch):
+        """
+        Runs fetch for each (url, cache_url, headers) in pending, on a
+        bounded number of threads.  Returns a dictionary of cache_url to
+        a (response, exception) pair.
+        """
+        results = {}
+        if not len(pending):
+            return results
+
+        pool_size = getattr(settings, "RESTCLIENTS_GETURLS_POOL_SIZE",
+                            DEFAULT_GETURLS_POOL_SIZE)
+
+        queue = list(pending)
+        lock = threading.Lock()
+        threads = []
+        for i in range(max(1, min(pool_size, len(queue)))):
+            thread = URLFetchThread()
+            thread.fetch = fetch
+            thread.queue = queue
+            thread.lock = lock
+            thread.results = results
+            thread.start()
+            threads.append(thread)
+
+        for thread in threads:
+            thread.join()
+
+        return results
+
+    def _invalidateCache(self, service, url=None, url_prefix=None):
+        cache_url = None
+        cache_prefix = None
+        if url is not None:
+            cache_url = get_cache_url(service, url)
+        elif url_prefix is not None:
+            cache_prefix = get_cache_prefix(service, url_prefix)
+
+        cache = self._getCache()
+        if hasattr(cache, "invalidateCache"):
+            cache.invalidateCache(service, cache_url, cache_prefix)
+
+        # Later GETs in this request shouldn't see the old response either
+        self._forgetRequests(service, cache_url, cache_prefix)
+
+    def _forgetRequests(self, service, cache_url=None, cache_prefix=None):
+        """
+        Drops the request memo's responses for the cache url, or the cache
+        urls starting with cache_prefix.
+        """
+        memo = get_request_memo()
+        if memo is not None:
+            for key in memo.keys():
+                if key[0] == service and is_invalidated(key[1], cache_url,
+                                                        cache_prefix):
+                    del memo[key]
+
+    def _forgetWrittenURL(self, service, url):
+        if get_request_memo() is not None:
+            self._forgetRequests(service, get_cache_url(service, url))
+
     def _postURL(self, service, url, headers, body=None):
         dao = self._getDAO()
         response = dao.postURL(url, headers, body)
+        self._forgetWrittenURL(service, url)
         return response
 
     def _deleteURL(self, service, url, headers):
         dao = self._getDAO()
         response = dao.deleteURL(url, headers)
+        self._forgetWrittenURL(service, url)
         return response
 
     def _putURL(self, service, url, headers, body=None):
         dao = self._getDAO()
         response = dao.putURL(url, headers, body)
+        self._forgetWrittenURL(service, url)
         return response
 
 
 class Subdomain_DAO(MY_DAO):
     def _getURL(self, service, url, headers, subdomain):
         dao = self._getDAO()
-        cache = self._getCache()
         cache_url = subdomain + url
-        cache_response = cache.getCache(service, cache_url, headers)
-        if cache_response != None:
-            if "response" in cache_response:
-                return cache_response["response"]
-            if "headers" in cache_response:
-                headers = cache_response["headers"]
 
-        response = dao.getURL(url, headers, subdomain)
+        def fetch(url, headers):
+            return dao.getURL(url, headers, subdomain)
 
-        cache_post_response = cache.processResponse(service, cache_url, response)
+        return self._getCachedURL(service, url, cache_url, headers, fetch)
 
-        if cache_post_response != None:
-            if "response" in cache_post_response:
-                return cache_post_response["response"]
+    def agetURL(self, url, headers, subdomain):
+        return AsyncCall(self.getURL, url, headers, subdomain)
 
-        return response
+    def _getURLs(self, service, urls, headers, subdomain):
+        dao = self._getDAO()
+        cache_urls = [subdomain + url for url in urls]
+
+        def fetch(url, headers):
+            return dao.getURL(url, headers, subdomain)
+
+        return self._getCachedURLs(service, urls, cache_urls, headers, fetch)
 
 
 class SWS_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('sws', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('sws', urls, headers)
+
     def putURL(self, url, headers, body):
         return self._putURL('sws', url, headers, body)
 
@@ -123,6 +600,9 @@ class PWS_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('pws', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('pws', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_PWS_DAO_CLASS', PWSFile)
 
@@ -131,12 +611,18 @@ class GWS_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('gws', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('gws', urls, headers)
+
     def putURL(self, url, headers, body):
         return self._putURL('gws', url, headers, body)
 
     def deleteURL(self, url, headers):
         return self._deleteURL('gws', url, headers)
 
+    def invalidateCache(self, url=None, url_prefix=None):
+        return self._invalidateCache('gws', url, url_prefix)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_GWS_DAO_CLASS', GWSFile)
 
@@ -145,6 +631,9 @@ class IRWS_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('irws', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('irws', urls, headers)
+
     def putURL(self, url, headers, body):
         return self._putURL('irws', url, headers, body)
 
@@ -159,6 +648,9 @@ class Book_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('books', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('books', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_BOOK_DAO_CLASS', BookFile)
 
@@ -167,6 +659,9 @@ class Canvas_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('canvas', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('canvas', urls, headers)
+
     def putURL(self, url, headers, body):
         return self._putURL('canvas', url, headers, body)
 
@@ -176,6 +671,9 @@ class Canvas_DAO(MY_DAO):
     def deleteURL(self, url, headers):
         return self._deleteURL('canvas', url, headers)
 
+    def invalidateCache(self, url=None, url_prefix=None):
+        return self._invalidateCache('canvas', url, url_prefix)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_CANVAS_DAO_CLASS', CanvasFile)
 
@@ -184,6 +682,9 @@ class Catalyst_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('catalyst', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('catalyst', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_CATALYST_DAO_CLASS', CatalystFile)
 
@@ -192,6 +693,9 @@ class DigitLib_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('digitlib', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('digitlib', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_DIGITLIB_DAO_CLASS', DigitlibFile)
 
@@ -200,6 +704,9 @@ class R25_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('r25', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('r25', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_R25_DAO_CLASS', R25File)
 
@@ -235,6 +742,9 @@ class NWS_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('nws', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('nws', urls, headers)
+
     def postURL(self, url, headers, body):
         return self._postURL('nws', url, headers, body)
 
@@ -252,6 +762,9 @@ class Hfs_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('hfs', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('hfs', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_HFS_DAO_CLASS', HfsFile)
 
@@ -260,6 +773,9 @@ class Libraries_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('libraries', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('libraries', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_LIBRARIES_DAO_CLASS', LibrariesFile)
 
@@ -268,6 +784,9 @@ class MyPlan_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('myplan', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('myplan', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_MYPLAN_DAO_CLASS', MyPlanFile)
 
@@ -276,6 +795,9 @@ class Uwnetid_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL('uwnetid', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('uwnetid', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_UWNETID_DAO_CLASS', UwnetidFile)
 
@@ -283,6 +805,9 @@ class TrumbaCalendar_DAO(MY_DAO):
     def getURL(self, url, headers=None):
         return self._getURL('calendar', url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs('calendar', urls, headers)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_CALENDAR_DAO_CLASS', CalendarFile)
 
@@ -293,6 +818,9 @@ class TrumbaBot_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL(TrumbaBot_DAO.service_id, url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs(TrumbaBot_DAO.service_id, urls, headers)
+
     def postURL(self, url, headers, body):
         return self._postURL(TrumbaBot_DAO.service_id, url, headers, body)
 
@@ -306,6 +834,9 @@ class TrumbaSea_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL(TrumbaSea_DAO.service_id, url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs(TrumbaSea_DAO.service_id, urls, headers)
+
     def postURL(self, url, headers, body):
         return self._postURL(TrumbaSea_DAO.service_id, url, headers, body)
 
@@ -319,6 +850,9 @@ class TrumbaTac_DAO(MY_DAO):
     def getURL(self, url, headers):
         return self._getURL(TrumbaTac_DAO.service_id, url, headers)
 
+    def getURLs(self, urls, headers):
+        return self._getURLs(TrumbaTac_DAO.service_id, urls, headers)
+
     def postURL(self, url, headers, body):
         return self._postURL(TrumbaTac_DAO.service_id, url, headers, body)
 
@@ -331,5 +865,8 @@ class IASYSTEM_DAO(Subdomain_DAO):
     def getURL(self, url, headers, subdomain):
         return self._getURL('iasystem', url, headers, subdomain)
 
+    def getURLs(self, urls, headers, subdomain):
+        return self._getURLs('iasystem', urls, headers, subdomain)
+
     def _getDAO(self):
         return self._getModule('RESTCLIENTS_IASYSTEM_DAO_CLASS', IASystemFile)
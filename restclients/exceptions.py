@@ -71,6 +71,10 @@ class IRWSPersonNotFound(Exception):
     """Exception for netids that don't exist"""
     pass
 
+class InvalidCacheSnapshot(Exception):
+    """Exception for unreadable cache snapshot files."""
+    pass
+
 class DataFailureException(Exception):
     """
     This exception means there was an error fetching content
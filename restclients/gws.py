@@ -8,6 +8,7 @@ from restclients.exceptions import InvalidGroupID
 from restclients.exceptions import DataFailureException
 from restclients.models.gws import Group, CourseGroup, GroupReference
 from restclients.models.gws import GroupUser, GroupMember
+from restclients.thread import AsyncCall
 from urllib import urlencode
 from lxml import etree
 import re
@@ -97,6 +98,13 @@ class GWS(object):
 
         return self._group_from_xhtml(response.data)
 
+    def get_group_by_id_async(self, group_id):
+        """
+        Starts get_group_by_id without waiting for it.  Returns a
+        restclients.thread.AsyncCall, whose result() is the Group.
+        """
+        return AsyncCall(self.get_group_by_id, group_id)
+
     def create_group(self, group):
         """
         Creates a group from the passed restclients.Group object.
@@ -109,6 +117,7 @@ class GWS(object):
                               self._headers({"Accept": "text/xhtml",
                                              "Content-Type": "text/xhtml"}),
                               body)
+        self._invalidate_group(group.name)
 
         if response.status != 201:
             raise DataFailureException(url, response.status, response.data)
@@ -128,6 +137,7 @@ class GWS(object):
                                              "Content-Type": "text/xhtml",
                                              "If-Match": "*"}),
                               body)
+        self._invalidate_group(group.name)
 
         if response.status != 200:
             raise DataFailureException(url, response.status, response.data)
@@ -144,6 +154,7 @@ class GWS(object):
         dao = GWS_DAO()
         url = "/group_sws/v2/group/%s" % group_id
         response = dao.deleteURL(url, self._headers({}))
+        self._invalidate_group(group_id)
 
         if response.status != 200:
             raise DataFailureException(url, response.status, response.data)
@@ -183,6 +194,7 @@ class GWS(object):
                               self._headers({"Content-Type": "text/xhtml",
                                              "If-Match": "*"}),
                               body)
+        self._invalidate_group(group_id)
 
         if response.status != 200:
             raise DataFailureException(url, response.status, response.data)
@@ -361,6 +373,18 @@ class GWS(object):
         context = Context({"group_id": group_id, "members": members})
         return template.render(context)
 
+    def _invalidate_group(self, group_id):
+        """
+        Removes the cached GETs for the group, its members and effective
+        members.  Searches, and groups that have this one as a member,
+        aren't tracked.  Called whether or not the write succeeded, since
+        a failed request can still have changed the group.
+        """
+        url = "/group_sws/v2/group/%s" % group_id
+        dao = GWS_DAO()
+        dao.invalidateCache(url=url)
+        dao.invalidateCache(url_prefix=url + "/")
+
     def _is_valid_group_id(self, group_id):
         if not re.match(r'^[a-z0-9][\w\.-]+$', group_id, re.I):
             return False
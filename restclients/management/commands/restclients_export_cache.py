@@ -0,0 +1,31 @@
+"""
+Writes cache entries to a snapshot file, e.g.
+
+    python manage.py restclients_export_cache /tmp/cache.snapshot \
+        --service=sws --service=pws --url='^/student/v5/course/'
+"""
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from restclients.cache_snapshot import export_cache
+
+
+class Command(BaseCommand):
+    args = "<snapshot file>"
+    help = "Exports the restclients cache to a snapshot file"
+
+    option_list = BaseCommand.option_list + (
+        make_option("--service", action="append", dest="services",
+                    help="Only export this service.  Can be repeated"),
+        make_option("--url", dest="url_pattern", default=None,
+                    help="Only export urls matching this regular "
+                         "expression"),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Usage: restclients_export_cache %s" %
+                               self.args)
+
+        count = export_cache(args[0], services=options["services"],
+                             url_pattern=options["url_pattern"])
+        self.stdout.write("Exported %d entries to %s" % (count, args[0]))
@@ -0,0 +1,40 @@
+"""
+Loads a snapshot from restclients_export_cache into the cache, e.g.
+
+    python manage.py restclients_import_cache /tmp/cache.snapshot
+"""
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from restclients.cache_snapshot import import_cache
+from restclients.exceptions import InvalidCacheSnapshot
+from restclients.models import BULK_QUERY_SIZE
+
+
+class Command(BaseCommand):
+    args = "<snapshot file>"
+    help = "Imports a snapshot file into the restclients cache"
+
+    option_list = BaseCommand.option_list + (
+        make_option("--replace", action="store_true", default=False,
+                    help="Replace entries that are already in the cache"),
+        make_option("--batch-size", dest="batch_size", type="int",
+                    default=BULK_QUERY_SIZE,
+                    help="Entries to insert at a time"),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 1:
+            raise CommandError("Usage: restclients_import_cache %s" %
+                               self.args)
+
+        if options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        try:
+            stats = import_cache(args[0], replace=options["replace"],
+                                 batch_size=options["batch_size"])
+        except (IOError, InvalidCacheSnapshot) as ex:
+            raise CommandError("Unable to read %s: %s" % (args[0], ex))
+
+        self.stdout.write("Imported %d entries, %d were already cached" % (
+            stats["imported"], stats["skipped"]))
@@ -0,0 +1,54 @@
+"""
+Deletes cache entries the configured cache no longer uses, e.g.
+
+    python manage.py restclients_purge_cache
+    python manage.py restclients_purge_cache --every=3600
+
+See restclients.cache_purge for the settings.
+"""
+import time
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from restclients.cache_purge import purge_cache
+
+
+class Command(BaseCommand):
+    help = ("Deletes expired entries from the restclients cache tables. "
+            "ETag entries are kept until they've been expired for "
+            "RESTCLIENTS_CACHE_PURGE_ETAG_AGE seconds.")
+
+    option_list = BaseCommand.option_list + (
+        make_option("--max-age", dest="max_age", type="int", default=None,
+                    help="Delete every entry older than this many seconds, "
+                         "and every ETag entry expired that long ago, "
+                         "instead of using the cache's TTLs"),
+        make_option("--batch-size", dest="batch_size", type="int",
+                    default=None, help="Entries to read per batch"),
+        make_option("--pause", type="float", default=None,
+                    help="Seconds to wait between batches"),
+        make_option("--every", type="int", default=None,
+                    help="Keep running, purging every this many seconds"),
+    )
+
+    def handle(self, *args, **options):
+        if options["batch_size"] is not None and options["batch_size"] < 1:
+            raise CommandError("--batch-size must be at least 1")
+
+        while True:
+            try:
+                stats = purge_cache(max_age=options["max_age"],
+                                    batch_size=options["batch_size"],
+                                    pause=options["pause"])
+            except ValueError as ex:
+                raise CommandError(ex)
+
+            self.stdout.write("Deleted %d of %d entries checked, including "
+                              "%d ETag entries, reclaiming %d bytes, and "
+                              "%d expired leases." % (
+                                  stats["deleted"], stats["scanned"],
+                                  stats["etags"], stats["bytes"],
+                                  stats["leases"]))
+
+            if not options["every"]:
+                break
+            time.sleep(options["every"])
@@ -0,0 +1,58 @@
+"""
+Fills the cache with a term's SWS and PWS resources, e.g.
+
+    python manage.py restclients_warm_cache 2013 winter --concurrency=4 \
+        --rate=20 --state-file=/tmp/warm-2013-winter.json
+"""
+from optparse import make_option
+from django.core.management.base import BaseCommand, CommandError
+from restclients.sws import QUARTER_SEQ
+from restclients.cache_warmer import CacheWarmer
+
+
+class Command(BaseCommand):
+    args = "<year> <quarter>"
+    help = "Loads a term's curricula, sections and instructors into the cache"
+
+    option_list = BaseCommand.option_list + (
+        make_option("--concurrency", type="int", default=4,
+                    help="Sections to request at once"),
+        make_option("--rate", type="float", default=None,
+                    help="Most requests to start per second"),
+        make_option("--curriculum", action="append", dest="curricula",
+                    help="Only warm this curriculum.  Can be repeated"),
+        make_option("--state-file", dest="state_file", default=None,
+                    help="Records finished curricula, so a later run can "
+                         "resume"),
+    )
+
+    def handle(self, *args, **options):
+        if len(args) != 2:
+            raise CommandError("Usage: restclients_warm_cache %s" %
+                               self.args)
+
+        year, quarter = args
+        if not year.isdigit() or quarter.lower() not in QUARTER_SEQ:
+            raise CommandError("Invalid term: %s %s" % (year, quarter))
+
+        if options["concurrency"] < 1:
+            raise CommandError("--concurrency must be at least 1")
+
+        def progress(message):
+            self.stdout.write(message)
+
+        warmer = CacheWarmer(year, quarter,
+                             concurrency=options["concurrency"],
+                             rate=options["rate"],
+                             curricula=options["curricula"],
+                             state_file=options["state_file"],
+                             progress=progress)
+        stats = warmer.run()
+
+        self.stdout.write("Warmed %d curricula (%d already done), %d "
+                          "sections, %d people.  %d errors." % (
+                              stats.get("curricula", 0),
+                              stats.get("skipped", 0),
+                              stats.get("sections", 0),
+                              stats.get("people", 0),
+                              stats.get("errors", 0)))
@@ -0,0 +1,21 @@
+from restclients.util.request_memo import start_request_memo
+from restclients.util.request_memo import end_request_memo
+
+
+class RequestMemoMiddleware(object):
+    """
+    Remembers GET responses for the length of a request, so a resource
+    that's needed several times is only fetched once.  Add this to
+    MIDDLEWARE_CLASSES:
+
+    'restclients.middleware.RequestMemoMiddleware',
+    """
+    def process_request(self, request):
+        start_request_memo()
+
+    def process_response(self, request, response):
+        end_request_memo()
+        return response
+
+    def process_exception(self, request, exception):
+        end_request_memo()
@@ -1,6 +1,7 @@
 """
 Contains objects used by the non-HTTP DAO implementations
 """
+from restclients.util.headers import HeaderDict
 
 
 class MockHTTP(object):
@@ -12,6 +13,8 @@ class MockHTTP(object):
     status = 0
     data = ""
     headers = {}
+    # True when this is a cached response served in place of an error
+    is_stale = False
 
     def read(self):
         """
@@ -23,6 +26,9 @@ class MockHTTP(object):
         """
         Returns the HTTP response header field, case insensitively
         """
+        if isinstance(self.headers, HeaderDict):
+            return self.headers.get(field, default)
+
         if self.headers:
             for header in self.headers:
                 if field.lower() == header.lower():
@@ -1,5 +1,10 @@
 from django.db import models
+from django.conf import settings
 import pickle
+import zlib
+from hashlib import sha1
+from restclients.util.headers import HeaderDict, encode_headers, \
+    decode_headers
 from base64 import b64encode, b64decode
 import warnings
 
@@ -112,45 +117,147 @@ def CanvasEnrollment(*args, **kwargs):
     return canvasEnrollment(*args, **kwargs)
 
 
+def compress_content(content):
+    """
+    Returns the stored form of a cache entry body, and its encoding.
+    Bodies of at least RESTCLIENTS_CACHE_COMPRESS_MIN_BYTES are zlib
+    compressed, if that makes them smaller.  Set it to None to turn
+    compression off.
+    """
+    if content is None:
+        return "", ""
+
+    min_bytes = getattr(settings, "RESTCLIENTS_CACHE_COMPRESS_MIN_BYTES",
+                        1024)
+    if min_bytes is None or len(content) < min_bytes:
+        return content, ""
+
+    data = content
+    if isinstance(data, unicode):
+        data = data.encode("utf-8")
+
+    compressed = b64encode(zlib.compress(data))
+    if len(compressed) >= len(data):
+        return content, ""
+    return compressed, "zlib"
+
+
+def decompress_content(stored_content):
+    data = zlib.decompress(b64decode(stored_content))
+    try:
+        return data.decode("utf-8")
+    except UnicodeDecodeError:
+        return data
+
+
+# Keeps url_key__in and pk__in queries on cache entries under the
+# bound-parameter limits of sqlite.
+BULK_QUERY_SIZE = 500
+
+# How much of the url CacheEntry.url_start keeps
+URL_START_LENGTH = 255
+
+
+def get_cache_key(service, url):
+    """
+    Returns the fixed width key cache entries are looked up by.
+    """
+    key = "%s:%s" % (service, url)
+    if isinstance(key, unicode):
+        key = key.encode("utf-8")
+    return sha1(key).hexdigest()
+
+
 class CacheEntry(models.Model):
     service = models.CharField(max_length=50, db_index=True)
-    url = models.CharField(max_length=255, unique=True, db_index=True)
+    # The full url, for debugging - entries are looked up by url_key, which
+    # save() sets from the service and url.
+    url = models.TextField()
+    url_key = models.CharField(max_length=40, unique=True)
+    # The start of the url, indexed so the entries under a url prefix can
+    # be found without scanning url.  Also set by save().
+    url_start = models.CharField(max_length=URL_START_LENGTH, db_index=True,
+                                 default="")
     status = models.PositiveIntegerField()
     header_pickle = models.TextField()
-    content = models.TextField()
+    # The body as it's stored - base64 encoded zlib data when
+    # content_encoding is "zlib".  Read and set it through content.
+    stored_content = models.TextField(db_column="content")
+    content_encoding = models.CharField(max_length=16, default="",
+                                        blank=True)
     headers = None
-
-    class Meta:
-        unique_together = ('service', 'url')
+    _content = None
 
     def getHeaders(self):
+        # Decoded the first time the headers are read.  header_pickle holds
+        # a JSON list of pairs, or in older rows a base64 encoded pickle -
+        # base64 never starts with "[".
         if self.headers is None:
-            if self.header_pickle is None:
-                self.headers = {}
+            if not self.header_pickle:
+                self.headers = HeaderDict()
+            elif self.header_pickle.startswith("["):
+                self.headers = decode_headers(self.header_pickle)
             else:
-                self.headers = pickle.loads(b64decode(self.header_pickle))
+                self.headers = HeaderDict(
+                    pickle.loads(b64decode(self.header_pickle)))
+        elif not isinstance(self.headers, HeaderDict):
+            self.headers = HeaderDict(self.headers)
         return self.headers
 
     def setHeaders(self, headers):
         self.headers = headers
 
+    def _get_content(self):
+        # Only decompressed when the body is read
+        if self._content is None:
+            if self.content_encoding == "zlib":
+                self._content = decompress_content(self.stored_content)
+            else:
+                self._content = self.stored_content
+        return self._content
+
+    def _set_content(self, content):
+        self._content = content
+        self.stored_content = None
+
+    content = property(_get_content, _set_content)
+
     def save(self, *args, **kwargs):
-        pickle_content = ""
-        if self.headers:
-            pickle_content = pickle.dumps(self.headers)
-        else:
-            pickle_content = pickle.dumps({})
+        self.url_key = get_cache_key(self.service, self.url)
+        self.url_start = self.url[:URL_START_LENGTH]
+
+        if self.stored_content is None:
+            self.stored_content, self.content_encoding = compress_content(
+                self._content)
+
+        # Headers that were never read don't need encoding again
+        if self.headers is not None:
+            self.header_pickle = encode_headers(self.headers)
+        elif not self.header_pickle:
+            self.header_pickle = encode_headers({})
 
-        self.header_pickle = b64encode(pickle_content)
         super(CacheEntry, self).save(*args, **kwargs)
 
 
 class CacheEntryTimed(CacheEntry):
-    time_saved = models.DateTimeField()
+    # Lookups by service and url use CacheEntry's unique index; this one
+    # is for finding entries by age.
+    time_saved = models.DateTimeField(db_index=True)
 
 
 class CacheEntryExpires(CacheEntry):
-    time_expires = models.DateTimeField()
+    # Indexed for finding long expired entries
+    time_expires = models.DateTimeField(db_index=True)
+
+
+class CacheLease(models.Model):
+    """
+    A short claim on refreshing the cache entry with the same url_key, so
+    only one process fetches it from the service.
+    """
+    url_key = models.CharField(max_length=40, unique=True)
+    owner = models.CharField(max_length=32)
+    expires = models.DateTimeField()
 
 
 class Book(models.Model):
@@ -7,6 +7,7 @@ from restclients.exceptions import InvalidRegID, InvalidNetID, InvalidEmployeeID
 from restclients.exceptions import InvalidIdCardPhotoSize
 from restclients.exceptions import DataFailureException
 from restclients.models.sws import Person, Entity
+from restclients.thread import AsyncCall
 from StringIO import StringIO
 from urllib import urlencode
 import json
@@ -43,6 +44,13 @@ class PWS(object):
 
         return self._person_from_json(response.data)
 
+    def get_person_by_regid_async(self, regid):
+        """
+        Starts get_person_by_regid without waiting for it.  Returns a
+        restclients.thread.AsyncCall, whose result() is the Person.
+        """
+        return AsyncCall(self.get_person_by_regid, regid)
+
     def get_person_by_netid(self, netid):
         """
         Returns a restclients.Person object for the given netid.  If the
@@ -61,6 +69,13 @@ class PWS(object):
 
         return self._person_from_json(response.data)
 
+    def get_person_by_netid_async(self, netid):
+        """
+        Starts get_person_by_netid without waiting for it.  Returns a
+        restclients.thread.AsyncCall, whose result() is the Person.
+        """
+        return AsyncCall(self.get_person_by_netid, netid)
+
     def get_person_by_employee_id(self, employee_id):
         """
         Returns a restclients.Person object for the given employee id.  If the
@@ -6,7 +6,7 @@ import json
 import warnings
 from urllib import quote
 from datetime import datetime
-from restclients.thread import Thread
+from restclients.thread import Thread, AsyncCall
 from restclients.dao import SWS_DAO
 from restclients.exceptions import DataFailureException
 from django.conf import settings
@@ -36,6 +36,29 @@ def get_resource(url):
     return json.loads(response.data)
 
 
+def get_resource_async(url):
+    """
+    Starts get_resource for the given url without waiting for it.
+    :returns: restclients.thread.AsyncCall, whose result() is the json
+    """
+    return AsyncCall(get_resource, url)
+
+
+def get_resources(urls):
+    """
+    Issue GET requests to SWS for all of the given urls, and return
+    the responses in json format, in the same order.
+    :returns: list of http response content in json
+    """
+    responses = SWS_DAO().getURLs(urls, {"Accept": "application/json"})
+    data = []
+    for url, response in zip(urls, responses):
+        if response.status != 200:
+            raise DataFailureException(url, response.status, response.data)
+        data.append(json.loads(response.data))
+    return data
+
+
 def get_current_sws_version():
     return 5
 
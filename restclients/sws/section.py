@@ -3,6 +3,7 @@ from restclients.sws.v5.section import get_sections_by_delegate_and_term
 from restclients.sws.v5.section import get_sections_by_curriculum_and_term
 from restclients.sws.v5.section import get_changed_sections_by_term
 from restclients.sws.v5.section import get_section_by_url
+from restclients.sws.v5.section import get_sections_by_urls
 from restclients.sws.v5.section import get_section_by_label
 from restclients.sws.v5.section import get_linked_sections
 from restclients.sws.v5.section import get_joint_sections
@@ -7,7 +7,7 @@ from restclients.models.sws import Term
 from restclients.models.sws import StudentGrades, StudentCourseGrade
 from restclients.models.sws import Enrollment, Major, Minor
 from restclients.sws import get_resource
-from restclients.sws.section import get_section_by_url
+from restclients.sws.section import get_sections_by_urls
 
 
 logger = logging.getLogger(__name__)
@@ -35,11 +35,15 @@ def _json_to_grades(data, regid, term):
     grades.non_grade_credits = data["QtrNonGrdEarned"]
     grades.grades = []
 
-    for registration in data["Registrations"]:
+    section_urls = [registration["Section"]["Href"]
+                    for registration in data["Registrations"]]
+    sections = get_sections_by_urls(section_urls)
+
+    for registration, section in zip(data["Registrations"], sections):
         grade = StudentCourseGrade()
         grade.grade = registration["Grade"]
         grade.credits = registration["Credits"].replace(" ", "")
-        grade.section = get_section_by_url(registration["Section"]["Href"])
+        grade.section = section
         grades.grades.append(grade)
 
     return grades
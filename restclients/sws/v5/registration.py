@@ -14,7 +14,8 @@ from restclients.cache_manager import disable_cache_entry_queueing
 from restclients.cache_manager import save_all_queued_entries
 from restclients.pws import PWS
 from restclients.thread import Thread
-from restclients.sws import get_resource, SWSThread, deprecation, parse_sws_date
+from restclients.dao import SWS_DAO
+from restclients.sws import get_resource, get_resources, deprecation, parse_sws_date
 from restclients.sws.v5.section import _json_to_section
 
 
@@ -202,12 +203,14 @@ def get_schedule_by_regid_and_term(regid, term,
 def _json_to_schedule(term_data, term, regid,
                       include_instructor_not_on_time_schedule=True):
     sections = []
-    sws_threads = []
     term_credit_hours = Decimal("0.0")
 
     enable_cache_entry_queueing()
     try:
-        for registration in term_data["Registrations"]:
+        registrations = term_data["Registrations"]
+        reg_urls = []
+        course_urls = []
+        for registration in registrations:
             reg_url = registration["Href"]
 
             # Skip a step here, and go right to the course section resource
@@ -215,30 +218,25 @@ def _json_to_schedule(term_data, term, regid,
             course_url = re.sub('^(.*?,.*?,.*?,.*?,.*?),.*', '\\1.json', course_url)
             course_url = re.sub(',([^,]*).json', '/\\1.json', course_url)
 
-            thread = SWSThread()
-            thread.url = course_url
-            thread.reg_url = reg_url
-            thread.headers = {"Accept": "application/json"}
-            thread.start()
-            sws_threads.append(thread)
+            reg_urls.append(reg_url)
+            course_urls.append(course_url)
+
+        course_responses = SWS_DAO().getURLs(
+            course_urls, {"Accept": "application/json"})
 
-        for thread in sws_threads:
-            thread.join()
+        section_reg_data = get_resources(reg_urls)
 
-        for thread in sws_threads:
-            response = thread.response
-            if not response:
-                raise DataFailureException(thread.url,
-                                           500,
-                                           thread.exception)
+        for (registration, course_url, response, reg_data) in zip(
+                registrations, course_urls, course_responses,
+                section_reg_data):
             if response.status != 200:
-                raise DataFailureException(thread.url,
+                raise DataFailureException(course_url,
                                            response.status,
                                            response.data)
 
             section = _json_to_section(json.loads(response.data), term,
                                        include_instructor_not_on_time_schedule)
-            _add_credits_grade_to_section(thread.reg_url, section)
+            _json_to_credits_grade(reg_data, section)
             if section.student_credits is not None:
                 term_credit_hours += section.student_credits
             # For independent study courses, only include the one relevant
@@ -278,7 +276,14 @@ def _add_credits_grade_to_section(url, section):
     Given the registration url passed in,
     add credits, grade, grade date in the section object
     """
-    section_reg_data = get_resource(url)
+    _json_to_credits_grade(get_resource(url), section)
+
+
+def _json_to_credits_grade(section_reg_data, section):
+    """
+    Given the registration resource data passed in,
+    add credits, grade, grade date in the section object
+    """
     if section_reg_data is not None:
         section.student_grade = section_reg_data['Grade']
         section.is_auditor = section_reg_data['Auditor']
@@ -12,7 +12,7 @@ from restclients.models.sws import SectionMeeting
 from restclients.models.sws import GradeSubmissionDelegate
 from restclients.models.sws import Person
 from restclients.pws import PWS
-from restclients.sws import get_resource, encode_section_label
+from restclients.sws import get_resource, get_resources, encode_section_label
 from restclients.sws.term import get_term_by_year_and_quarter
 
 
@@ -127,6 +127,24 @@ def get_section_by_url(url,
         include_instructor_not_on_time_schedule=include_instructor_not_on_time_schedule)
 
 
+def get_sections_by_urls(urls,
+                         include_instructor_not_on_time_schedule=True):
+    """
+    Returns a list of restclients.models.sws.Section objects
+    for the passed section urls, fetched as a batch.
+    """
+    for url in urls:
+        if not course_url_pattern.match(url):
+            raise InvalidSectionURL(url)
+
+    sections = []
+    for section_data in get_resources(urls):
+        sections.append(_json_to_section(
+            section_data,
+            include_instructor_not_on_time_schedule=include_instructor_not_on_time_schedule))
+    return sections
+
+
 def get_section_by_label(label,
                          include_instructor_not_on_time_schedule=True):
     """
@@ -150,14 +168,8 @@ def get_linked_sections(section,
     Returns a list of restclients.models.sws.Section objects,
     representing linked sections for the passed section.
     """
-    linked_sections = []
-
-    for url in section.linked_section_urls:
-        section = get_section_by_url(url,
-                                     include_instructor_not_on_time_schedule)
-        linked_sections.append(section)
-
-    return linked_sections
+    return get_sections_by_urls(section.linked_section_urls,
+                                include_instructor_not_on_time_schedule)
 
 
 def get_joint_sections(section,
@@ -166,14 +178,8 @@ def get_joint_sections(section,
     Returns a list of restclients.models.sws.Section objects,
     representing joint sections for the passed section.
     """
-    joint_sections = []
-
-    for url in section.joint_section_urls:
-        section = get_section_by_url(url,
-                                     include_instructor_not_on_time_schedule)
-        joint_sections.append(section)
-
-    return joint_sections
+    return get_sections_by_urls(section.joint_section_urls,
+                                include_instructor_not_on_time_schedule)
 
 
 def _json_to_section(section_data,
@@ -0,0 +1,12 @@
+from restclients.mock_http import MockHTTP
+
+
+def make_response(status=200, data="", headers=None):
+    """
+    Returns a MockHTTP response to save in a cache.
+    """
+    response = MockHTTP()
+    response.status = status
+    response.data = data
+    response.headers = headers or {}
+    return response
@@ -0,0 +1,57 @@
+import os
+from base64 import b64encode
+from datetime import datetime
+from django.test import TestCase
+from django.conf import settings
+from django.utils.timezone import make_aware, get_current_timezone
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import TimeSimpleCache
+from restclients.models import CacheEntryTimed
+
+
+class CompressionTest(TestCase):
+    def _save(self, url, content):
+        entry = CacheEntryTimed(service="test", url=url, status=200,
+                                content=content, time_saved=make_aware(datetime.now(),
+                                                           get_current_timezone()))
+        entry.save()
+        return CacheEntryTimed.objects.get(url=url)
+
+    def test_compressed(self):
+        content = u'{"Sections": [%s]}' % ", ".join(
+            [u'{"SectionID": "A\u00e9"}'] * 200)
+        entry = self._save("/big", content)
+
+        self.assertEquals(entry.content_encoding, "zlib")
+        self.assertTrue(len(entry.stored_content) < len(content) / 4)
+
+        # Not decompressed until it's read
+        self.assertEquals(entry._content, None)
+        self.assertEquals(entry.content, content)
+
+    def test_not_compressed(self):
+        entry = self._save("/small", "{}")
+        self.assertEquals(entry.content_encoding, "")
+        self.assertEquals(entry.content, "{}")
+
+        # Doesn't compress well
+        content = b64encode(os.urandom(3072))
+        entry = self._save("/random", content)
+        self.assertEquals(entry.content_encoding, "")
+        self.assertEquals(entry.content, content)
+
+        with self.settings(RESTCLIENTS_CACHE_COMPRESS_MIN_BYTES=None):
+            entry = self._save("/off", "x" * 4096)
+            self.assertEquals(entry.content_encoding, "")
+
+    def test_through_cache(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+            url = "/student/v5/course/2012,autumn,CSE,100/W.json"
+            response = SWS_DAO().getURL(url, {})
+
+            entry = CacheEntryTimed.objects.get(url=url)
+            self.assertEquals(entry.content_encoding, "zlib")
+
+            hit = TimeSimpleCache().getCache("sws", url, {})
+            self.assertEquals(hit["response"].data, response.data)
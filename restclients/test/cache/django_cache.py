@@ -0,0 +1,91 @@
+import shutil
+import tempfile
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import DjangoCache, get_cache
+from restclients.mock_http import MockHTTP
+
+
+LOCMEM_CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        'LOCATION': 'restclients-test',
+    }
+}
+
+
+class DjangoCacheTest(TestCase):
+    def _check_cache(self):
+        url = '/student/v5/term/2013,spring.json'
+        cache = DjangoCache()
+        self.assertEquals(cache.getCache('sws', url, {}), None)
+
+        # No database queries for reads or writes
+        with self.assertNumQueries(0):
+            response = SWS_DAO().getURL(url, {})
+            hit = cache.getCache('sws', url, {})
+
+        self.assertEquals(hit["response"].status, 200)
+        self.assertEquals(hit["response"].data, response.data)
+        self.assertEquals(cache.getCache('pws', url, {}), None)
+
+        urls = [url, '/student/v5/term/2013,summer.json']
+        responses = SWS_DAO().getURLs(urls, {})
+        self.assertTrue('summer' in responses[1].data)
+        self.assertEquals(len(cache.getCaches('sws', urls, {})), 2)
+
+        # A recent success isn't replaced by an error
+        error = MockHTTP()
+        error.status = 500
+        error.data = "Error"
+        hit = cache.processResponse('sws', url, error)
+        self.assertEquals(hit["response"].status, 200)
+        self.assertEquals(cache.getCache('sws', url, {})["response"].status, 200)
+
+        cache.processResponse('sws', '/error', error)
+        self.assertEquals(cache.getCache('sws', '/error', {})["response"].status, 500)
+
+    def test_locmem(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.DjangoCache',
+                           CACHES=LOCMEM_CACHES):
+            get_cache('default').clear()
+            self._check_cache()
+
+    def test_file(self):
+        cache_dir = tempfile.mkdtemp()
+        try:
+            with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                               RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.DjangoCache',
+                               CACHES={
+                                   'default': LOCMEM_CACHES['default'],
+                                   'restclients': {
+                                       'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                                       'LOCATION': cache_dir,
+                                   }
+                               },
+                               RESTCLIENTS_DJANGO_CACHE_ALIAS='restclients'):
+                self._check_cache()
+        finally:
+            shutil.rmtree(cache_dir)
+
+    def test_ttls(self):
+        with self.settings(CACHES=LOCMEM_CACHES,
+                           RESTCLIENTS_DJANGO_CACHE_TTLS={"sws": 0},
+                           RESTCLIENTS_CACHE_STALE_IF_ERROR={"sws": 600}):
+            get_cache('default').clear()
+            cache = DjangoCache()
+
+            response = MockHTTP()
+            response.status = 200
+            response.data = "ok"
+            cache.processResponse("sws", "/ttl", response)
+            cache.processResponse("pws", "/ttl", response)
+
+            self.assertEquals(cache.getCache("sws", "/ttl", {}), None)
+            self.assertEquals(cache.getCache("pws", "/ttl", {})["response"].data, "ok")
+
+            # Kept around for stale-if-error
+            stale = cache.getStaleCache("sws", "/ttl", {}, 600)
+            self.assertEquals(stale["response"].data, "ok")
@@ -2,6 +2,7 @@ from django.test import TestCase
 from django.conf import settings
 from restclients.dao import PWS_DAO
 from restclients.mock_http import MockHTTP
+from restclients.test.cache import make_response
 from restclients.cache_implementation import ETagCache
 import re
 
@@ -44,3 +45,115 @@ class ETagCacheTest(TestCase):
             # Make sure there's nothing for pws there after the get
             response = cache.getCache('sws', '/same', {})
             self.assertEquals(response, None)
+
+    def test_revalidation_through_dao(self):
+        with self.settings(RESTCLIENTS_PWS_DAO_CLASS='restclients.dao_implementation.pws.ETag',
+                            RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.ETagCache'):
+            pws = PWS_DAO()
+            pws.getURL('/same', {})
+
+            # The 304 is turned into the cached response
+            headers = {"Accept": "text/plain"}
+            response = pws.getURL('/same', headers)
+            self.assertEquals(response.status, 200)
+            self.assertEquals(response.data, "Body Content")
+            self.assertEquals(headers, {"Accept": "text/plain"})
+
+    def test_max_age(self):
+        cache = ETagCache()
+        cache.processResponse('pws', '/fresh', make_response(
+            data="Body Content",
+            headers={"ETag": "A1", "Cache-Control": "public, max-age=600"}))
+
+        headers = {}
+        hit = cache.getCache('pws', '/fresh', headers)
+        self.assertEquals(hit["response"].data, "Body Content")
+        self.assertEquals(headers, {})
+
+        cache.processResponse('pws', '/no-cache', make_response(
+            headers={"ETag": "A2", "Cache-Control": "no-cache, max-age=600"}))
+        headers = {}
+        self.assertEquals(cache.getCache('pws', '/no-cache', headers), None)
+        self.assertEquals(headers["If-None-Match"], "A2")
+
+    def test_max_age_without_value(self):
+        cache = ETagCache()
+        for directive in ["max-age", "s-maxage"]:
+            url = '/%s' % directive
+            cache.processResponse('pws', url, make_response(
+                headers={"ETag": "A1", "Cache-Control": directive}))
+
+            # Kept, but revalidated right away
+            headers = {}
+            self.assertEquals(cache.getCache('pws', url, headers), None)
+            self.assertEquals(headers["If-None-Match"], "A1")
+
+    def test_expires(self):
+        cache = ETagCache()
+        cache.processResponse('pws', '/expires', make_response(headers={
+            "Date": "Tue, 15 Nov 1994 08:12:31 GMT",
+            "Expires": "Tue, 15 Nov 1994 09:12:31 GMT",
+        }))
+        self.assertNotEquals(cache.getCache('pws', '/expires', {}), None)
+
+        cache.processResponse('pws', '/expired', make_response(headers={
+            "Expires": "0",
+            "Last-Modified": "Tue, 15 Nov 1994 08:12:31 GMT",
+        }))
+        headers = {}
+        self.assertEquals(cache.getCache('pws', '/expired', headers), None)
+        self.assertEquals(headers["If-Modified-Since"],
+                          "Tue, 15 Nov 1994 08:12:31 GMT")
+
+    def test_not_cached(self):
+        cache = ETagCache()
+        cache.processResponse('pws', '/no-store', make_response(
+            headers={"ETag": "A1", "Cache-Control": "no-store"}))
+        cache.processResponse('pws', '/private', make_response(
+            headers={"ETag": "A1", "Cache-Control": "private, max-age=60"}))
+        cache.processResponse('pws', '/no-validator', make_response())
+        cache.processResponse('pws', '/error', make_response(
+            500, headers={"ETag": "A1"}))
+
+        for url in ['/no-store', '/private', '/no-validator', '/error']:
+            headers = {}
+            self.assertEquals(cache.getCache('pws', url, headers), None)
+            self.assertEquals(headers, {})
+
+    def test_304_updates_entry(self):
+        cache = ETagCache()
+        cache.processResponse('pws', '/updated', make_response(
+            data="Body Content", headers={"ETag": "A1"}))
+
+        not_modified = make_response(
+            304, headers={"ETag": "A2", "Cache-Control": "max-age=60"})
+        hit = cache.processResponse('pws', '/updated', not_modified)
+        self.assertEquals(hit["response"].data, "Body Content")
+        self.assertEquals(hit["response"].getheader("etag"), "A2")
+
+        # Fresh now, from the 304's max-age
+        self.assertNotEquals(cache.getCache('pws', '/updated', {}), None)
+
+        # Nothing to turn a 304 into
+        self.assertEquals(cache.processResponse('pws', '/missing', not_modified), None)
+
+    def test_replaced_entry(self):
+        cache = ETagCache()
+        for url in ['/outage', '/gone', '/no-store']:
+            cache.processResponse('pws', url,
+                                  make_response(headers={"ETag": "A1"}))
+
+        # An outage keeps the validators for when the service is back
+        self.assertEquals(cache.processResponse('pws', '/outage',
+                                                make_response(503)), None)
+        cache.processResponse('pws', '/gone', make_response(404))
+        cache.processResponse('pws', '/no-store', make_response(
+            headers={"ETag": "A2", "Cache-Control": "no-store"}))
+
+        headers = {}
+        cache.getCache('pws', '/outage', headers)
+        self.assertEquals(headers["If-None-Match"], "A1")
+        for url in ['/gone', '/no-store']:
+            headers = {}
+            self.assertEquals(cache.getCache('pws', url, headers), None)
+            self.assertEquals(headers, {})
@@ -0,0 +1,53 @@
+import pickle
+from base64 import b64encode
+from datetime import datetime
+from django.test import TestCase
+from django.utils.timezone import make_aware, get_current_timezone
+from restclients.models import CacheEntryTimed
+from restclients.util.headers import HeaderDict
+
+
+class CacheHeadersTest(TestCase):
+    def _save(self, url, headers):
+        entry = CacheEntryTimed(service="test", url=url, status=200,
+                                content="", time_saved=make_aware(
+                                    datetime.now(), get_current_timezone()))
+        entry.headers = headers
+        entry.save()
+        return entry
+
+    def test_json_headers(self):
+        self._save("/json", {"Content-Type": "text/plain", "ETag": "A1"})
+
+        entry = CacheEntryTimed.objects.get(url="/json")
+        self.assertEquals(entry.header_pickle[0], "[")
+        self.assertEquals(entry.headers, None)
+
+        headers = entry.getHeaders()
+        self.assertTrue(isinstance(headers, HeaderDict))
+        self.assertEquals(headers["etag"], "A1")
+        self.assertEquals(headers["content-type"], "text/plain")
+
+    def test_pickled_headers(self):
+        entry = self._save("/pickle", {})
+        CacheEntryTimed.objects.filter(url="/pickle").update(
+            header_pickle=b64encode(pickle.dumps({"ETag": "A1"})))
+
+        entry = CacheEntryTimed.objects.get(url="/pickle")
+        self.assertEquals(entry.getHeaders()["etag"], "A1")
+
+        # Saved in the new format
+        entry.save()
+        entry = CacheEntryTimed.objects.get(url="/pickle")
+        self.assertEquals(entry.header_pickle, '[["ETag","A1"]]')
+
+    def test_unread_headers(self):
+        self._save("/unread", {"ETag": "A1"})
+
+        # Saving without reading the headers keeps them
+        entry = CacheEntryTimed.objects.get(url="/unread")
+        entry.status = 404
+        entry.save()
+
+        entry = CacheEntryTimed.objects.get(url="/unread")
+        self.assertEquals(entry.getHeaders(), {"ETag": "A1"})
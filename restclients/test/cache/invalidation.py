@@ -0,0 +1,242 @@
+from django.test import TestCase
+from django.conf import settings
+from restclients.cache_implementation import TimeSimpleCache, \
+    MemoryCache, TwoTierCache, DjangoCache, ETagCache, PolicyCache, \
+    NoCache, cache_stats
+from restclients.dao import GWS_DAO, invalidate_cache
+from restclients.gws import GWS
+from restclients.canvas.admins import Admins
+from restclients.models import CacheEntryTimed, CacheEntryExpires
+from restclients.models.gws import GroupMember
+from restclients.test.cache import make_response
+from restclients.util.request_memo import start_request_memo, \
+    end_request_memo, get_request_memo
+
+
+LOCMEM = {'default': {
+    'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    'LOCATION': 'restclients-invalidation-test'}}
+
+URLS = [("gws", "/group_sws/v2/group/u_a"),
+        ("gws", "/group_sws/v2/group/u_a/member"),
+        ("gws", "/group_sws/v2/group/u_ab"),
+        ("pws", "/group_sws/v2/group/u_a")]
+
+
+class CacheInvalidationTest(TestCase):
+    def setUp(self):
+        cache_stats.reset()
+        MemoryCache.store.clear()
+        TwoTierCache.l1.store.clear()
+
+    def _fill(self, cache):
+        for service, url in URLS:
+            cache.processResponse(service, url, make_response())
+
+    def _cached(self, cache):
+        return [(service, url) for service, url in URLS
+                if cache.getCache(service, url, {}) is not None]
+
+    def _check_invalidation(self, cache):
+        self._fill(cache)
+        cache.invalidateCache("gws", url="/group_sws/v2/group/u_a")
+        self.assertEquals(self._cached(cache), URLS[1:])
+
+        cache.invalidateCache("gws", url_prefix="/group_sws/v2/group/u_a/")
+        self.assertEquals(self._cached(cache), URLS[2:])
+
+        self._fill(cache)
+        cache.invalidateCache("gws")
+        self.assertEquals(self._cached(cache), URLS[3:])
+
+    def test_timed_cache(self):
+        self._check_invalidation(TimeSimpleCache())
+        self.assertEquals(cache_stats.get("invalidated"), 5)
+
+    def test_long_urls(self):
+        cache = TimeSimpleCache()
+        base = "/group_sws/v2/group/%s" % ("u" * 300)
+        for url in [base, base + "/member", base + "x/member"]:
+            cache.processResponse("gws", url, make_response())
+
+        entry = CacheEntryTimed.objects.get(url=base + "/member")
+        self.assertEquals(entry.url_start, (base + "/member")[:255])
+
+        cache.invalidateCache("gws", url_prefix=base + "/")
+        self.assertEquals(sorted(CacheEntryTimed.objects.values_list(
+            "url", flat=True)), [base, base + "x/member"])
+
+    def test_memory_cache(self):
+        self._check_invalidation(MemoryCache())
+
+    def test_two_tier_cache(self):
+        cache = TwoTierCache()
+        self._check_invalidation(cache)
+        self.assertEquals(CacheEntryTimed.objects.filter(
+            service="gws").count(), 0)
+
+    def test_policy_cache(self):
+        with self.settings(CACHES=LOCMEM, RESTCLIENTS_CACHE_POLICY=[
+                {"name": "members", "service": "gws", "url": "/member$",
+                 "ttl": 60, "tier": "memory"},
+                {"name": "everything else", "ttl": 60}]):
+            self._check_invalidation(PolicyCache())
+
+    def test_django_cache(self):
+        with self.settings(CACHES=LOCMEM):
+            cache = DjangoCache()
+            self._check_invalidation(cache)
+            self.assertEquals(cache.getStaleCache(
+                "gws", "/group_sws/v2/group/u_a/member", {}, 60), None)
+            self.assertEquals(cache.getCaches(
+                "gws", [url for service, url in URLS[:2]], {}), {})
+
+            # Entries saved after the invalidation are served again
+            self._fill(cache)
+            self.assertEquals(self._cached(cache), URLS)
+
+            # A prefix that ends mid-segment invalidates the path above it
+            cache.invalidateCache("gws", url_prefix="/group_sws/v2/group/u_a")
+            self.assertEquals(self._cached(cache), URLS[3:])
+
+    def test_etag_cache(self):
+        cache = ETagCache()
+        headers = {"ETag": "abc", "Cache-Control": "max-age=60"}
+        for service, url in URLS:
+            cache.processResponse(service, url,
+                                  make_response(headers=headers))
+
+        cache.invalidateCache("gws", url_prefix="/group_sws/v2/group/u_a")
+        self.assertEquals(list(CacheEntryExpires.objects.values_list(
+            "service", "url")), [URLS[3]])
+
+    def test_vary_headers(self):
+        with self.settings(RESTCLIENTS_CACHE_VARY_HEADERS={
+                "gws": ["X-UW-Act-as"]}):
+            cache = TimeSimpleCache()
+            for url in ["/group_sws/v2/group/u_a",
+                        "/group_sws/v2/group/u_a#x-uw-act-as=bill",
+                        "/group_sws/v2/group/u_ab#x-uw-act-as=bill"]:
+                cache.processResponse("gws", url, make_response())
+
+            cache.invalidateCache("gws", url="/group_sws/v2/group/u_a")
+            self.assertEquals(list(CacheEntryTimed.objects.values_list(
+                "url", flat=True)),
+                ["/group_sws/v2/group/u_ab#x-uw-act-as=bill"])
+
+            with self.settings(CACHES=LOCMEM):
+                cache = DjangoCache()
+                for url in ["/group_sws/v2/group/u_a",
+                            "/group_sws/v2/group/u_a#x-uw-act-as=bill",
+                            "/group_sws/v2/group/u_a/member",
+                            "/group_sws/v2/group/u_ab#x-uw-act-as=bill"]:
+                    cache.processResponse("gws", url, make_response())
+
+                cache.invalidateCache("gws", url="/group_sws/v2/group/u_a")
+                self.assertEquals([url for url in [
+                    "/group_sws/v2/group/u_a",
+                    "/group_sws/v2/group/u_a#x-uw-act-as=bill",
+                    "/group_sws/v2/group/u_a/member",
+                    "/group_sws/v2/group/u_ab#x-uw-act-as=bill"]
+                    if cache.getCache("gws", url, {}) is not None], [
+                    "/group_sws/v2/group/u_a/member",
+                    "/group_sws/v2/group/u_ab#x-uw-act-as=bill"])
+
+    def test_no_cache(self):
+        NoCache().invalidateCache("gws", url="/group_sws/v2/group/u_a")
+
+    def test_dao_normalizes(self):
+        with self.settings(RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CASE_INSENSITIVE_SERVICES=["sws"]):
+            cache = TimeSimpleCache()
+            cache.processResponse("sws", "/student/v5/term/2013,spring.json",
+                                  make_response())
+            cache.processResponse("sws", "/student/v5/course/2013,spring,"
+                                  "t%20a,100/a.json?b=1&a=2",
+                                  make_response())
+
+            invalidate_cache("sws", url="/student/v5/Term/2013,Spring.json")
+            invalidate_cache("sws", url_prefix="/student/v5/course/2013,"
+                             "Spring,T%20A,100/")
+            self.assertEquals(CacheEntryTimed.objects.count(), 0)
+
+    def test_request_memo(self):
+        with self.settings(RESTCLIENTS_GWS_DAO_CLASS='restclients.dao_implementation.gws.File'):
+            start_request_memo()
+            try:
+                dao = GWS_DAO()
+                dao.getURL("/group_sws/v2/group/u_acadev_tester", {})
+                dao.getURL("/group_sws/v2/group/u_acadev_tester/member", {})
+                self.assertEquals(len(get_request_memo()), 2)
+
+                dao.invalidateCache(url_prefix="/group_sws/v2/group/"
+                                    "u_acadev_tester/")
+                self.assertEquals([key[1] for key in get_request_memo()],
+                                  ["/group_sws/v2/group/u_acadev_tester"])
+            finally:
+                end_request_memo()
+
+    def test_gws_writes(self):
+        with self.settings(RESTCLIENTS_GWS_DAO_CLASS='restclients.dao_implementation.gws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+            gws = GWS()
+            group = gws.get_group_by_id("u_acadev_tester")
+            gws.get_members("u_acadev_unittest")
+            gws.get_effective_members("u_acadev_unittest")
+            self.assertEquals(CacheEntryTimed.objects.count(), 3)
+
+            group.title = "ACA Tester"
+            gws.update_group(group)
+            self.assertEquals(sorted(CacheEntryTimed.objects.values_list(
+                "url", flat=True)), [
+                "/group_sws/v2/group/u_acadev_unittest/effective_member",
+                "/group_sws/v2/group/u_acadev_unittest/member"])
+
+            members = gws.get_members("u_acadev_unittest")
+            members.append(GroupMember(member_type="uwnetid", name="seven"))
+            gws.update_members("u_acadev_unittest", members)
+            self.assertEquals(CacheEntryTimed.objects.count(), 0)
+
+            gws.get_group_by_id("u_acadev_tester")
+            gws.delete_group("u_acadev_tester")
+            self.assertEquals(CacheEntryTimed.objects.count(), 0)
+
+    def test_gws_writes_django_cache(self):
+        with self.settings(CACHES=LOCMEM,
+                           RESTCLIENTS_GWS_DAO_CLASS='restclients.dao_implementation.gws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.DjangoCache'):
+            gws = GWS()
+            cache = DjangoCache()
+            group = gws.get_group_by_id("u_acadev_tester")
+            gws.get_members("u_acadev_unittest")
+
+            group.title = "ACA Tester"
+            gws.update_group(group)
+
+            # Only the updated group is dropped
+            self.assertEquals(cache.getCache(
+                "gws", "/group_sws/v2/group/u_acadev_tester", {}), None)
+            self.assertNotEquals(cache.getCache(
+                "gws", "/group_sws/v2/group/u_acadev_unittest/member", {}),
+                None)
+
+    def test_canvas_writes(self):
+        with self.settings(RESTCLIENTS_CANVAS_DAO_CLASS='restclients.dao_implementation.canvas.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+            url = ("/api/v1/accounts/sis_account_id%3Auwcourse%3Aseattle"
+                   "%3Anursing%3Anurs/admins")
+            query = CacheEntryTimed.objects.filter(service="canvas",
+                                                   url__startswith=url)
+            canvas = Admins()
+            canvas.get_admins_by_sis_id("uwcourse:seattle:nursing:nurs")
+            self.assertEquals(query.count(), 1)
+
+            canvas.create_admin_by_sis_id("uwcourse:seattle:nursing:nurs",
+                                          1111, "AccountAdmin")
+            self.assertEquals(query.count(), 0)
+
+            canvas.get_admins_by_sis_id("uwcourse:seattle:nursing:nurs")
+            self.assertEquals(query.count(), 1)
+            canvas.delete_admin_by_sis_id("uwcourse:seattle:nursing:nurs",
+                                          1111, "AccountAdmin")
+            self.assertEquals(query.count(), 0)
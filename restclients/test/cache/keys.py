@@ -0,0 +1,37 @@
+from django.test import TestCase
+from restclients.cache_implementation import TimeSimpleCache
+from restclients.models import CacheEntryTimed, get_cache_key
+from restclients.test.cache import make_response
+
+
+class CacheKeyTest(TestCase):
+    def test_cache_key(self):
+        self.assertEquals(len(get_cache_key("sws", "/student")), 40)
+        self.assertNotEquals(get_cache_key("sws", "/student"),
+                             get_cache_key("pws", "/student"))
+        self.assertEquals(len(get_cache_key("sws", u"/student/\u00e9")), 40)
+
+    def test_long_urls(self):
+        cache = TimeSimpleCache()
+        url = "/api/v1/courses/123/users?%s" % "&".join(
+            ["include[]=enrollments&per_page=100"] * 50)
+        self.assertTrue(len(url) > 1000)
+
+        cache.processResponse("canvas", url, make_response(data="long"))
+        self.assertEquals(cache.getCache("canvas", url, {})["response"].data,
+                          "long")
+        self.assertEquals(cache.getCaches("canvas", [url], {})[url]["response"].data,
+                          "long")
+
+        entry = CacheEntryTimed.objects.get()
+        self.assertEquals(entry.url, url)
+        self.assertEquals(entry.url_key, get_cache_key("canvas", url))
+
+    def test_services(self):
+        cache = TimeSimpleCache()
+        cache.processResponse("sws", "/same", make_response(data="sws"))
+        cache.processResponse("pws", "/same", make_response(data="pws"))
+
+        self.assertEquals(CacheEntryTimed.objects.count(), 2)
+        self.assertEquals(cache.getCache("sws", "/same", {})["response"].data, "sws")
+        self.assertEquals(cache.getCache("pws", "/same", {})["response"].data, "pws")
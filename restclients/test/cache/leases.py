@@ -0,0 +1,124 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import TimeSimpleCache, DjangoCache, \
+    cache_stats
+from restclients.models import CacheEntryTimed, CacheLease
+from restclients.mock_http import MockHTTP
+
+
+class LeaseHolderCache(TimeSimpleCache):
+    """
+    Acts as if another process holds the lease, and saves the response the
+    first time the DAO checks for it.
+    """
+    lookups = 0
+
+    def acquireLease(self, service, url, timeout):
+        return None
+
+    def getCache(self, service, url, headers):
+        LeaseHolderCache.lookups += 1
+        if LeaseHolderCache.lookups == 2:
+            response = MockHTTP()
+            response.status = 200
+            response.data = "from the lease holder"
+            self.processResponse(service, url, response)
+        return super(LeaseHolderCache, self).getCache(service, url, headers)
+
+
+class CacheLeaseTest(TestCase):
+    def setUp(self):
+        cache_stats.reset()
+        LeaseHolderCache.lookups = 0
+
+    def test_timed_cache_leases(self):
+        cache = TimeSimpleCache()
+        lease = cache.acquireLease("sws", "/term", 10)
+        self.assertNotEquals(lease, None)
+        self.assertEquals(cache.acquireLease("sws", "/term", 10), None)
+        self.assertNotEquals(cache.acquireLease("pws", "/term", 10), None)
+
+        cache.releaseLease("sws", "/term", lease)
+        lease = cache.acquireLease("sws", "/term", 10)
+        self.assertNotEquals(lease, None)
+
+        # An expired lease can be taken over, and its old owner can't
+        # release the new one
+        entry = CacheLease.objects.get(owner=lease)
+        entry.expires = entry.expires - timedelta(seconds=20)
+        entry.save()
+        new_lease = cache.acquireLease("sws", "/term", 10)
+        self.assertNotEquals(new_lease, None)
+        cache.releaseLease("sws", "/term", lease)
+        self.assertEquals(cache.acquireLease("sws", "/term", 10), None)
+
+    def test_django_cache_leases(self):
+        with self.settings(CACHES={'default': {
+                'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+                'LOCATION': 'restclients-lease-test'}}):
+            cache = DjangoCache()
+            lease = cache.acquireLease("sws", "/term", 10)
+            self.assertNotEquals(lease, None)
+            self.assertEquals(cache.acquireLease("sws", "/term", 10), None)
+            cache.releaseLease("sws", "/term", "someone else")
+            self.assertEquals(cache.acquireLease("sws", "/term", 10), None)
+            cache.releaseLease("sws", "/term", lease)
+            self.assertNotEquals(cache.acquireLease("sws", "/term", 10), None)
+
+    def test_lease_holder_fetches(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_LEASE_TIMEOUT=10):
+            url = "/student/v5/term/2013,spring.json"
+            response = SWS_DAO().getURL(url, {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(cache_stats.get("lease_acquired"), 1)
+
+            # Released once the response is saved
+            self.assertEquals(CacheLease.objects.count(), 0)
+
+    def test_stale_while_leased(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.errors.Always500',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_LEASE_TIMEOUT=10,
+                           RESTCLIENTS_CACHE_LEASE_MAX_STALENESS=60 * 60):
+            cache = TimeSimpleCache()
+            response = MockHTTP()
+            response.status = 200
+            response.data = "old data"
+            cache.processResponse("sws", "/expired", response)
+
+            entry = CacheEntryTimed.objects.get()
+            entry.time_saved = entry.time_saved - timedelta(minutes=5)
+            entry.save()
+
+            cache.acquireLease("sws", "/expired", 10)
+            response = SWS_DAO().getURL("/expired", {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(response.data, "old data")
+            self.assertTrue(response.is_stale)
+            self.assertEquals(cache_stats.get("lease_stale"), 1)
+
+    def test_wait_for_lease(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.errors.Always500',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.test.cache.leases.LeaseHolderCache',
+                           RESTCLIENTS_CACHE_LEASE_TIMEOUT=10,
+                           RESTCLIENTS_CACHE_LEASE_WAIT=2):
+            response = SWS_DAO().getURL("/waiting", {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(response.data, "from the lease holder")
+            self.assertEquals(cache_stats.get("lease_waited"), 1)
+
+    def test_wait_timeout(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.errors.Always500',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_LEASE_TIMEOUT=10,
+                           RESTCLIENTS_CACHE_LEASE_WAIT=0.2):
+            TimeSimpleCache().acquireLease("sws", "/timeout", 10)
+
+            # Gives up waiting, and makes the request itself
+            response = SWS_DAO().getURL("/timeout", {})
+            self.assertEquals(response.status, 500)
+            self.assertEquals(cache_stats.get("lease_timeout"), 1)
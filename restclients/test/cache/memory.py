@@ -0,0 +1,90 @@
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import MemoryCache
+from restclients.test.cache import make_response
+
+
+class MemoryCacheTest(TestCase):
+    def setUp(self):
+        MemoryCache.store.clear()
+        MemoryCache.store.stats.reset()
+
+    def _age_entry(self, key, seconds):
+        status, headers, data, time_saved = MemoryCache.store.peek(key)
+        MemoryCache.store.put(key, (status, headers, data, time_saved - seconds), 10)
+
+    def test_memory_cache(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.MemoryCache'):
+
+            cache = MemoryCache()
+            self.assertEquals(cache.getCache('sws', '/student', {}), None)
+
+            response = SWS_DAO().getURL('/student', {})
+            hit = cache.getCache('sws', '/student', {})
+            self.assertEquals(hit["response"].status, 200)
+            self.assertEquals(hit["response"].data, response.data)
+
+            self.assertEquals(cache.getCache('pws', '/student', {}), None)
+
+            stats = cache.get_stats()
+            self.assertEquals(stats["hit"], 1)
+            self.assertEquals(stats["miss"], 3)
+            self.assertEquals(stats["entries"], 1)
+
+    def test_ttls(self):
+        with self.settings(RESTCLIENTS_MEMORY_CACHE_TTL=60,
+                           RESTCLIENTS_MEMORY_CACHE_TTLS={"pws": 600}):
+            cache = MemoryCache()
+            cache.processResponse("sws", "/old", make_response(200, "sws"))
+            cache.processResponse("pws", "/old", make_response(200, "pws"))
+            self._age_entry(("sws", "/old"), 120)
+            self._age_entry(("pws", "/old"), 120)
+
+            self.assertEquals(cache.getCache("sws", "/old", {}), None)
+            self.assertEquals(cache.getCache("pws", "/old", {})["response"].data, "pws")
+            self.assertEquals(cache.get_stats()["expired"], 1)
+
+            # Expired entries can still be served when the service fails
+            stale = cache.getStaleCache("sws", "/old", {}, 300)
+            self.assertEquals(stale["response"].data, "sws")
+            self.assertEquals(cache.getStaleCache("sws", "/old", {}, 60), None)
+
+    def test_eviction(self):
+        with self.settings(RESTCLIENTS_MEMORY_CACHE_MAX_BYTES=3000):
+            cache = MemoryCache()
+            cache.processResponse("sws", "/1", make_response(200, "1" * 1000))
+            cache.processResponse("sws", "/2", make_response(200, "2" * 1000))
+
+            # Makes /2 the least recently used
+            cache.getCache("sws", "/1", {})
+            cache.processResponse("sws", "/3", make_response(200, "3" * 1000))
+
+            self.assertNotEquals(cache.getCache("sws", "/1", {}), None)
+            self.assertEquals(cache.getCache("sws", "/2", {}), None)
+            self.assertNotEquals(cache.getCache("sws", "/3", {}), None)
+
+            stats = cache.get_stats()
+            self.assertEquals(stats["eviction"], 1)
+            self.assertTrue(stats["bytes"] <= 3000)
+
+            # Too big to hold at all
+            cache.processResponse("sws", "/4", make_response(200, "4" * 4000))
+            self.assertEquals(cache.getCache("sws", "/4", {}), None)
+
+    def test_errors(self):
+        cache = MemoryCache()
+        cache.processResponse("sws", "/ok", make_response(200, "ok"))
+
+        hit = cache.processResponse("sws", "/ok", make_response(500, "bad"))
+        self.assertEquals(hit["response"].data, "ok")
+        self.assertEquals(cache.getCache("sws", "/ok", {})["response"].data, "ok")
+
+        cache.processResponse("sws", "/bad", make_response(500, "bad"))
+        self.assertEquals(cache.getCache("sws", "/bad", {})["response"].status, 500)
+
+        # Responses are copies, so callers can't change the cached headers
+        response = cache.getCache("sws", "/ok", {})["response"]
+        response.headers["X-Changed"] = "yes"
+        self.assertEquals(cache.getCache("sws", "/ok", {})["response"].getheader("X-Changed"), "")
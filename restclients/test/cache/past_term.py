@@ -0,0 +1,60 @@
+from datetime import timedelta
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import PastTermCache
+from restclients.models import CacheEntryTimed
+from restclients.test.cache import make_response
+
+
+class PastTermCacheTest(TestCase):
+    def _age_entries(self, **kwargs):
+        for entry in CacheEntryTimed.objects.all():
+            entry.time_saved = entry.time_saved - timedelta(**kwargs)
+            entry.save()
+
+    def test_past_term(self):
+        cache = PastTermCache()
+        past_url = "/student/v5/term/2013,spring.json"
+        future_url = "/student/v5/term/2099,spring.json"
+        cache.processResponse("sws", past_url, make_response(200, "past"))
+        cache.processResponse("sws", future_url, make_response(200, "future"))
+        cache.processResponse("pws", past_url, make_response(200, "pws"))
+        self._age_entries(days=365)
+
+        self.assertEquals(cache.getCache("sws", past_url, {})["response"].data, "past")
+        self.assertEquals(cache.getCache("sws", future_url, {}), None)
+        self.assertEquals(cache.getCache("pws", past_url, {}), None)
+
+        hits = cache.getCaches("sws", [past_url, future_url], {})
+        self.assertEquals(list(hits.keys()), [past_url])
+
+        # A good past term response isn't replaced by an error
+        cached = cache.processResponse("sws", past_url, make_response(500, ""))
+        self.assertEquals(cached["response"].data, "past")
+
+    def test_default_ttl(self):
+        with self.settings(RESTCLIENTS_PAST_TERM_CACHE_DEFAULT_TTL=60):
+            cache = PastTermCache()
+            cache.processResponse("sws", "/student/v5/term/current.json",
+                                  make_response(200, "current"))
+            self.assertNotEquals(cache.getCache("sws", "/student/v5/term/current.json", {}), None)
+
+            self._age_entries(minutes=2)
+            self.assertEquals(cache.getCache("sws", "/student/v5/term/current.json", {}), None)
+
+    def test_past_terms_from_cache(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.PastTermCache'):
+            urls = ["/student/v5/term/2012,summer.json",
+                    "/student/v5/term/2012,autumn.json",
+                    "/student/v5/term/2013,winter.json",
+                    "/student/v5/term/2013,spring.json"]
+            responses = SWS_DAO().getURLs(urls, {})
+            self._age_entries(days=30)
+
+            # All 4 come from a single cache query
+            with self.assertNumQueries(1):
+                cached = SWS_DAO().getURLs(urls, {})
+            for response, cached_response in zip(responses, cached):
+                self.assertEquals(response.data, cached_response.data)
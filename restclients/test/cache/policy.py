@@ -0,0 +1,116 @@
+from django.test import TestCase
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import PolicyCache, MemoryCache
+from restclients.cache_policy import get_cache_policy, get_matching_rule, \
+    policy_stats
+from restclients.models import CacheEntryTimed
+from restclients.test.cache import make_response
+
+
+POLICY = [
+    {"name": "terms", "service": "sws", "url": r"^/student/v5/term/",
+     "ttl": 60 * 60 * 24},
+    {"name": "people", "service": "pws", "ttl": 60 * 60, "tier": "memory"},
+    {"name": "enrollments", "service": "sws", "url": r"/enrollment",
+     "tier": "none", "ttl": 60},
+    {"name": "groups", "service": "gws", "ttl": 60 * 15, "error_ttl": 0},
+    {"name": "sws", "service": "sws", "ttl": 60},
+]
+
+
+class CachePolicyTest(TestCase):
+    def setUp(self):
+        MemoryCache.store.clear()
+        policy_stats.reset()
+
+    def test_matching(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=POLICY):
+            policy = get_cache_policy()
+            self.assertEquals(
+                policy.match("sws", "/student/v5/term/2013,spring.json").name,
+                "terms")
+            self.assertEquals(
+                policy.match("sws", "/student/v5/enrollment.json").name,
+                "enrollments")
+            self.assertEquals(policy.match("sws", "/student/v5/course").name,
+                              "sws")
+            self.assertEquals(policy.match("pws", "/identity/v1/").name,
+                              "people")
+            self.assertEquals(policy.match("hfs", "/"), None)
+
+            rule = policy.match("sws", "/student/v5/enrollment.json")
+            self.assertFalse(rule.is_cached())
+            self.assertEquals(policy.match("sws", "/student").error_ttl, 60)
+            self.assertEquals(policy.match("gws", "/group").error_ttl, 0)
+
+    def test_settings_override(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=POLICY):
+            self.assertEquals(get_cache_policy().match("hfs", "/"), None)
+
+        with self.settings(RESTCLIENTS_CACHE_POLICY=[{"ttl": 30}]):
+            self.assertEquals(get_cache_policy().match("hfs", "/").ttl, 30)
+
+    def test_invalid_tier(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=[{"tier": "disk"}]):
+            self.assertRaises(ImproperlyConfigured, get_cache_policy)
+
+    def test_stats(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=POLICY):
+            get_matching_rule("sws", "/student/v5/term/current.json")
+            get_matching_rule("sws", "/student/v5/term/next.json")
+            get_matching_rule("hfs", "/")
+
+            stats = policy_stats.get_stats()
+            self.assertEquals(stats["terms"], 2)
+            self.assertEquals(stats["no match"], 1)
+
+    def test_tiers(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=POLICY):
+            cache = PolicyCache()
+            cache.processResponse("sws", "/student/v5/term/current.json",
+                                  make_response(200, "term"))
+            cache.processResponse("pws", "/identity/v1/person",
+                                  make_response(200, "person"))
+            cache.processResponse("sws", "/student/v5/enrollment.json",
+                                  make_response(200, "enrollment"))
+            cache.processResponse("hfs", "/", make_response(200, "hfs"))
+
+            self.assertEquals(CacheEntryTimed.objects.count(), 1)
+            self.assertEquals(len(MemoryCache.store.keys()), 1)
+
+            with self.assertNumQueries(0):
+                hit = cache.getCache("pws", "/identity/v1/person", {})
+                self.assertEquals(hit["response"].data, "person")
+                self.assertEquals(cache.getCache(
+                    "sws", "/student/v5/enrollment.json", {}), None)
+                self.assertEquals(cache.getCache("hfs", "/", {}), None)
+
+            hit = cache.getCache("sws", "/student/v5/term/current.json", {})
+            self.assertEquals(hit["response"].data, "term")
+
+            hits = cache.getCaches("sws", ["/student/v5/term/current.json",
+                                           "/student/v5/enrollment.json",
+                                           "/student/v5/course"], {})
+            self.assertEquals(list(hits.keys()),
+                              ["/student/v5/term/current.json"])
+
+    def test_error_ttl(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=POLICY):
+            cache = PolicyCache()
+            cache.processResponse("gws", "/group", make_response(500, ""))
+            cache.processResponse("sws", "/student", make_response(500, ""))
+
+            self.assertEquals(cache.getCache("gws", "/group", {}), None)
+            self.assertEquals(
+                cache.getCache("sws", "/student", {})["response"].status, 500)
+
+    def test_dao(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.PolicyCache',
+                           RESTCLIENTS_CACHE_POLICY=POLICY):
+            url = "/student/v5/term/2013,spring.json"
+            response = SWS_DAO().getURL(url, {})
+            hit = PolicyCache().getCache("sws", url, {})
+            self.assertEquals(hit["response"].data, response.data)
@@ -0,0 +1,66 @@
+from django.test import TestCase
+from django.conf import settings
+from datetime import timedelta
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import FourHourCache, cache_stats
+from restclients.models import CacheEntryTimed
+from restclients.mock_http import MockHTTP
+
+
+class StaleIfErrorTest(TestCase):
+    def _save_entry(self, url, hours_ago):
+        response = MockHTTP()
+        response.status = 200
+        response.data = "good data"
+        FourHourCache().processResponse("sws", url, response)
+
+        entry = CacheEntryTimed.objects.get(service="sws", url=url)
+        entry.time_saved = entry.time_saved - timedelta(hours=hours_ago)
+        entry.save()
+
+    def test_server_error(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.errors.Always500',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.FourHourCache',
+                           RESTCLIENTS_CACHE_STALE_IF_ERROR={"sws": 60 * 60 * 24}):
+            cache_stats.reset()
+            self._save_entry("/stale/url", 10)
+
+            response = SWS_DAO().getURL("/stale/url", {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(response.data, "good data")
+            self.assertTrue(response.is_stale)
+            self.assertTrue("Stale" in response.getheader("Warning"))
+            self.assertEquals(cache_stats.get("stale_if_error"), 1)
+
+            # The error didn't replace the good entry
+            entry = CacheEntryTimed.objects.get(service="sws", url="/stale/url")
+            self.assertEquals(entry.status, 200)
+
+            responses = SWS_DAO().getURLs(["/stale/url"], {})
+            self.assertTrue(responses[0].is_stale)
+
+            # Too old to serve
+            self._save_entry("/too/old", 25)
+            response = SWS_DAO().getURL("/too/old", {})
+            self.assertEquals(response.status, 500)
+            self.assertFalse(response.is_stale)
+
+    def test_not_configured(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.errors.Always500',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.FourHourCache',
+                           RESTCLIENTS_CACHE_STALE_IF_ERROR={"pws": 60 * 60 * 24}):
+            self._save_entry("/stale/url", 10)
+            response = SWS_DAO().getURL("/stale/url", {})
+            self.assertEquals(response.status, 500)
+
+    def test_exception(self):
+        url = "/student/v5/course/2012,summer,PHYS,121/AQ.json"
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.TestBadResponse',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.FourHourCache',
+                           RESTCLIENTS_CACHE_STALE_IF_ERROR={"sws": 60 * 60 * 24}):
+            self.assertRaises(Exception, SWS_DAO().getURL, url, {})
+
+            self._save_entry(url, 5)
+            response = SWS_DAO().getURL(url, {})
+            self.assertEquals(response.status, 200)
+            self.assertTrue(response.is_stale)
@@ -0,0 +1,122 @@
+from django.test import TestCase
+from django.conf import settings
+from datetime import timedelta
+from restclients.dao import SWS_DAO, _revalidating
+from restclients.cache_implementation import TimeSimpleCache, cache_stats
+from restclients.models import CacheEntryTimed
+from restclients.mock_http import MockHTTP
+
+
+class StaleWhileRevalidateTest(TestCase):
+    def _age_entry(self, url, seconds):
+        entry = CacheEntryTimed.objects.get(service="sws", url=url)
+        entry.time_saved = entry.time_saved - timedelta(seconds=seconds)
+        entry.save()
+        return entry
+
+    def test_stale_hit(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_STALE_WHILE_REVALIDATE=300):
+            cache_stats.reset()
+            url = '/student/v5/term/2013,spring.json'
+
+            SWS_DAO().getURL(url, {})
+            self.assertEquals(cache_stats.get("miss"), 1)
+
+            cache = TimeSimpleCache()
+            self.assertFalse("stale" in cache.getCache("sws", url, {}))
+            self.assertEquals(cache_stats.get("hit"), 1)
+
+            stale_time = self._age_entry(url, 120).time_saved
+            hit = cache.getCache("sws", url, {})
+            self.assertTrue(hit["stale"])
+            self.assertEquals(hit["response"].status, 200)
+            self.assertEquals(cache_stats.get("stale_hit"), 1)
+
+            # The stale response is served, and the entry is refreshed
+            response = SWS_DAO().getURL(url, {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(cache_stats.get("refresh"), 1)
+
+            entry = CacheEntryTimed.objects.get(service="sws", url=url)
+            self.assertTrue(entry.time_saved > stale_time)
+
+            # Past the grace window it's a miss
+            self._age_entry(url, 400)
+            self.assertEquals(cache.getCache("sws", url, {}), None)
+
+    def test_bulk_stale_hits(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_STALE_WHILE_REVALIDATE=300):
+            cache_stats.reset()
+            stale_url = '/student/v5/term/2013,spring.json'
+            fresh_url = '/student/v5/term/2013,summer.json'
+            urls = [stale_url, fresh_url]
+
+            SWS_DAO().getURLs(urls, {})
+            stale_time = self._age_entry(stale_url, 120).time_saved
+
+            cache = TimeSimpleCache()
+            hits = cache.getCaches("sws", urls, {})
+            self.assertTrue(hits[stale_url]["stale"])
+            self.assertFalse("stale" in hits[fresh_url])
+            self.assertEquals(cache_stats.get("stale_hit"), 1)
+
+            # Served from the cache, and the stale entry is refreshed
+            responses = SWS_DAO().getURLs(urls, {})
+            self.assertEquals([r.status for r in responses], [200, 200])
+            self.assertEquals(cache_stats.get("refresh"), 1)
+
+            entry = CacheEntryTimed.objects.get(service="sws", url=stale_url)
+            self.assertTrue(entry.time_saved > stale_time)
+
+            # Past the grace window it's a miss
+            self._age_entry(stale_url, 400)
+            self.assertEquals(cache.getCaches("sws", urls, {}).keys(),
+                              [fresh_url])
+
+    def test_one_refresh_per_key(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_STALE_WHILE_REVALIDATE=300):
+            cache_stats.reset()
+            url = '/student/v5/term/2013,summer.json'
+
+            SWS_DAO().getURL(url, {})
+            self._age_entry(url, 120)
+
+            _revalidating.add(("sws", url))
+            try:
+                SWS_DAO().getURL(url, {})
+            finally:
+                _revalidating.discard(("sws", url))
+
+            self.assertEquals(cache_stats.get("refresh_skipped"), 1)
+            self.assertEquals(cache_stats.get("refresh"), 0)
+
+    def test_errors_not_stale(self):
+        with self.settings(RESTCLIENTS_CACHE_STALE_WHILE_REVALIDATE=300):
+            cache = TimeSimpleCache()
+
+            response = MockHTTP()
+            response.status = 500
+            response.data = "Error"
+            cache.processResponse("sws", "/error", response)
+
+            self._age_entry("/error", 120)
+            self.assertEquals(cache.getCache("sws", "/error", {}), None)
+
+    def test_disabled(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File'):
+            cache = TimeSimpleCache()
+            url = '/student/v5/term/2013,autumn.json'
+
+            response = MockHTTP()
+            response.status = 200
+            response.data = "ok"
+            cache.processResponse("sws", url, response)
+
+            self._age_entry(url, 120)
+            self.assertEquals(cache.getCache("sws", url, {}), None)
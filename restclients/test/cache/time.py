@@ -210,3 +210,41 @@ class TimeCacheTest(TestCase):
 
             response = sws.getURL("/valid/url", {})
             self.assertEquals(response.status, 500)
+
+    def test_single_query_reads(self):
+        cache = TimeSimpleCache()
+        response = MockHTTP()
+        response.status = 200
+        response.data = "content"
+        response.headers = {"ETag": "A1"}
+        cache.processResponse("sws", "/single", response)
+
+        with self.assertNumQueries(1):
+            hit = cache.getCache("sws", "/single", {})
+            self.assertEquals(hit["response"].data, "content")
+            self.assertEquals(hit["response"].getheader("etag"), "A1")
+
+        # Replacing an entry doesn't load its old content
+        response.data = "updated"
+        cache.processResponse("sws", "/single", response)
+        self.assertEquals(CacheEntryTimed.objects.count(), 1)
+        self.assertEquals(cache.getCache("sws", "/single", {})["response"].data,
+                          "updated")
+
+    def test_upsert(self):
+        cache = TimeSimpleCache()
+        response = MockHTTP()
+        response.status = 200
+        response.data = "first"
+        cache.processResponse("sws", "/upsert", response)
+
+        # As if another process saved the url after our lookup
+        response.data = "second"
+        cache_entry = CacheEntryTimed()
+        cache._update_cache_entry(cache_entry, "sws", "/upsert", response,
+                                  CacheEntryTimed.objects.get().time_saved,
+                                  0)
+        cache._save_cache_entry(cache_entry)
+
+        self.assertEquals(CacheEntryTimed.objects.count(), 1)
+        self.assertEquals(CacheEntryTimed.objects.get().content, "second")
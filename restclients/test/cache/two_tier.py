@@ -0,0 +1,80 @@
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.cache_implementation import TwoTierCache, TwoTierMemoryCache
+from restclients.cache_implementation import MemoryCache
+from restclients.models import CacheEntryTimed
+from restclients.mock_http import MockHTTP
+
+
+class TwoTierCacheTest(TestCase):
+    def setUp(self):
+        TwoTierMemoryCache.store.clear()
+        TwoTierMemoryCache.store.stats.reset()
+
+    def test_tiers(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TwoTierCache'):
+            url = '/student/v5/term/2013,spring.json'
+            cache = TwoTierCache()
+
+            response = SWS_DAO().getURL(url, {})
+            self.assertEquals(CacheEntryTimed.objects.filter(service="sws", url=url).count(), 1)
+
+            # Memory hits don't touch the database
+            with self.assertNumQueries(0):
+                hit = cache.getCache("sws", url, {})
+            self.assertEquals(hit["response"].data, response.data)
+
+            # Database hits are promoted to memory
+            TwoTierMemoryCache.store.clear()
+            with self.assertNumQueries(1):
+                hit = cache.getCache("sws", url, {})
+            self.assertEquals(hit["response"].data, response.data)
+
+            with self.assertNumQueries(0):
+                cache.getCache("sws", url, {})
+
+            # The memory tier is separate from MemoryCache's
+            self.assertEquals(MemoryCache().getCache("sws", url, {}), None)
+
+    def test_bulk(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TwoTierCache'):
+            urls = ['/student/v5/term/2013,spring.json',
+                    '/student/v5/term/2013,summer.json']
+
+            SWS_DAO().getURLs(urls, {})
+            TwoTierMemoryCache.store.delete(("sws", urls[1]))
+
+            with self.assertNumQueries(1):
+                responses = SWS_DAO().getURLs(urls, {})
+
+            self.assertTrue('summer' in responses[1].data)
+            with self.assertNumQueries(0):
+                SWS_DAO().getURLs(urls, {})
+
+    def test_l1_ttl(self):
+        with self.settings(RESTCLIENTS_TWO_TIER_CACHE_L1_TTL=0):
+            cache = TwoTierCache()
+            response = MockHTTP()
+            response.status = 200
+            response.data = "ok"
+            cache.processResponse("sws", "/ttl", response)
+
+            # Nothing is fresh in memory, so every read goes to the database
+            with self.assertNumQueries(1):
+                hit = cache.getCache("sws", "/ttl", {})
+            self.assertEquals(hit["response"].data, "ok")
+
+    def test_l2_entry_size(self):
+        with self.settings(RESTCLIENTS_TWO_TIER_CACHE_L2_MAX_ENTRY_BYTES=10):
+            cache = TwoTierCache()
+            response = MockHTTP()
+            response.status = 200
+            response.data = "x" * 100
+            cache.processResponse("sws", "/big", response)
+
+            self.assertEquals(CacheEntryTimed.objects.filter(url="/big").count(), 0)
+            self.assertEquals(cache.getCache("sws", "/big", {})["response"].data, "x" * 100)
+            self.assertEquals(cache.get_stats()["l1"]["entries"], 1)
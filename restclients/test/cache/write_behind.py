@@ -0,0 +1,112 @@
+import threading
+from datetime import datetime
+from django.test import TestCase
+from django.conf import settings
+from django.utils.timezone import make_aware, get_current_timezone
+from restclients.models import CacheEntryTimed
+from restclients.cache_manager import CacheWriter, writer_stats, \
+    save_cache_entries, store_cache_entry, get_cache_writer, \
+    enable_cache_entry_queueing, disable_cache_entry_queueing
+
+
+class WriteBehindTest(TestCase):
+    def setUp(self):
+        writer_stats.reset()
+
+    def _entry(self, url, content):
+        return CacheEntryTimed(service="test", url=url, status=200,
+                               content=content, time_saved=make_aware(
+                                   datetime.now(), get_current_timezone()))
+
+    def test_save_cache_entries(self):
+        self._entry("/existing", "old").save()
+
+        saved = save_cache_entries([self._entry("/new", "first"),
+                                    self._entry("/existing", "new"),
+                                    self._entry("/new", "second")])
+        self.assertEquals(saved, 2)
+        self.assertEquals(writer_stats.get("coalesced"), 1)
+
+        self.assertEquals(CacheEntryTimed.objects.count(), 2)
+        self.assertEquals(CacheEntryTimed.objects.get(url="/new").content,
+                          "second")
+        self.assertEquals(CacheEntryTimed.objects.get(url="/existing").content,
+                          "new")
+        self.assertEquals(save_cache_entries([]), 0)
+
+    def test_queueing(self):
+        enable_cache_entry_queueing()
+        try:
+            store_cache_entry(self._entry("/queued", "1"))
+            store_cache_entry(self._entry("/queued", "2"))
+            self.assertEquals(CacheEntryTimed.objects.count(), 0)
+        finally:
+            disable_cache_entry_queueing()
+
+        self.assertEquals(CacheEntryTimed.objects.get(url="/queued").content,
+                          "2")
+
+        # Back to saving right away
+        store_cache_entry(self._entry("/direct", "1"))
+        self.assertEquals(CacheEntryTimed.objects.count(), 2)
+
+    def test_writer(self):
+        writer = CacheWriter(max_queue_size=3, batch_size=2)
+        for index in range(4):
+            writer.enqueue(self._entry("/%s" % index, "content"))
+
+        self.assertEquals(writer_stats.get("queued"), 3)
+        self.assertEquals(writer_stats.get("dropped"), 1)
+        self.assertEquals(CacheEntryTimed.objects.count(), 0)
+
+        self.assertTrue(writer.flush(1))
+        self.assertEquals(CacheEntryTimed.objects.count(), 3)
+        self.assertEquals(writer_stats.get("written"), 3)
+        self.assertEquals(writer_stats.get("flush"), 2)
+
+    def test_no_writer_without_threads(self):
+        with self.settings(RESTCLIENTS_CACHE_WRITE_BEHIND=True):
+            self.assertEquals(get_cache_writer(), None)
+
+    def test_writer_thread(self):
+        writer = RecordingWriter(batch_size=2, flush_interval=0.1)
+        writer.start()
+        for index in range(5):
+            writer.enqueue(self._entry("/%s" % index, "content"))
+
+        self.assertTrue(writer.flush(5))
+        self.assertTrue(writer.queue.empty())
+        self.assertEquals(writer.saved, ["/0", "/1", "/2", "/3", "/4"])
+        self.assertEquals(writer.threads, set([writer]))
+
+        writer.enqueue(self._entry("/last", "content"))
+        self.assertTrue(writer.stop(5))
+        self.assertFalse(writer.is_alive())
+        self.assertEquals(writer.saved[-1], "/last")
+
+    def test_settings_change_stops_writer(self):
+        with self.settings(RESTCLIENTS_CACHE_WRITE_BEHIND=True,
+                           RESTCLIENTS_USE_THREADING=True):
+            writer = get_cache_writer()
+            self.assertTrue(writer.is_alive())
+            self.assertTrue(get_cache_writer() is writer)
+
+        self.assertFalse(writer.is_alive())
+        self.assertEquals(get_cache_writer(), None)
+
+
+class RecordingWriter(CacheWriter):
+    """
+    Keeps the urls it's given to save, and the threads that saved them -
+    the test database can't be written from the writer thread.
+    """
+    def __init__(self, *args, **kwargs):
+        super(RecordingWriter, self).__init__(*args, **kwargs)
+        self.saved = []
+        self.threads = set()
+
+    def _write(self, entries, flushes):
+        self.saved.extend(entry.url for entry in entries)
+        self.threads.add(threading.current_thread())
+        for flush in flushes:
+            flush.event.set()
@@ -0,0 +1,217 @@
+from datetime import datetime, timedelta
+from StringIO import StringIO
+from django.test import TestCase
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.utils.timezone import make_aware, get_current_timezone
+from restclients.cache_implementation import TimeSimpleCache, \
+    FourHourCache, PastTermCache, PolicyCache, ETagCache, NoCache
+from restclients.cache_purge import purge_cache
+from restclients.dao import SWS_DAO
+from restclients.models import CacheEntry, CacheEntryTimed, \
+    CacheEntryExpires, CacheLease, get_cache_key
+from restclients.mock_http import MockHTTP
+
+
+HOURS = 60 * 60
+
+
+class CachePurgeTest(TestCase):
+    def _save(self, cache, service, url, age, status=200):
+        response = MockHTTP()
+        response.status = status
+        response.data = "content for %s" % url
+        cache.processResponse(service, url, response)
+
+        entry = CacheEntryTimed.objects.get(
+            url_key=get_cache_key(service, url))
+        entry.time_saved = entry.time_saved - timedelta(seconds=age)
+        entry.save()
+
+    def _urls(self):
+        return sorted(CacheEntryTimed.objects.values_list("url", flat=True))
+
+    def test_purge_expired(self):
+        cache = TimeSimpleCache()
+        self._save(cache, "sws", "/old/1", 9 * HOURS)
+        self._save(cache, "sws", "/old/2", 9 * HOURS)
+        self._save(cache, "pws", "/old/3", 60 * 5, status=404)
+        self._save(cache, "sws", "/new", 30)
+
+        # Small batches, to page through the rows
+        # /new is younger than any retention, so isn't read
+        stats = purge_cache(cache, batch_size=2, pause=0, min_age=0)
+        self.assertEquals(stats["scanned"], 3)
+        self.assertEquals(stats["deleted"], 3)
+        self.assertTrue(stats["bytes"] > len("content for /old/1") * 3)
+        self.assertEquals(self._urls(), ["/new"])
+        self.assertEquals(CacheEntry.objects.count(), 1)
+
+        stats = purge_cache(cache, pause=0, min_age=0)
+        self.assertEquals(stats["deleted"], 0)
+
+    def test_unexpired_not_read(self):
+        cache = TimeSimpleCache()
+        self._save(cache, "sws", "/success", 2 * HOURS)
+        self._save(cache, "sws", "/error", 2 * HOURS, status=404)
+        self._save(cache, "pws", "/success", 9 * HOURS)
+
+        stats = purge_cache(cache, pause=0, min_age=0)
+        self.assertEquals(stats["scanned"], 2)
+        self.assertEquals(stats["deleted"], 2)
+        self.assertEquals(self._urls(), ["/success"])
+
+        # Past term entries older than the TTL are still read, and kept
+        cache = PastTermCache()
+        self._save(cache, "sws", "/student/v5/term/2013,spring.json",
+                   60 * 60 * 24 * 365)
+        self._save(cache, "sws", "/student/v5/term/2099,spring.json",
+                   HOURS)
+        stats = purge_cache(cache, pause=0)
+        self.assertEquals(stats["scanned"], 1)
+        self.assertEquals(stats["deleted"], 0)
+
+    def test_expired_etags(self):
+        cache = ETagCache()
+        for url in ["/old", "/recent", "/current"]:
+            response = MockHTTP()
+            response.status = 200
+            response.data = "content for %s" % url
+            response.headers = {"ETag": "abc"}
+            cache.processResponse("sws", url, response)
+
+        now = make_aware(datetime.now(), get_current_timezone())
+        CacheEntryExpires.objects.filter(url="/old").update(
+            time_expires=now - timedelta(days=8))
+        CacheEntryExpires.objects.filter(url="/recent").update(
+            time_expires=now - timedelta(days=1))
+
+        # The timed entries of another cache are all unused
+        self._save(TimeSimpleCache(), "sws", "/timed", HOURS)
+
+        stats = purge_cache(cache, pause=0)
+        self.assertEquals(stats["deleted"], 2)
+        self.assertEquals(stats["etags"], 1)
+        self.assertEquals(sorted(CacheEntry.objects.values_list(
+            "url", flat=True)), ["/current", "/recent"])
+
+        with self.settings(RESTCLIENTS_CACHE_PURGE_ETAG_AGE=HOURS):
+            stats = purge_cache(cache, pause=0)
+            self.assertEquals(stats["etags"], 1)
+            self.assertEquals(list(CacheEntry.objects.values_list(
+                "url", flat=True)), ["/current"])
+
+        # max_age applies to ETag entries' expiry.  /current had no
+        # max-age, so it expired when it was saved.
+        stats = purge_cache(cache, max_age=0, pause=0)
+        self.assertEquals(stats["etags"], 1)
+        self.assertEquals(CacheEntry.objects.count(), 0)
+
+    def test_min_age(self):
+        cache = TimeSimpleCache()
+        self._save(cache, "sws", "/old", 60 * 5)
+        stats = purge_cache(cache, pause=0, min_age=60 * 10)
+        self.assertEquals(stats["scanned"], 0)
+        self.assertEquals(self._urls(), ["/old"])
+
+    def test_stale_retention(self):
+        cache = TimeSimpleCache()
+        self._save(cache, "sws", "/sws", 9 * HOURS)
+        self._save(cache, "pws", "/pws", 9 * HOURS)
+
+        with self.settings(RESTCLIENTS_CACHE_STALE_IF_ERROR={
+                "sws": 24 * HOURS}):
+            stats = purge_cache(cache, pause=0, min_age=0)
+            self.assertEquals(stats["deleted"], 1)
+            self.assertEquals(self._urls(), ["/sws"])
+
+        with self.settings(RESTCLIENTS_CACHE_STALE_WHILE_REVALIDATE=(
+                24 * HOURS)):
+            stats = purge_cache(cache, pause=0, min_age=0)
+            self.assertEquals(stats["deleted"], 0)
+
+    def test_past_term_retention(self):
+        cache = PastTermCache()
+        self._save(cache, "sws", "/student/v5/term/2013,spring.json",
+                   60 * 60 * 24 * 365)
+        self._save(cache, "sws", "/student/v5/term/2099,spring.json",
+                   9 * HOURS)
+        self._save(cache, "sws", "/student/v5/campus.json", HOURS)
+
+        stats = purge_cache(cache, pause=0)
+        self.assertEquals(stats["deleted"], 1)
+        self.assertEquals(self._urls(), ["/student/v5/campus.json",
+                                         "/student/v5/term/2013,spring.json"])
+
+    def test_policy_retention(self):
+        with self.settings(RESTCLIENTS_CACHE_POLICY=[
+                {"name": "terms", "service": "sws", "url": r"/term/",
+                 "ttl": 24 * HOURS},
+                {"name": "everything else", "ttl": 60}]):
+            cache = PolicyCache()
+            self._save(cache, "sws", "/student/v5/term/current.json",
+                       9 * HOURS)
+            self._save(cache, "sws", "/student/v5/campus.json", 9 * HOURS)
+
+            stats = purge_cache(cache, pause=0)
+            self.assertEquals(stats["deleted"], 1)
+            self.assertEquals(self._urls(), ["/student/v5/term/current.json"])
+
+    def test_success_kept_over_errors(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.errors.Always500',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.FourHourCache'):
+            cache = FourHourCache()
+            self._save(cache, "sws", "/success", 5 * HOURS)
+            self._save(cache, "sws", "/error", 5 * HOURS, status=404)
+            self._save(cache, "sws", "/old_success", 9 * HOURS)
+
+            stats = purge_cache(cache, pause=0)
+            self.assertEquals(stats["deleted"], 2)
+            self.assertEquals(self._urls(), ["/success"])
+
+            # The outage is still answered with the saved success
+            response = SWS_DAO().getURL("/success", {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(response.data, "content for /success")
+
+    def test_max_age(self):
+        cache = TimeSimpleCache()
+        self._save(cache, "sws", "/day", 60 * 60 * 24)
+        self._save(cache, "sws", "/hour", 60 * 60)
+
+        self.assertRaises(ValueError, purge_cache, NoCache())
+        stats = purge_cache(NoCache(), max_age=60 * 60 * 2, pause=0)
+        self.assertEquals(stats["deleted"], 1)
+        self.assertEquals(self._urls(), ["/hour"])
+
+    def test_expired_leases(self):
+        cache = TimeSimpleCache()
+        cache.acquireLease("sws", "/held", 60)
+        cache.acquireLease("sws", "/abandoned", 60)
+        CacheLease.objects.filter(
+            url_key=get_cache_key("sws", "/abandoned")).update(
+            expires=make_aware(datetime.now(), get_current_timezone()) -
+            timedelta(seconds=1))
+
+        stats = purge_cache(cache, pause=0)
+        self.assertEquals(stats["leases"], 1)
+        self.assertEquals(list(CacheLease.objects.values_list(
+            "url_key", flat=True)), [get_cache_key("sws", "/held")])
+
+    def test_command(self):
+        self._save(TimeSimpleCache(), "sws", "/old", 9 * HOURS)
+
+        with self.settings(RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_PURGE_PAUSE=0):
+            out = StringIO()
+            call_command("restclients_purge_cache", stdout=out)
+            self.assertTrue(out.getvalue().startswith(
+                "Deleted 1 of 1 entries checked"))
+            self.assertEquals(self._urls(), [])
+
+        with self.settings(RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+            self.assertRaises(CommandError, call_command,
+                              "restclients_purge_cache")
+            self.assertRaises(CommandError, call_command,
+                              "restclients_purge_cache", batch_size=0)
@@ -0,0 +1,199 @@
+import os
+import gzip
+import shutil
+import tempfile
+from datetime import timedelta
+from StringIO import StringIO
+from django.test import TestCase
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from restclients.cache_implementation import TimeSimpleCache, ETagCache
+from restclients import cache_snapshot
+from restclients.cache_snapshot import export_cache, import_cache
+from restclients.exceptions import InvalidCacheSnapshot
+from restclients.models import CacheEntry, CacheEntryTimed, \
+    CacheEntryExpires, get_cache_key
+from restclients.mock_http import MockHTTP
+
+
+class CacheSnapshotTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.path = os.path.join(self.temp_dir, "cache.snapshot")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def _save(self, service, url, data, status=200, headers=None):
+        response = MockHTTP()
+        response.status = status
+        response.data = data
+        response.headers = headers or {}
+        TimeSimpleCache().processResponse(service, url, response)
+
+    def test_round_trip(self):
+        self._save("sws", "/student/v5/term/current.json", "current term",
+                   headers={"ETag": "abc"})
+        self._save("sws", "/student/v5/campus.json", u"caf\u00e9 " * 500)
+        self._save("pws", "/identity/v1/person/javerage.json", "", 404)
+
+        entry = CacheEntryTimed.objects.get(
+            url_key=get_cache_key("sws", "/student/v5/term/current.json"))
+        entry.time_saved = entry.time_saved - timedelta(minutes=5)
+        entry.save()
+        saved = CacheEntryTimed.objects.get(pk=entry.pk).time_saved
+
+        self.assertEquals(export_cache(self.path), 3)
+        CacheEntry.objects.all().delete()
+
+        stats = import_cache(self.path, batch_size=2)
+        self.assertEquals(stats, {"imported": 3, "skipped": 0})
+        self.assertEquals(CacheEntryTimed.objects.count(), 3)
+
+        entry = CacheEntryTimed.objects.get(
+            url_key=get_cache_key("sws", "/student/v5/term/current.json"))
+        self.assertEquals(entry.time_saved, saved)
+        self.assertEquals(entry.getHeaders()["etag"], "abc")
+
+        # Expired on export, so it isn't served
+        cache = TimeSimpleCache()
+        self.assertEquals(cache.getCache(
+            "sws", "/student/v5/term/current.json", {}), None)
+
+        hit = cache.getCache("sws", "/student/v5/campus.json", {})
+        self.assertEquals(hit["response"].data, u"caf\u00e9 " * 500)
+        hit = cache.getCache("pws", "/identity/v1/person/javerage.json", {})
+        self.assertEquals(hit["response"].status, 404)
+
+        # New entries get ids after the imported ones
+        self._save("sws", "/student/v5/college.json", "colleges")
+        self.assertEquals(CacheEntryTimed.objects.count(), 4)
+
+    def test_filtered_export(self):
+        self._save("sws", "/student/v5/term/current.json", "term")
+        self._save("sws", "/student/v5/course/2013,winter,ENDO,535/A.json",
+                   "section")
+        self._save("pws", "/identity/v1/person/javerage.json", "person")
+
+        self.assertEquals(export_cache(self.path, services=["sws"]), 2)
+        self.assertEquals(export_cache(self.path, services=["sws"],
+                                       url_pattern=r"^/student/v5/course/"),
+                          1)
+        self.assertEquals(export_cache(
+            self.path, url_pattern=r"^/student/v5/course/"), 1)
+        self.assertEquals(export_cache(self.path, services=["gws"]), 0)
+
+    def test_existing_entries(self):
+        self._save("sws", "/one", "snapshot one")
+        self._save("sws", "/two", "snapshot two")
+        export_cache(self.path)
+
+        CacheEntry.objects.all().delete()
+        self._save("sws", "/one", "live one")
+
+        stats = import_cache(self.path)
+        self.assertEquals(stats, {"imported": 1, "skipped": 1})
+        cache = TimeSimpleCache()
+        self.assertEquals(cache.getCache("sws", "/one", {})[
+            "response"].data, "live one")
+
+        stats = import_cache(self.path, replace=True)
+        self.assertEquals(stats, {"imported": 2, "skipped": 0})
+        self.assertEquals(cache.getCache("sws", "/one", {})[
+            "response"].data, "snapshot one")
+        self.assertEquals(CacheEntry.objects.count(), 2)
+
+    def test_concurrent_writes(self):
+        self._save("sws", "/one", "snapshot one")
+        self._save("sws", "/two", "snapshot two")
+        self._save("sws", "/three", "snapshot three")
+        export_cache(self.path)
+
+        CacheEntry.objects.all().delete()
+        self._save("sws", "/two", "live two")
+
+        # As if another process cached /two after the batch was checked
+        cached_keys = cache_snapshot._cached_keys
+        cache_snapshot._cached_keys = lambda url_keys: set()
+        try:
+            stats = import_cache(self.path)
+        finally:
+            cache_snapshot._cached_keys = cached_keys
+
+        self.assertEquals(stats, {"imported": 2, "skipped": 1})
+        self.assertEquals(CacheEntryTimed.objects.count(), 3)
+        cache = TimeSimpleCache()
+        self.assertEquals(cache.getCache("sws", "/two", {})[
+            "response"].data, "live two")
+        self.assertEquals(cache.getCache("sws", "/three", {})[
+            "response"].data, "snapshot three")
+
+    def test_large_batches(self):
+        # The ETag cache has one of the urls
+        response = MockHTTP()
+        response.status = 200
+        response.data = "etag"
+        response.headers = {"ETag": "abc"}
+        ETagCache().processResponse("sws", "/etag", response)
+
+        stream = gzip.open(self.path, "wb")
+        cache_snapshot._write_record(stream, {
+            "format": cache_snapshot.FORMAT,
+            "version": cache_snapshot.VERSION})
+        for url in ["/etag"] + ["/r/%d" % i for i in range(1000)]:
+            cache_snapshot._write_record(stream, {
+                "service": "sws", "url": url, "status": 200, "headers": "[]",
+                "content": url, "encoding": "", "saved": 1400000000})
+        stream.close()
+
+        # More urls than sqlite allows parameters in one query
+        stats = import_cache(self.path, batch_size=2000)
+        self.assertEquals(stats, {"imported": 1000, "skipped": 1})
+
+        stats = import_cache(self.path, replace=True, batch_size=2000)
+        self.assertEquals(stats, {"imported": 1000, "skipped": 1})
+        self.assertEquals(CacheEntryTimed.objects.count(), 1000)
+        self.assertEquals(list(CacheEntryExpires.objects.values_list(
+            "url", flat=True)), ["/etag"])
+
+    def test_invalid_snapshot(self):
+        stream = gzip.open(self.path, "wb")
+        stream.write("not a snapshot")
+        stream.close()
+        self.assertRaises(InvalidCacheSnapshot, import_cache, self.path)
+
+        stream = gzip.open(self.path, "wb")
+        stream.close()
+        self.assertRaises(InvalidCacheSnapshot, import_cache, self.path)
+
+        self._save("sws", "/one", "one")
+        export_cache(self.path)
+        with gzip.open(self.path, "rb") as stream:
+            data = stream.read()
+        stream = gzip.open(self.path, "wb")
+        stream.write(data[:-5])
+        stream.close()
+        self.assertRaises(InvalidCacheSnapshot, import_cache, self.path)
+
+    def test_commands(self):
+        self._save("sws", "/one", "one")
+        self._save("pws", "/two", "two")
+
+        out = StringIO()
+        call_command("restclients_export_cache", self.path,
+                     services=["sws"], stdout=out)
+        self.assertEquals(out.getvalue().strip(),
+                          "Exported 1 entries to %s" % self.path)
+
+        CacheEntry.objects.all().delete()
+        out = StringIO()
+        call_command("restclients_import_cache", self.path, stdout=out)
+        self.assertEquals(out.getvalue().strip(),
+                          "Imported 1 entries, 0 were already cached")
+
+        self.assertRaises(CommandError, call_command,
+                          "restclients_export_cache")
+        self.assertRaises(CommandError, call_command,
+                          "restclients_import_cache",
+                          os.path.join(self.temp_dir, "missing"))
@@ -0,0 +1,156 @@
+import os
+import re
+import json
+import time
+import shutil
+import tempfile
+from StringIO import StringIO
+from django.test import TestCase
+from django.conf import settings
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from restclients.cache_warmer import CacheWarmer, RateLimiter
+from restclients.models import CacheEntryTimed
+from restclients.dao_implementation.pws import File as PWSFile
+
+
+class AnyPerson(object):
+    """
+    The mock resources don't have the ENDO instructors, so every regid gets
+    the same person.
+    """
+    def getURL(self, url, headers):
+        url = re.sub(r"^/identity/v1/person/\w+/full.json$",
+                     "/identity/v1/person/FBB38FE46A7C11D5A4AE0004AC494FFE/"
+                     "full.json", url)
+        return PWSFile().getURL(url, headers)
+
+
+class CacheWarmerTest(TestCase):
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+        self.state_file = os.path.join(self.temp_dir, "state.json")
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_warm_term(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_PWS_DAO_CLASS='restclients.test.cache_warmer.AnyPerson',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+            messages = []
+            warmer = CacheWarmer(2013, "Winter", concurrency=2,
+                                 curricula=["ENDO"],
+                                 state_file=self.state_file,
+                                 progress=messages.append)
+            stats = warmer.run()
+
+            self.assertEquals(stats["curricula"], 1)
+            self.assertEquals(stats["sections"], 2)
+            self.assertEquals(stats["people"], 7)
+            self.assertEquals(stats.get("errors", 0), 0)
+            self.assertEquals(len(messages), 1)
+            self.assertTrue(messages[0].startswith("ENDO (1 of 1)"))
+
+            urls = set(CacheEntryTimed.objects.values_list("url", flat=True))
+            self.assertTrue("/student/v5/term/2013,winter.json" in urls)
+            self.assertTrue("/student/v5/course/2013,winter,ENDO,535/A.json"
+                            in urls)
+            self.assertTrue("/student/v5/course/2013,winter,ENDO,630/A.json"
+                            in urls)
+            services = set(CacheEntryTimed.objects.values_list("service",
+                                                               flat=True))
+            self.assertEquals(services, set(["sws", "pws"]))
+
+            with open(self.state_file) as handle:
+                self.assertEquals(json.load(handle),
+                                  {"term": "2013,winter",
+                                   "curricula": ["ENDO"]})
+
+    def test_bad_response(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.TestBadResponse'):
+            warmer = CacheWarmer(2013, "winter", concurrency=2)
+            results = warmer._run_all(warmer._warm_section, [
+                "/student/v5/course/2012,summer,PHYS,121/AQ.json",
+                "/student/v5/course/2013,winter,ENDO,535/A.json"])
+
+            # The exception is counted, and the other section is loaded
+            self.assertEquals(results[0], None)
+            self.assertTrue(len(results[1]) > 0)
+            self.assertEquals(warmer.stats.get("errors"), 1)
+            self.assertEquals(warmer.stats.get("sections"), 1)
+
+    def test_resume(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_PWS_DAO_CLASS='restclients.test.cache_warmer.AnyPerson'):
+            with open(self.state_file, "w") as handle:
+                json.dump({"term": "2013,winter", "curricula": ["ENDO"]},
+                          handle)
+
+            stats = CacheWarmer(2013, "winter", curricula=["ENDO"],
+                                state_file=self.state_file).run()
+            self.assertEquals(stats["skipped"], 1)
+            self.assertEquals(stats.get("sections", 0), 0)
+
+            # State from a different term is ignored
+            with open(self.state_file, "w") as handle:
+                json.dump({"term": "2012,autumn", "curricula": ["ENDO"]},
+                          handle)
+
+            stats = CacheWarmer(2013, "winter", curricula=["ENDO"],
+                                state_file=self.state_file).run()
+            self.assertEquals(stats.get("skipped", 0), 0)
+            self.assertEquals(stats["sections"], 2)
+
+    def test_failed_curriculum(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_PWS_DAO_CLASS='restclients.test.cache_warmer.AnyPerson'):
+            # There's no section resource for ACCTG, so it isn't marked done
+            stats = CacheWarmer(2013, "winter", curricula=["ACCTG", "ENDO"],
+                                state_file=self.state_file).run()
+            self.assertEquals(stats["errors"], 1)
+            self.assertEquals(stats["curricula"], 1)
+
+            with open(self.state_file) as handle:
+                self.assertEquals(json.load(handle)["curricula"], ["ENDO"])
+
+    def test_failed_people(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_PWS_DAO_CLASS='restclients.dao_implementation.errors.Always404'):
+            stats = CacheWarmer(2013, "winter", curricula=["ENDO"],
+                                state_file=self.state_file).run()
+            self.assertEquals(stats["sections"], 2)
+            self.assertEquals(stats.get("people", 0), 0)
+            self.assertEquals(stats["errors"], 7)
+            self.assertFalse(os.path.exists(self.state_file))
+
+    def test_rate_limiter(self):
+        limiter = RateLimiter(50)
+        start = time.time()
+        for i in range(5):
+            limiter.wait()
+        self.assertTrue(time.time() - start >= 0.07)
+
+        limiter = RateLimiter(None)
+        start = time.time()
+        for i in range(100):
+            limiter.wait()
+        self.assertTrue(time.time() - start < 0.05)
+
+    def test_command(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_PWS_DAO_CLASS='restclients.test.cache_warmer.AnyPerson'):
+            out = StringIO()
+            call_command("restclients_warm_cache", "2013", "winter",
+                         curricula=["ENDO"], state_file=self.state_file,
+                         stdout=out)
+            self.assertTrue("Warmed 1 curricula (0 already done), 2 "
+                            "sections" in out.getvalue())
+
+            self.assertRaises(CommandError, call_command,
+                              "restclients_warm_cache", "2013")
+            self.assertRaises(CommandError, call_command,
+                              "restclients_warm_cache", "2013", "fall")
+            self.assertRaises(CommandError, call_command,
+                              "restclients_warm_cache", "2013", "winter",
+                              concurrency=0)
@@ -0,0 +1,92 @@
+import time
+import threading
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+from SocketServer import ThreadingMixIn
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.dao_implementation.sws import Live as SWSLive
+from restclients.models import CacheEntryTimed
+from restclients.pws import PWS
+from restclients.sws import get_resource_async
+from restclients.thread import gather
+
+
+class SlowHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        time.sleep(0.2)
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain")
+        self.end_headers()
+        self.wfile.write("path: %s" % self.path)
+
+    def log_message(self, *args):
+        pass
+
+
+class LocalServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+class AsyncDAOTest(TestCase):
+    def test_file_dao(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_PWS_DAO_CLASS='restclients.dao_implementation.pws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+
+            call = SWS_DAO().agetURL('/student/v5/term/2013,spring.json', {})
+            response = call.result()
+            self.assertTrue(call.done())
+            self.assertEquals(response.status, 200)
+
+            # Caching is the same as getURL
+            self.assertEquals(CacheEntryTimed.objects.filter(
+                service='sws', url='/student/v5/term/2013,spring.json').count(), 1)
+
+            data = gather([get_resource_async('/student/v5/term/2013,spring.json'),
+                           get_resource_async('/student/v5/term/2013,summer.json')])
+            self.assertEquals(data[0]["Quarter"], "spring")
+            self.assertEquals(data[1]["Quarter"], "summer")
+
+            person = PWS().get_person_by_netid_async('javerage').result()
+            self.assertEquals(person.uwnetid, 'javerage')
+
+    def test_exceptions(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.TestBadResponse',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+
+            call = SWS_DAO().agetURL('/student/v5/course/2012,summer,PHYS,121/AQ.json', {})
+            self.assertRaises(Exception, call.result)
+
+    def test_live_dao(self):
+        server = LocalServer(("127.0.0.1", 0), SlowHandler)
+        server_thread = threading.Thread(target=server.serve_forever)
+        server_thread.daemon = True
+        server_thread.start()
+
+        host = "http://127.0.0.1:%s" % server.server_address[1]
+        try:
+            with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.Live',
+                               RESTCLIENTS_SWS_HOST=host,
+                               RESTCLIENTS_SWS_KEY_FILE=None,
+                               RESTCLIENTS_SWS_CERT_FILE=None,
+                               RESTCLIENTS_USE_THREADING=True,
+                               RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+                SWSLive.pool = None
+
+                start = time.time()
+                calls = [SWS_DAO().agetURL('/url/%s' % i, {})
+                         for i in range(10)]
+                responses = gather(calls, timeout=10)
+                elapsed = time.time() - start
+
+                for i in range(10):
+                    self.assertEquals(responses[i].status, 200)
+                    self.assertEquals(responses[i].data, "path: /url/%s" % i)
+
+                # 10 requests at 0.2 seconds each, run concurrently
+                self.assertTrue(elapsed < 1.5)
+        finally:
+            SWSLive.pool = None
+            server.shutdown()
+            server.server_close()
@@ -0,0 +1,44 @@
+from django.test import TestCase
+from restclients.dao import SWS_DAO
+from restclients.models import CacheEntryTimed
+
+
+class CacheURLTest(TestCase):
+    def test_equivalent_urls(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+            url = ("/student/v5/registration.json?reg_id=00000000000000000000000000000001"
+                   "&quarter=autumn&is_active=true&year=2012")
+            response = SWS_DAO().getURL(url, {})
+            self.assertEquals(response.status, 200)
+
+            # The File DAO has no resource for this order, so it has to
+            # come from the cache
+            reordered = ("/student/v5/registration.json?year=2012&is_active=true"
+                         "&quarter=autumn&reg_id=00000000000000000000000000000001")
+            cached = SWS_DAO().getURL(reordered, {})
+            self.assertEquals(cached.status, 200)
+            self.assertEquals(cached.data, response.data)
+
+            responses = SWS_DAO().getURLs([url, reordered], {})
+            self.assertEquals(responses[1].data, response.data)
+            self.assertEquals(CacheEntryTimed.objects.count(), 1)
+
+    def test_vary_headers(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache',
+                           RESTCLIENTS_CACHE_VARY_HEADERS={"sws": ["X-UW-Act-as"]}):
+            url = "/student/v5/term/2013,spring.json"
+            SWS_DAO().getURL(url, {"X-UW-Act-as": "bill"})
+            SWS_DAO().getURL(url, {"x-uw-act-as": "bill"})
+            SWS_DAO().getURL(url, {"X-UW-Act-as": "javerage"})
+            SWS_DAO().getURL(url, {"Accept": "application/json"})
+
+            urls = sorted(CacheEntryTimed.objects.values_list("url", flat=True))
+            self.assertEquals(urls, [url,
+                                     url + "#x-uw-act-as=bill",
+                                     url + "#x-uw-act-as=javerage"])
+
+            responses = SWS_DAO().getURLs([url], {"X-UW-Act-as": "bill"})
+            self.assertEquals(responses[0].status, 200)
+            self.assertEquals(CacheEntryTimed.objects.count(), 3)
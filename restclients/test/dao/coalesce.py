@@ -0,0 +1,61 @@
+import time
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO, upstream_requests, get_coalesce_stats
+from restclients.dao_implementation.sws import File as SWSFile
+from restclients.thread import gather
+
+
+class SlowFile(SWSFile):
+    """
+    Takes long enough for other requests for the url to arrive while it's
+    running.
+    """
+    calls = []
+
+    def getURL(self, url, headers):
+        SlowFile.calls.append(url)
+        time.sleep(0.2)
+        return super(SlowFile, self).getURL(url, headers)
+
+
+class CoalesceTest(TestCase):
+    def test_concurrent_requests(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.test.dao.coalesce.SlowFile',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache',
+                           RESTCLIENTS_USE_THREADING=True):
+            upstream_requests.reset_stats()
+            SlowFile.calls = []
+            url = '/student/v5/term/2013,spring.json'
+
+            calls = [SWS_DAO().agetURL(url, {}) for i in range(5)]
+            responses = gather(calls)
+
+            # One fetch, shared by every caller
+            self.assertEquals(SlowFile.calls, [url])
+            self.assertEquals([r.status for r in responses], [200] * 5)
+            self.assertTrue(all(r is responses[0] for r in responses))
+            self.assertEquals(get_coalesce_stats(),
+                              {"upstream_calls": 1, "upstream_calls_saved": 4})
+
+    def test_stats(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+            upstream_requests.reset_stats()
+
+            SWS_DAO().getURL('/student/v5/term/2013,spring.json', {})
+            SWS_DAO().getURL('/student/v5/term/2013,spring.json', {})
+
+            # Sequential requests each go upstream
+            self.assertEquals(get_coalesce_stats(),
+                              {"upstream_calls": 2, "upstream_calls_saved": 0})
+
+    def test_disabled(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache',
+                           RESTCLIENTS_COALESCE_REQUESTS=False):
+            upstream_requests.reset_stats()
+
+            response = SWS_DAO().getURL('/student/v5/term/2013,spring.json', {})
+            self.assertEquals(response.status, 200)
+            self.assertEquals(get_coalesce_stats()["upstream_calls"], 0)
@@ -0,0 +1,93 @@
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO, PWS_DAO
+from restclients.models import CacheEntryTimed
+from restclients.sws import get_resources
+from restclients.exceptions import DataFailureException
+
+
+class GetURLsTest(TestCase):
+    def test_no_cache(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+
+            urls = ['/student/v5/term/2013,spring.json',
+                    '/student/v5/term/2013,summer.json',
+                    '/student/v5/term/2013,spring.json']
+
+            responses = SWS_DAO().getURLs(urls, {})
+            self.assertEquals(len(responses), 3)
+            self.assertEquals(responses[0].status, 200)
+            self.assertEquals(responses[1].status, 200)
+            self.assertTrue('"Year":2013' in responses[0].data.replace(' ', ''))
+            self.assertTrue('summer' in responses[1].data)
+            self.assertTrue('spring' in responses[2].data)
+
+    def test_missing_resource(self):
+        with self.settings(RESTCLIENTS_PWS_DAO_CLASS='restclients.dao_implementation.pws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+
+            responses = PWS_DAO().getURLs(
+                ['/identity/v1/person/javerage/full.json',
+                 '/identity/v1/person/not_a_person/full.json'], {})
+
+            self.assertEquals(responses[0].status, 200)
+            self.assertEquals(responses[1].status, 404)
+
+    def test_bulk_cache(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+
+            urls = ['/student/v5/term/2013,spring.json',
+                    '/student/v5/term/2013,summer.json',
+                    '/student/v5/term/2013,autumn.json']
+
+            responses = SWS_DAO().getURLs(urls[0:2], {})
+            self.assertEquals(CacheEntryTimed.objects.filter(service='sws').count(), 2)
+
+            # All of the hits come from one query
+            with self.assertNumQueries(1):
+                hits = SWS_DAO().getURLs(urls[0:2], {})
+
+            self.assertEquals(hits[0].data, responses[0].data)
+            self.assertEquals(hits[1].data, responses[1].data)
+
+            responses = SWS_DAO().getURLs(urls, {})
+            self.assertEquals(len(responses), 3)
+            self.assertTrue('autumn' in responses[2].data)
+            self.assertEquals(CacheEntryTimed.objects.filter(service='sws').count(), 3)
+
+    def test_per_url_cache(self):
+        with self.settings(RESTCLIENTS_PWS_DAO_CLASS='restclients.dao_implementation.pws.ETag',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.ETagCache'):
+
+            responses = PWS_DAO().getURLs(['/same', '/other'], {})
+            self.assertEquals(responses[0].status, 200)
+            self.assertEquals(responses[1].status, 200)
+
+            # The second request sends If-None-Match and gets a 304,
+            # which the cache turns back into the full response
+            responses = PWS_DAO().getURLs(['/same'], {})
+            self.assertEquals(responses[0].status, 200)
+            self.assertEquals(responses[0].data, "Body Content")
+
+    def test_failed_url(self):
+        bad_url = "/student/v5/course/2012,summer,PHYS,121/AQ.json"
+        good_url = "/student/v5/course/2013,winter,ENDO,535/A.json"
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.TestBadResponse',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+
+            # The other url's response isn't lost
+            responses = SWS_DAO().getURLs([good_url, bad_url], {})
+            self.assertEquals(responses[0].status, 200)
+            self.assertEquals(responses[1].status, 500)
+            self.assertEquals(responses[1].data, "Uh oh!")
+            self.assertEquals(list(CacheEntryTimed.objects.values_list(
+                "url", flat=True)), [good_url])
+
+            try:
+                get_resources([good_url, bad_url])
+                self.fail("Expected a DataFailureException")
+            except DataFailureException as ex:
+                self.assertEquals(ex.url, bad_url)
+                self.assertEquals(ex.status, 500)
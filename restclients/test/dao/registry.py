@@ -0,0 +1,36 @@
+from django.test import TestCase
+from django.conf import settings
+from restclients.dao import SWS_DAO, PWS_DAO, clear_dao_registry
+from restclients.dao_implementation.sws import File as SWSFile
+from restclients.cache_implementation import NoCache, TimeSimpleCache
+
+
+class DAORegistryTest(TestCase):
+    def test_instances_are_shared(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+
+            dao = SWS_DAO()._getDAO()
+            self.assertTrue(isinstance(dao, SWSFile))
+            self.assertTrue(dao is SWS_DAO()._getDAO())
+
+            cache = SWS_DAO()._getCache()
+            self.assertTrue(isinstance(cache, NoCache))
+            self.assertTrue(cache is PWS_DAO()._getCache())
+
+    def test_settings_override(self):
+        with self.settings(RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+            cache = SWS_DAO()._getCache()
+            self.assertTrue(isinstance(cache, NoCache))
+
+            with self.settings(RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.TimeSimpleCache'):
+                self.assertTrue(isinstance(SWS_DAO()._getCache(),
+                                           TimeSimpleCache))
+
+            self.assertTrue(isinstance(SWS_DAO()._getCache(), NoCache))
+
+    def test_clear(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File'):
+            dao = SWS_DAO()._getDAO()
+            clear_dao_registry()
+            self.assertFalse(dao is SWS_DAO()._getDAO())
@@ -0,0 +1,76 @@
+from django.test import TestCase
+from django.test.client import RequestFactory
+from django.http import HttpResponse
+from django.conf import settings
+from restclients.dao import SWS_DAO
+from restclients.middleware import RequestMemoMiddleware
+from restclients.sws import SWSThread
+from restclients.util.request_memo import get_request_memo
+
+
+class RequestMemoTest(TestCase):
+    def test_memo(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+
+            url = '/student/v5/term/2013,spring.json'
+            self.assertEquals(get_request_memo(), None)
+            self.assertFalse(SWS_DAO().getURL(url, {}) is
+                             SWS_DAO().getURL(url, {}))
+
+            middleware = RequestMemoMiddleware()
+            request = RequestFactory().get("/")
+            middleware.process_request(request)
+
+            response = SWS_DAO().getURL(url, {})
+            self.assertTrue(response is SWS_DAO().getURL(url, {}))
+
+            # Different headers are a different request
+            self.assertFalse(response is
+                             SWS_DAO().getURL(url, {"Accept": "text/html"}))
+
+            # Threads share the request's memo
+            thread = SWSThread()
+            thread.url = url
+            thread.start()
+            thread.join()
+            self.assertTrue(thread.response is response)
+            self.assertTrue(get_request_memo() is not None)
+
+            responses = SWS_DAO().getURLs(
+                [url, '/student/v5/term/2013,summer.json'], {})
+            self.assertTrue(responses[0] is response)
+            self.assertTrue(SWS_DAO().getURL('/student/v5/term/2013,summer.json', {}) is responses[1])
+
+            middleware.process_response(request, HttpResponse())
+            self.assertEquals(get_request_memo(), None)
+            self.assertFalse(response is SWS_DAO().getURL(url, {}))
+
+    def test_writes(self):
+        with self.settings(RESTCLIENTS_SWS_DAO_CLASS='restclients.dao_implementation.sws.File',
+                           RESTCLIENTS_DAO_CACHE_CLASS='restclients.cache_implementation.NoCache'):
+
+            url = '/student/v5/term/2013,spring.json'
+            other_url = '/student/v5/term/2013,summer.json'
+            middleware = RequestMemoMiddleware()
+            request = RequestFactory().get("/")
+            middleware.process_request(request)
+
+            response = SWS_DAO().getURL(url, {})
+            other_response = SWS_DAO().getURL(other_url, {})
+
+            # A GET after a write doesn't see the response from before it
+            SWS_DAO().putURL(url, {}, None)
+            self.assertFalse(response is SWS_DAO().getURL(url, {}))
+            self.assertTrue(other_response is
+                            SWS_DAO().getURL(other_url, {}))
+
+            middleware.process_response(request, HttpResponse())
+
+    def test_exception(self):
+        middleware = RequestMemoMiddleware()
+        request = RequestFactory().get("/")
+        middleware.process_request(request)
+        self.assertEquals(get_request_memo(), {})
+        middleware.process_exception(request, Exception())
+        self.assertEquals(get_request_memo(), None)
@@ -0,0 +1,42 @@
+import pickle
+from django.test import TestCase
+from restclients.util.headers import HeaderDict, encode_headers, \
+    decode_headers
+from restclients.mock_http import MockHTTP
+
+
+class HeaderDictTest(TestCase):
+    def test_case_insensitive(self):
+        headers = HeaderDict({"Content-Type": "application/json"})
+        self.assertEquals(headers["content-type"], "application/json")
+        self.assertTrue("CONTENT-TYPE" in headers)
+        self.assertEquals(list(headers.keys()), ["Content-Type"])
+
+        headers["content-type"] = "text/plain"
+        self.assertEquals(len(headers), 1)
+        self.assertEquals(list(headers.items()), [("content-type", "text/plain")])
+
+        del headers["Content-TYPE"]
+        self.assertEquals(len(headers), 0)
+        self.assertEquals(headers.get("Content-Type", "missing"), "missing")
+
+    def test_equality(self):
+        self.assertEquals(HeaderDict({"ETag": "A1"}), {"etag": "A1"})
+        self.assertNotEquals(HeaderDict({"ETag": "A1"}), {"etag": "A2"})
+        self.assertEquals(dict(HeaderDict({"ETag": "A1"})), {"ETag": "A1"})
+
+    def test_encoding(self):
+        headers = {"Content-Type": "application/json", "Link": "<a>; rel=next"}
+        data = encode_headers(headers)
+        self.assertEquals(data[0], "[")
+        self.assertEquals(decode_headers(data), headers)
+
+        copied = pickle.loads(pickle.dumps(HeaderDict(headers)))
+        self.assertEquals(copied["link"], "<a>; rel=next")
+
+    def test_getheader(self):
+        response = MockHTTP()
+        response.headers = HeaderDict({"ETag": "A1"})
+        self.assertEquals(response.getheader("etag"), "A1")
+        self.assertEquals(response.getheader("Expires"), "")
+        self.assertEquals(response.getheader("Expires", None), None)
@@ -0,0 +1,36 @@
+from django.test import TestCase
+from restclients.util.lru import LRUStore
+
+
+class LRUStoreTest(TestCase):
+    def test_lru(self):
+        store = LRUStore(30)
+        store.put("a", "A", 10)
+        store.put("b", "B", 10)
+        store.put("c", "C", 10)
+        self.assertEquals(store.get("a"), "A")
+
+        store.put("d", "D", 10)
+        self.assertEquals(store.get("b"), None)
+        self.assertEquals(store.keys(), ["c", "a", "d"])
+
+        stats = store.get_stats()
+        self.assertEquals(stats["hit"], 1)
+        self.assertEquals(stats["miss"], 1)
+        self.assertEquals(stats["eviction"], 1)
+        self.assertEquals(stats["bytes"], 30)
+        self.assertEquals(stats["entries"], 3)
+
+    def test_replace_and_delete(self):
+        store = LRUStore(100)
+        store.put("a", "A", 10)
+        store.put("a", "AA", 20)
+        self.assertEquals(store.peek("a"), "AA")
+        self.assertEquals(store.get_stats()["bytes"], 20)
+
+        store.delete("a")
+        self.assertEquals(store.peek("a"), None)
+        self.assertEquals(store.get_stats()["bytes"], 0)
+
+        store.put("b", "B", 200)
+        self.assertEquals(store.peek("b"), None)
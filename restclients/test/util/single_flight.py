@@ -0,0 +1,67 @@
+import time
+import threading
+from django.test import TestCase
+from restclients.util.single_flight import SingleFlight
+
+
+class SingleFlightTest(TestCase):
+    def test_coalesce(self):
+        flight = SingleFlight()
+        calls = []
+        results = []
+
+        def slow_call():
+            calls.append(1)
+            time.sleep(0.2)
+            return "shared"
+
+        def worker():
+            results.append(flight.do(("sws", "/same"), slow_call))
+
+        threads = [threading.Thread(target=worker) for i in range(5)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEquals(len(calls), 1)
+        self.assertEquals(results, ["shared"] * 5)
+        self.assertEquals(flight.get_stats(), {"calls": 1, "coalesced": 4})
+        self.assertEquals(flight.in_flight(), 0)
+
+    def test_sequential_calls(self):
+        flight = SingleFlight()
+        self.assertEquals(flight.do("a", lambda: 1), 1)
+        self.assertEquals(flight.do("a", lambda: 2), 2)
+        self.assertEquals(flight.do("b", lambda: 3), 3)
+        self.assertEquals(flight.get_stats(), {"calls": 3, "coalesced": 0})
+
+        flight.reset_stats()
+        self.assertEquals(flight.get_stats(), {"calls": 0, "coalesced": 0})
+
+    def test_exceptions(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        errors = []
+
+        def failing_call():
+            started.set()
+            time.sleep(0.2)
+            raise ValueError("upstream down")
+
+        def worker():
+            try:
+                flight.do("key", failing_call)
+            except ValueError as ex:
+                errors.append(ex)
+
+        leader = threading.Thread(target=worker)
+        leader.start()
+        started.wait()
+        follower = threading.Thread(target=worker)
+        follower.start()
+        leader.join()
+        follower.join()
+
+        self.assertEquals(len(errors), 2)
+        self.assertEquals(flight.in_flight(), 0)
@@ -0,0 +1,38 @@
+from datetime import datetime
+from django.test import TestCase
+from restclients.util.sws_term import get_term_from_url, is_past_term, \
+    is_past_term_url
+
+
+class SWSTermURLTest(TestCase):
+    def test_term_from_url(self):
+        self.assertEquals(get_term_from_url("/student/v5/term/2013,spring.json"),
+                          (2013, "spring"))
+        self.assertEquals(get_term_from_url("/student/v5/course/2012,summer,TRAIN,100/A.json"),
+                          (2012, "summer"))
+        self.assertEquals(get_term_from_url("/student/v5/graderoster/2013,summer,CSS,161,A,FBB38FE46A7C11D5A4AE0004AC494FFE"),
+                          (2013, "summer"))
+        self.assertEquals(get_term_from_url("/student/v5/enrollment/2013%2CSpring%2C9136CCB8F66711D5BE060004AC494FFE.json"),
+                          (2013, "spring"))
+        self.assertEquals(get_term_from_url("/student/v5/registration.json?reg_id=9136CCB8F66711D5BE060004AC494FFE&quarter=Autumn&is_active=true&year=2012"),
+                          (2012, "autumn"))
+
+        self.assertEquals(get_term_from_url("/student/v5/term/current.json"), None)
+        self.assertEquals(get_term_from_url("/student/v5/person/9136CCB8F66711D5BE060004AC494FFE.json"), None)
+        self.assertEquals(get_term_from_url("/student/v5/section.json?year=2013"), None)
+        self.assertEquals(get_term_from_url("/identity/v1/person.json?year=2013&quarter=spring"), None)
+
+    def test_past_term(self):
+        now = datetime(2013, 7, 15)
+        self.assertTrue(is_past_term(2012, "autumn", now))
+        self.assertTrue(is_past_term(2013, "winter", now))
+        # Still in the grading period
+        self.assertFalse(is_past_term(2013, "spring", now))
+        self.assertFalse(is_past_term(2013, "summer", now))
+        self.assertFalse(is_past_term(2014, "winter", now))
+
+        with self.settings(RESTCLIENTS_SWS_PAST_TERM_GRACE_DAYS=0):
+            self.assertTrue(is_past_term(2013, "spring", now))
+
+        self.assertTrue(is_past_term_url("/student/v5/term/2013,winter.json", now))
+        self.assertFalse(is_past_term_url("/student/v5/term/current.json", now))
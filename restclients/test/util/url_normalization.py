@@ -0,0 +1,65 @@
+from django.test import TestCase
+from restclients.util.url_normalization import normalize_url, \
+    get_cache_url, collapse_report, normalization_stats
+
+
+class URLNormalizationTest(TestCase):
+    def test_query_order(self):
+        self.assertEquals(normalize_url("/search?year=2013&quarter=spring"),
+                          "/search?quarter=spring&year=2013")
+        self.assertEquals(normalize_url("/search?quarter=spring&year=2013"),
+                          "/search?quarter=spring&year=2013")
+
+        # Repeated parameters keep their order
+        self.assertEquals(normalize_url("/users?per_page=10&include[]=b&include[]=a"),
+                          "/users?include[]=b&include[]=a&per_page=10")
+
+        self.assertEquals(normalize_url("/search?&a=1&&b=2"), "/search?a=1&b=2")
+        self.assertEquals(normalize_url("/search?"), "/search")
+        self.assertEquals(normalize_url("/search#top"), "/search")
+
+    def test_escapes(self):
+        self.assertEquals(normalize_url("/course/2013,spring,B%20BIO,180"),
+                          "/course/2013,spring,B%20BIO,180")
+        self.assertEquals(normalize_url("/group/u_%7etest%2fgroup%2C"),
+                          "/group/u_~test%2Fgroup%2C")
+        self.assertEquals(normalize_url("/search?name=a%26b&id=%41"),
+                          "/search?id=A&name=a%26b")
+
+    def test_case(self):
+        self.assertEquals(normalize_url("HTTPS://Example.EDU/Student?Year=2013"),
+                          "https://example.edu/Student?Year=2013")
+        self.assertEquals(normalize_url("/Student?Year=2013", lowercase=True),
+                          "/student?year=2013")
+
+    def test_settings(self):
+        normalization_stats.reset()
+        with self.settings(RESTCLIENTS_CASE_INSENSITIVE_SERVICES=["sws"]):
+            self.assertEquals(get_cache_url("sws", "/Student?b=1&a=2"),
+                              "/student?a=2&b=1")
+            self.assertEquals(get_cache_url("pws", "/Person"), "/Person")
+
+        self.assertEquals(normalization_stats.get("checked"), 2)
+        self.assertEquals(normalization_stats.get("normalized"), 1)
+
+        with self.settings(RESTCLIENTS_NORMALIZE_CACHE_URLS=False):
+            self.assertEquals(get_cache_url("sws", "/s?b=1&a=2"), "/s?b=1&a=2")
+
+    def test_vary_headers(self):
+        with self.settings(RESTCLIENTS_CACHE_VARY_HEADERS={"gws": ["X-UW-Act-as", "Accept"]}):
+            self.assertEquals(get_cache_url("gws", "/group?b=1&a=2",
+                                            {"x-uw-act-as": "bill", "Accept": "text/xml",
+                                             "Connection": "close"}),
+                              "/group?a=2&b=1#accept=text%2Fxml&x-uw-act-as=bill")
+            self.assertEquals(get_cache_url("gws", "/group", {}), "/group")
+            self.assertEquals(get_cache_url("pws", "/person", {"X-UW-Act-as": "bill"}),
+                              "/person")
+
+    def test_collapse_report(self):
+        report = collapse_report([("sws", "/s?a=1&b=2"),
+                                  ("sws", "/s?b=2&a=1"),
+                                  ("sws", "/s?a=1&b=2"),
+                                  ("pws", "/s?b=2&a=1"),
+                                  ("sws", "/S?a=1&b=2")], ["sws"])
+        self.assertEquals(report, {"requests": 5, "raw_keys": 4,
+                                   "normalized_keys": 2, "collapsed": 2})
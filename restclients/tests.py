@@ -2,6 +2,11 @@ from django.utils import unittest
 
 from restclients.test.uwnetid.subscription import EmailForwardingTest
 from restclients.test.util.date_formator import formatorTest
+from restclients.test.util.single_flight import SingleFlightTest
+from restclients.test.util.lru import LRUStoreTest
+from restclients.test.util.sws_term import SWSTermURLTest
+from restclients.test.util.headers import HeaderDictTest
+from restclients.test.util.url_normalization import URLNormalizationTest
 from restclients.test.hfs.idcard import HfsTest
 from restclients.test.library.mylibinfo import MyLibInfoTest
 from restclients.test.digitlib.curric import DigitLibTest
@@ -49,6 +54,23 @@ from restclients.test.gws.search import GWSGroupSearch
 from restclients.test.cache.none import NoCacheTest
 from restclients.test.cache.time import TimeCacheTest
 from restclients.test.cache.etag import ETagCacheTest
+from restclients.test.cache.stale_while_revalidate import \
+    StaleWhileRevalidateTest
+from restclients.test.cache.stale_if_error import StaleIfErrorTest
+from restclients.test.cache.memory import MemoryCacheTest
+from restclients.test.cache.two_tier import TwoTierCacheTest
+from restclients.test.cache.django_cache import DjangoCacheTest
+from restclients.test.cache.policy import CachePolicyTest
+from restclients.test.cache.past_term import PastTermCacheTest
+from restclients.test.cache.compression import CompressionTest
+from restclients.test.cache.headers import CacheHeadersTest
+from restclients.test.cache.write_behind import WriteBehindTest
+from restclients.test.cache.keys import CacheKeyTest
+from restclients.test.cache.leases import CacheLeaseTest
+from restclients.test.cache.invalidation import CacheInvalidationTest
+from restclients.test.cache_warmer import CacheWarmerTest
+from restclients.test.cache_purge import CachePurgeTest
+from restclients.test.cache_snapshot import CacheSnapshotTest
 
 from restclients.test.book.by_schedule import BookstoreScheduleTest
 
@@ -89,6 +111,12 @@ from restclients.test.r25.spaces import R25TestSpaces
 from restclients.test.myplan import MyPlanTestData
 
 from restclients.test.thread import ThreadsTest
+from restclients.test.dao.registry import DAORegistryTest
+from restclients.test.dao.get_urls import GetURLsTest
+from restclients.test.dao.async_calls import AsyncDAOTest
+from restclients.test.dao.coalesce import CoalesceTest
+from restclients.test.dao.request_memo import RequestMemoTest
+from restclients.test.dao.cache_urls import CacheURLTest
 from restclients.test.view import ViewTest
 from restclients.test.dao_implementation.mock import TestMock
 from restclients.test.irws import IRWSTest
@@ -6,27 +6,52 @@ same api where start just calls run and.
 
 import threading
 from django.conf import settings
+from restclients.util.request_memo import get_request_memo, set_request_memo
+
+def use_threading():
+    """
+    Returns True if restclients should do work on real threads.
+    """
+    # Threading has been tested w/ the mysql backend.
+    # It should also work with the postgres/oracle/and so on backends,
+    # but we don't use those.
+    if settings.DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
+        if hasattr(settings, "RESTCLIENTS_DISABLE_THREADING"):
+            if not settings.RESTCLIENTS_DISABLE_THREADING:
+                return True
+        else:
+            return True
+
+    elif hasattr(settings, "RESTCLIENTS_USE_THREADING"):
+        if settings.RESTCLIENTS_USE_THREADING:
+            return True
+
+    return False
+
 
 class Thread(threading.Thread):
     _use_thread = False
 
     def __init__(self, *args, **kwargs):
-        # Threading has been tested w/ the mysql backend.
-        # It should also work with the postgres/oracle/and so on backends,
-        # but we don't use those.
-        if settings.DATABASES['default']['ENGINE'] == 'django.db.backends.mysql':
-            if hasattr(settings, "RESTCLIENTS_DISABLE_THREADING"):
-                if not settings.RESTCLIENTS_DISABLE_THREADING:
-                    self._use_thread = True
-            else:
-                self._use_thread = True
-
-        elif hasattr(settings, "RESTCLIENTS_USE_THREADING"):
-            if settings.RESTCLIENTS_USE_THREADING:
-                self._use_thread = True
+        if use_threading():
+            self._use_thread = True
 
         super(Thread, self).__init__(*args, **kwargs)
 
+        # Threads started while handling a request share its memo.
+        self._request_memo = get_request_memo()
+        if self._request_memo is not None:
+            self._run_without_memo = self.run
+            self.run = self._run_with_memo
+
+    def _run_with_memo(self):
+        previous_memo = get_request_memo()
+        set_request_memo(self._request_memo)
+        try:
+            self._run_without_memo()
+        finally:
+            set_request_memo(previous_memo)
+
     def start(self):
         if self._use_thread:
             super(Thread, self).start()
@@ -47,3 +72,52 @@ class Thread(threading.Thread):
             return super(Thread, self).join()
 
         return True
+
+
+class AsyncCall(Thread):
+    """
+    Runs func(*args, **kwargs) on a Thread, and keeps the return value or
+    the exception for the caller.  Calls start when they're created, so
+    many of them can be in flight at once; result() waits for one to finish.
+    """
+    def __init__(self, func, *args, **kwargs):
+        super(AsyncCall, self).__init__()
+        self._func = func
+        self._args = args
+        self._kwargs = kwargs
+        self._result = None
+        self._exception = None
+        self._finished = threading.Event()
+        self.start()
+
+    def run(self):
+        try:
+            self._result = self._func(*self._args, **self._kwargs)
+        except Exception as ex:
+            self._exception = ex
+        finally:
+            self._finished.set()
+
+    def done(self):
+        return self._finished.is_set()
+
+    def result(self, timeout=None):
+        """
+        Returns the value of the call, or raises the exception it raised.
+        """
+        self._finished.wait(timeout)
+        if not self._finished.is_set():
+            raise RuntimeError("Call did not finish within %s seconds" %
+                               timeout)
+
+        if self._exception is not None:
+            raise self._exception
+        return self._result
+
+
+def gather(calls, timeout=None):
+    """
+    Waits for all of the AsyncCalls passed in, and returns their results
+    in the same order.
+    """
+    return [call.result(timeout) for call in calls]
@@ -0,0 +1,29 @@
+"""
+Thread-safe named counters, for instrumenting the DAO and cache layers.
+"""
+import threading
+
+
+class Counters(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counts = {}
+
+    def increment(self, name, amount=1):
+        with self._lock:
+            self._counts[name] = self._counts.get(name, 0) + amount
+
+    def get(self, name):
+        with self._lock:
+            return self._counts.get(name, 0)
+
+    def get_stats(self):
+        """
+        Returns a copy of all of the counts, as a dictionary.
+        """
+        with self._lock:
+            return dict(self._counts)
+
+    def reset(self):
+        with self._lock:
+            self._counts = {}
@@ -0,0 +1,74 @@
+"""
+A dictionary for HTTP headers, and the compact format cache entries store
+them in.
+"""
+import json
+from collections import MutableMapping
+
+
+class HeaderDict(MutableMapping):
+    """
+    A dictionary with case insensitive keys, that keeps the case the header
+    was set with.  Lookups are a single dictionary access.
+    """
+    def __init__(self, headers=None, **kwargs):
+        self._store = {}
+        if headers is not None:
+            self.update(headers)
+        if kwargs:
+            self.update(kwargs)
+
+    def __getitem__(self, key):
+        return self._store[key.lower()][1]
+
+    def __setitem__(self, key, value):
+        self._store[key.lower()] = (key, value)
+
+    def __delitem__(self, key):
+        del self._store[key.lower()]
+
+    def __contains__(self, key):
+        return key.lower() in self._store
+
+    def __iter__(self):
+        return (key for key, value in self._store.itervalues())
+
+    def __len__(self):
+        return len(self._store)
+
+    def __eq__(self, other):
+        if not isinstance(other, MutableMapping) and (
+                not isinstance(other, dict)):
+            return NotImplemented
+        return dict(self.lower_items()) == dict(
+            HeaderDict(other).lower_items())
+
+    def __ne__(self, other):
+        equal = self.__eq__(other)
+        if equal is NotImplemented:
+            return equal
+        return not equal
+
+    def __repr__(self):
+        return "HeaderDict(%r)" % dict(self.items())
+
+    def lower_items(self):
+        return ((lower, pair[1]) for lower, pair in self._store.iteritems())
+
+    def copy(self):
+        return HeaderDict(self)
+
+
+def encode_headers(headers):
+    """
+    Returns headers as a JSON list of [name, value] pairs.
+    """
+    return json.dumps([[name, headers[name]] for name in headers],
+                      separators=(",", ":"))
+
+
+def decode_headers(data):
+    """
+    Returns a HeaderDict for data from encode_headers.
+    """
+    return HeaderDict(json.loads(data))
@@ -0,0 +1,86 @@
+"""
+A thread-safe, size-bounded LRU store for in-process caching.
+"""
+import threading
+from collections import OrderedDict
+from restclients.util.counters import Counters
+
+
+class LRUStore(object):
+    """
+    Holds values up to a budget of max_bytes, evicting the least recently
+    used values first.  Callers pass in the size of each value.
+    """
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.stats = Counters()
+        self._lock = threading.Lock()
+        self._values = OrderedDict()
+        self._bytes = 0
+
+    def get(self, key):
+        with self._lock:
+            if key not in self._values:
+                self.stats.increment("miss")
+                return None
+
+            value, size = self._values.pop(key)
+            self._values[key] = (value, size)
+            self.stats.increment("hit")
+            return value
+
+    def peek(self, key):
+        """
+        Returns the value for key, without counting a hit or miss, or
+        marking it as recently used.
+        """
+        with self._lock:
+            if key in self._values:
+                return self._values[key][0]
+            return None
+
+    def put(self, key, value, size):
+        with self._lock:
+            self._remove(key)
+
+            if size > self.max_bytes:
+                return
+
+            self._values[key] = (value, size)
+            self._bytes += size
+            self._evict()
+
+    def delete(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._values = OrderedDict()
+            self._bytes = 0
+
+    def keys(self):
+        with self._lock:
+            return list(self._values.keys())
+
+    def get_stats(self):
+        """
+        Returns the hit, miss and eviction counts, with the current number
+        of entries and bytes held.
+        """
+        stats = self.stats.get_stats()
+        with self._lock:
+            stats["entries"] = len(self._values)
+            stats["bytes"] = self._bytes
+        return stats
+
+    def _remove(self, key):
+        if key in self._values:
+            value, size = self._values.pop(key)
+            self._bytes -= size
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._values):
+            key, (value, size) = self._values.popitem(last=False)
+            self._bytes -= size
+            self.stats.increment("eviction")
@@ -0,0 +1,33 @@
+"""
+A per-request memo of GET responses.  While a memo is active on a thread,
+repeat GETs for the same resource are answered from it, without going to
+the cache or the service.  restclients.middleware.RequestMemoMiddleware
+starts and ends a memo around each django request.
+"""
+import threading
+
+
+_local = threading.local()
+
+
+def start_request_memo():
+    _local.memo = {}
+
+
+def end_request_memo():
+    _local.memo = None
+
+
+def get_request_memo():
+    """
+    Returns the active memo dictionary, or None if there isn't one.
+    """
+    return getattr(_local, "memo", None)
+
+
+def set_request_memo(memo):
+    """
+    Makes the memo passed in active on this thread.  Used to share a
+    request's memo with the threads it starts.
+    """
+    _local.memo = memo
@@ -0,0 +1,72 @@
+"""
+Coalesces identical concurrent calls, so only one of them does the work.
+"""
+import threading
+
+
+class _Flight(object):
+    def __init__(self):
+        self.finished = threading.Event()
+        self.result = None
+        self.exception = None
+
+
+class SingleFlight(object):
+    """
+    While a call for a key is running, later calls for the same key wait
+    for it and share its result (or exception) instead of running again.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._flights = {}
+        self._calls = 0
+        self._coalesced = 0
+
+    def do(self, key, func):
+        with self._lock:
+            flight = self._flights.get(key)
+            if flight is None:
+                flight = _Flight()
+                self._flights[key] = flight
+                self._calls += 1
+                is_leader = True
+            else:
+                self._coalesced += 1
+                is_leader = False
+
+        if not is_leader:
+            flight.finished.wait()
+            if flight.exception is not None:
+                raise flight.exception
+            return flight.result
+
+        try:
+            flight.result = func()
+            return flight.result
+        except Exception as ex:
+            flight.exception = ex
+            raise
+        finally:
+            with self._lock:
+                del self._flights[key]
+            flight.finished.set()
+
+    def in_flight(self):
+        with self._lock:
+            return len(self._flights)
+
+    def get_stats(self):
+        """
+        Returns a dictionary with the number of calls that ran, and the
+        number that shared another call's result instead.
+        """
+        with self._lock:
+            return {
+                "calls": self._calls,
+                "coalesced": self._coalesced,
+            }
+
+    def reset_stats(self):
+        with self._lock:
+            self._calls = 0
+            self._coalesced = 0
@@ -0,0 +1,73 @@
+"""
+Recognizes SWS urls that are scoped to a single term, e.g.
+/student/v5/term/2013,spring.json, /student/v5/course/2012,summer,TRAIN,100/A.json
+or /student/v5/registration.json?year=2013&quarter=spring&..., and whether
+that term is over.  Resources for terms that are over don't change, so they
+can be cached indefinitely.
+"""
+import re
+from datetime import date, datetime, timedelta
+from urlparse import urlparse, parse_qs
+from django.conf import settings
+
+
+QUARTERS = ("winter", "spring", "summer", "autumn")
+
+# The last day of each quarter, as (month, day).  These are later than the
+# actual last day of instruction, so the end of a term is never guessed
+# too early.
+QUARTER_ENDS = {
+    "winter": (3, 31),
+    "spring": (6, 30),
+    "summer": (8, 31),
+    "autumn": (12, 31),
+}
+
+_term_path = re.compile(r"^/student/v5/[a-z_]+/(\d{4})(?:,|%%2C)(%s)"
+                        r"(?:,|%%2C|\.json|/|$)" % "|".join(QUARTERS),
+                        re.IGNORECASE)
+
+
+def get_term_from_url(url):
+    """
+    Returns the (year, quarter) of a term scoped SWS url, or None.
+    """
+    matches = _term_path.match(url)
+    if matches:
+        return int(matches.group(1)), matches.group(2).lower()
+
+    parsed = urlparse(url)
+    if not parsed.path.startswith("/student/v5/") or not parsed.query:
+        return None
+
+    params = parse_qs(parsed.query)
+    year = params.get("year", [""])[0]
+    quarter = params.get("quarter", [""])[0].lower()
+    if re.match(r"^\d{4}$", year) and quarter in QUARTERS:
+        return int(year), quarter
+    return None
+
+
+def get_term_end(year, quarter):
+    month, day = QUARTER_ENDS[quarter]
+    return date(year, month, day)
+
+
+def is_past_term(year, quarter, now=None):
+    """
+    Returns True if the term, and the grading period after it, are over.
+    The grading period is RESTCLIENTS_SWS_PAST_TERM_GRACE_DAYS long.
+    """
+    if now is None:
+        now = datetime.now()
+
+    grace_days = getattr(settings, "RESTCLIENTS_SWS_PAST_TERM_GRACE_DAYS", 30)
+    final_day = get_term_end(year, quarter) + timedelta(days=grace_days)
+    return now.date() > final_day
+
+
+def is_past_term_url(url, now=None):
+    term = get_term_from_url(url)
+    if term is None:
+        return False
+    return is_past_term(term[0], term[1], now)
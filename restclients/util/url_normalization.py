@@ -0,0 +1,159 @@
+"""
+Puts urls in a canonical form for use as cache keys, so equivalent
+requests share a cache entry.  Query parameters are sorted by name,
+percent-encoding is made consistent, and for services listed in
+RESTCLIENTS_CASE_INSENSITIVE_SERVICES the url is lower cased.  Only cache
+keys are normalized - requests still go out with the url as it was built.
+
+Request headers that change the response, like X-UW-Act-as, can be made
+part of the key per service.  They're added as the fragment of the cache
+url, e.g. /student/v5/graderoster/...#x-uw-act-as=javerage
+
+RESTCLIENTS_NORMALIZE_CACHE_URLS = True
+RESTCLIENTS_CASE_INSENSITIVE_SERVICES = ["sws"]
+RESTCLIENTS_CACHE_VARY_HEADERS = {"sws": ["X-UW-Act-as"],
+                                  "gws": ["X-UW-Act-as"]}
+"""
+import re
+import string
+from urllib import urlencode
+from urlparse import urlsplit, urlunsplit
+from django.conf import settings
+from restclients.util.counters import Counters
+
+
+UNRESERVED = frozenset(string.ascii_letters + string.digits + "-._~")
+
+_escape = re.compile(r"%([0-9a-fA-F]{2})")
+
+# Urls looked up, and how many of them normalize to a different url:
+# checked, normalized
+normalization_stats = Counters()
+
+
+def _normalize_escapes(value):
+    """
+    Decodes escaped unreserved characters, and upper cases the hex digits
+    of the other escapes.
+    """
+    def replace(match):
+        char = chr(int(match.group(1), 16))
+        if char in UNRESERVED:
+            return char
+        return "%" + match.group(1).upper()
+
+    return _escape.sub(replace, value)
+
+
+def _param_name(param):
+    return param.split("=", 1)[0]
+
+
+def normalize_url(url, lowercase=False):
+    """
+    Returns the canonical form of url.  Parameters with the same name keep
+    their order, since that can matter to the service.
+    """
+    scheme, netloc, path, query, fragment = urlsplit(url)
+
+    path = _normalize_escapes(path)
+    params = [_normalize_escapes(param) for param in query.split("&")
+              if param]
+    query = "&".join(sorted(params, key=_param_name))
+
+    if lowercase:
+        path = path.lower()
+        query = query.lower()
+
+    # The fragment never reaches the service
+    return urlunsplit((scheme.lower(), netloc.lower(), path, query, ""))
+
+
+def get_cache_url(service, url, headers=None):
+    """
+    Returns the url that responses for service and url, requested with
+    headers, are cached under.
+    """
+    cache_url = url
+    if getattr(settings, "RESTCLIENTS_NORMALIZE_CACHE_URLS", True):
+        lowercase = service in getattr(
+            settings, "RESTCLIENTS_CASE_INSENSITIVE_SERVICES", [])
+        cache_url = normalize_url(url, lowercase)
+
+        normalization_stats.increment("checked")
+        if cache_url != url:
+            normalization_stats.increment("normalized")
+
+    vary = get_vary_values(service, headers)
+    if len(vary):
+        cache_url = "%s#%s" % (cache_url.split("#", 1)[0], urlencode(vary))
+    return cache_url
+
+
+def get_cache_prefix(service, url_prefix):
+    """
+    Returns the prefix of the cache urls for urls starting with url_prefix.
+    Parameters aren't sorted, so a prefix should end before the query
+    string, or at its "?".
+    """
+    if getattr(settings, "RESTCLIENTS_NORMALIZE_CACHE_URLS", True):
+        url_prefix = _normalize_escapes(url_prefix)
+        if service in getattr(settings,
+                              "RESTCLIENTS_CASE_INSENSITIVE_SERVICES", []):
+            url_prefix = url_prefix.lower()
+    return url_prefix
+
+
+def has_vary_headers(service):
+    """
+    Returns True if cache urls for the service can have request headers
+    added as a fragment.
+    """
+    return len(getattr(settings, "RESTCLIENTS_CACHE_VARY_HEADERS",
+                       {}).get(service, [])) > 0
+
+
+def get_vary_values(service, headers):
+    """
+    Returns a sorted list of (header, value) pairs, for the request headers
+    that are configured to vary the cache for the service.  Header names
+    are lower cased.
+    """
+    vary_headers = getattr(settings, "RESTCLIENTS_CACHE_VARY_HEADERS",
+                           {}).get(service, [])
+    if not headers or not vary_headers:
+        return []
+
+    lower_headers = dict((name.lower(), value)
+                         for name, value in headers.items())
+    values = []
+    for header in vary_headers:
+        header = header.lower()
+        if header in lower_headers:
+            value = lower_headers[header]
+            if isinstance(value, unicode):
+                value = value.encode("utf-8")
+            values.append((header, value))
+    return sorted(values)
+
+
+def collapse_report(requests, lowercase_services=()):
+    """
+    Takes (service, url) pairs, e.g. from a request log, and returns how
+    many distinct cache keys they make with and without normalization.
+    """
+    count = 0
+    raw_keys = set()
+    normalized_keys = set()
+    for service, url in requests:
+        count += 1
+        raw_keys.add((service, url))
+        normalized_keys.add((service, normalize_url(
+            url, service in lowercase_services)))
+
+    return {
+        "requests": count,
+        "raw_keys": len(raw_keys),
+        "normalized_keys": len(normalized_keys),
+        "collapsed": len(raw_keys) - len(normalized_keys),
+    }